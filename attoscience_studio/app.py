@@ -88,6 +88,7 @@ from attoscience_studio.tool_box.iftdata import *
 from attoscience_studio.utils.real_time_manitoring import *
 from attoscience_studio.utils.single_instance import SingleInstance
 from attoscience_studio.utils.anim_controller import AnimationController
+from attoscience_studio.electron_dynamics.td_watcher import TdDirectoryWatcher
 from attoscience_studio.utils.status_symbols import Symbols
 #--------------------------------
 from attoscience_studio.resources_rc import *
@@ -475,9 +476,18 @@ class MainWindow(QMainWindow):
     
         ##----------------------------------------------------
         self.system_monitor_widget = SystemMonitorWidget()
+        self.profiler_panel = ProfilerPanel()
         ##----------------------------------------------------
+
+        # Keep the monitor and profiler in one column so right_widget stays at index 1
+        monitor_widget = QWidget()
+        monitor_layout = QHBoxLayout(monitor_widget)
+        monitor_layout.setContentsMargins(0, 0, 0, 0)
+        monitor_layout.setSpacing(5)
+        monitor_layout.addWidget(self.system_monitor_widget, 3)
+        monitor_layout.addWidget(self.profiler_panel, 2)
     
-        main_layout.addWidget(self.system_monitor_widget)
+        main_layout.addWidget(monitor_widget)
         main_layout.addWidget(right_widget)
 
         widget.setLayout(main_layout)
@@ -2036,6 +2046,18 @@ class MainWindow(QMainWindow):
         controller = AnimationController(figure, canvas, self.ipy_console) ##>>>>>>>>>>>>>>>>>
         dialog.controller = controller
         #-----------------------------------------------
+
+        # watcher: append new td.* outputs of a running simulation
+        watcher = None
+        if hasattr(figure, 'frame_store'):
+            watcher = TdDirectoryWatcher(figure.watch_params['base_dir_iter'], figure.watch_params['base_dir_laser'],
+                                         figure.frame_store, figure.watch_params['T'],
+                                         laser_tail=figure.watch_params.get('laser_tail'), parent=dialog)
+            watcher.frames_added.connect(controller.append_frames)
+            watcher.error_occurred.connect(lambda message: self.log_activity(f"Stopped watching td.* outputs: {message}"))
+            watcher.start()
+            dialog.watcher = watcher
+        #-----------------------------------------------
         
         # control buttons
         control_layout = QHBoxLayout()
@@ -2058,12 +2080,15 @@ class MainWindow(QMainWindow):
         # close button
         close_btn = QPushButton("Close")
         close_btn.clicked.connect(lambda: (
+            watcher.stop() if watcher else None,
             controller.stop_animation(),
             dialog.accept()
         ))
         layout.addWidget(close_btn)
     
         dialog.exec_()
+        if watcher:
+            watcher.stop()
 
     def create_animation_controls(self, figure, canvas, parent_dialog):
         controls_layout = QHBoxLayout()
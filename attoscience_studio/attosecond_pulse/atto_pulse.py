@@ -43,14 +43,21 @@ from datetime import datetime
 from qtconsole.rich_jupyter_widget import RichJupyterWidget
 #--------------------------------
 from attoscience_studio.utils.window_func_ATTO import TotalCurrentFilter
+from attoscience_studio.utils.profiler import profile_stage
+from attoscience_studio.utils.peak_metrics import peak_metrics
+from attoscience_studio.attosecond_pulse.pulse_train import pulse_train_metrics, format_burst_table, save_burst_tables
+from attoscience_studio.attosecond_pulse.chirp_compensation import (compensation_scan, default_phase_grid,
+                                                                    plot_compensation_scan, format_compensation_scan)
 #--------------------------------
 from attoscience_studio.resources_rc import *
 #--------------------------------
 from attoscience_studio.helper_functions.constants import AtomicUnits
 TIMEau = AtomicUnits.TIMEau
 ##----------------------------------------------------
-def attosecond_pulses(lambda0_nm, qstart, qmax, filtering, attosecond_method, window_func, file_path):
-    data = np.loadtxt(file_path)
+def attosecond_spectrum(lambda0_nm, qstart, qmax, filtering, attosecond_method, window_func, file_path):
+    # Band-passed spectrum [qstart, qmax] of the filtered current (Method 1) or of its time derivative (Method 2)
+    with profile_stage("Attosecond pulse", "load"):
+        data = np.loadtxt(file_path)
     
     nrm = 0.9500
     nn = filtering    
@@ -86,58 +93,59 @@ def attosecond_pulses(lambda0_nm, qstart, qmax, filtering, attosecond_method, wi
         decay_rate = WF_param
     
     #---------------CALL--------------------
-    filter_obj = TotalCurrentFilter(method=filter_method, EoP=EoP, exponent=exponent, sigma=sigma, decay_rate=decay_rate)
-    hx, hy, dhx, dhy = filter_obj.apply_filter(t, jx, jy, djx, djy)
+    with profile_stage("Attosecond pulse", "filter"):
+        filter_obj = TotalCurrentFilter(method=filter_method, EoP=EoP, exponent=exponent, sigma=sigma, decay_rate=decay_rate)
+        hx, hy, dhx, dhy = filter_obj.apply_filter(t, jx, jy, djx, djy)
     #---------------------------------------
-    if attosecond_method == 'Method 1':
-        ahx = np.zeros(len(w), dtype=complex)
-        ahy = np.zeros(len(w), dtype=complex)
-        for l in range(len(w)):
-            fx = hx * np.exp(-1j * w[l] * t)
-            ahx[l] = np.trapz(fx, t)
-            fy = hy * np.exp(-1j * w[l] * t)
-            ahy[l] = np.trapz(fy, t)
-    
-        Ix = np.zeros(len(t), dtype=complex)
-        Iy = np.zeros(len(t), dtype=complex)
-        for j in range(len(t)):
-            ffx = ahx * np.exp(1j * w * t[j])
-            Ix[j] = np.trapz(ffx, w)
-            ffy = ahy * np.exp(1j * w * t[j])
-            Iy[j] = np.trapz(ffy, w)
-        
-        Ix = np.abs(Ix)**2
-        Iy = np.abs(Iy)**2
-        I  = np.abs(Ix + Iy) ** 2
-        
-    elif attosecond_method == 'Method 2':
-        ajx = np.zeros(len(w), dtype=complex)
-        ajy = np.zeros(len(w), dtype=complex)
-        for l in range(len(w)):
-            gx = dhx * np.exp(-1j * w[l] * t)
-            ajx[l] = w[l] * np.trapz(gx, t)
-            gy = dhy * np.exp(-1j * w[l] * t)
-            ajy[l] = w[l] * np.trapz(gy, t)
-    
+    with profile_stage("Attosecond pulse", "transform"):
+        ax = np.zeros(len(w), dtype=complex)
+        ay = np.zeros(len(w), dtype=complex)
+        if attosecond_method == 'Method 1':
+            for l in range(len(w)):
+                fx = hx * np.exp(-1j * w[l] * t)
+                ax[l] = np.trapz(fx, t)
+                fy = hy * np.exp(-1j * w[l] * t)
+                ay[l] = np.trapz(fy, t)
+
+        elif attosecond_method == 'Method 2':
+            for l in range(len(w)):
+                gx = dhx * np.exp(-1j * w[l] * t)
+                ax[l] = w[l] * np.trapz(gx, t)
+                gy = dhy * np.exp(-1j * w[l] * t)
+                ay[l] = w[l] * np.trapz(gy, t)
+    return w, ax, ay, t, T
+
+def attosecond_pulses(lambda0_nm, qstart, qmax, filtering, attosecond_method, window_func, file_path):
+    w, ax, ay, t, T = attosecond_spectrum(lambda0_nm, qstart, qmax, filtering, attosecond_method, window_func, file_path)
+    return pulses_from_spectrum(w, ax, ay, t, T)
+
+def pulses_from_spectrum(w, ax, ay, t, T):
+    # Pulse reconstruction from the band-passed spectrum; profiled as one
+    # post-process stage so "transform" is only the forward spectrum
+    with profile_stage("Attosecond pulse", "post-process"):
         Ix = np.zeros(len(t), dtype=complex)
         Iy = np.zeros(len(t), dtype=complex)
         for j in range(len(t)):
-            ggx = ajx * np.exp(1j * w * t[j])
+            ggx = ax * np.exp(1j * w * t[j])
             Ix[j] = np.trapz(ggx, w)
-            ggy = ajy * np.exp(1j * w * t[j])
+            ggy = ay * np.exp(1j * w * t[j])
             Iy[j] = np.trapz(ggy, w)
 
         Ix = np.abs(Ix)**2
-        Iy = np.abs(Iy)**2    
+        Iy = np.abs(Iy)**2
         I = np.abs(Ix + Iy) ** 2
-        
-    I_Max_x = max(Ix)
-    I_Max_y = max(Iy)
-    I_Max = max(I)
-    Time_OC = t/T
+
+        I_Max_x = max(Ix)
+        I_Max_y = max(Iy)
+        I_Max = max(I)
+        Time_OC = t/T
     return I, Ix, Iy, I_Max, I_Max_x, I_Max_y, Time_OC, T, t
 ##----------------------------------------------------      
 def plot_attosecond_pulse(I, Ix, Iy, I_Max, I_Max_x, I_Max_y, Time_OC, T, t, selected_components, CO_FWHM, lambda0_nm, qstart, qmax, TIMEau, extract_data_option, x_axis_unit, plot_settings):
+    if 'coord' in CO_FWHM:
+        # Peak coordinates and FWHM [o.c.] of the three components in one batch
+        metrics = peak_metrics(np.vstack((I, Ix, Iy)), Time_OC)
+
     if 'total' in selected_components:
         if 'extract_data' in extract_data_option:
             file_path = "pulse_tot.txt"
@@ -161,26 +169,11 @@ def plot_attosecond_pulse(I, Ix, Iy, I_Max, I_Max_x, I_Max_y, Time_OC, T, t, sel
             plt.plot(Time_OC, I, linewidth=plot_settings.get("line_thickness", 1.4),color=plot_settings.get("line_color", "black"))
             
         if 'coord' in CO_FWHM:
-            idx_tot = np.argmax(I)
-            max_I_tot = t[idx_tot]
+            max_I_tot = t[metrics["peak_index"][0]]
             half_I_tot = I_Max / 2
-
-            left_idx_candidates_tot  = np.where(I[:idx_tot] <= half_I_tot)[0]
-            right_idx_candidates_tot = np.where(I[idx_tot:] <= half_I_tot)[0]
-
-            if left_idx_candidates_tot.size > 0:
-                left_idx_tot = left_idx_candidates_tot[-1]
-            else:
-                left_idx_tot = 0
-
-            if right_idx_candidates_tot.size > 0:
-                right_idx_tot = right_idx_candidates_tot[0] + idx_tot
-            else:
-                right_idx_tot = len(I) - 1
-            t_left_tot  = Time_OC[left_idx_tot]
-            t_right_tot = Time_OC[right_idx_tot]
-            FWHM_tot = t_right_tot - t_left_tot
-            
+            t_left_tot  = metrics["t_left"][0]
+            t_right_tot = metrics["t_right"][0]
+            FWHM_tot = metrics["fwhm"][0]
             FWHM_SI_tot = FWHM_tot * T * TIMEau
             FWHM_as_tot = FWHM_SI_tot * 1e18
 
@@ -225,25 +218,11 @@ def plot_attosecond_pulse(I, Ix, Iy, I_Max, I_Max_x, I_Max_y, Time_OC, T, t, sel
             plt.plot(Time_OC, Ix, linewidth=plot_settings.get("line_thickness", 1.4),color=plot_settings.get("line_color", "black"))
             
         if 'coord' in CO_FWHM:
-            idx_x = np.argmax(Ix)
-            max_I_x = t[idx_x]
+            max_I_x = t[metrics["peak_index"][1]]
             half_I_x = I_Max_x / 2
-
-            left_idx_candidates_x  = np.where(Ix[:idx_x] <= half_I_x)[0]
-            right_idx_candidates_x = np.where(Ix[idx_x:] <= half_I_x)[0]
-
-            if left_idx_candidates_x.size > 0:
-                left_idx_x = left_idx_candidates_x[-1]
-            else:
-                left_idx_x = 0
-
-            if right_idx_candidates_x.size > 0:
-                right_idx_x = right_idx_candidates_x[0] + idx_x
-            else:
-                right_idx_x = len(Ix) - 1
-            t_left_x  = Time_OC[left_idx_x]
-            t_right_x = Time_OC[right_idx_x]
-            FWHM_x = t_right_x - t_left_x
+            t_left_x  = metrics["t_left"][1]
+            t_right_x = metrics["t_right"][1]
+            FWHM_x = metrics["fwhm"][1]
             FWHM_SI_x = FWHM_x * T * TIMEau
             FWHM_as_x = FWHM_SI_x * 1e18           
             plt.plot(max_I_x / T, I_Max_x, 'o', markersize=4, markeredgecolor='b', markerfacecolor=[0, 0.7, 0.7])
@@ -287,27 +266,11 @@ def plot_attosecond_pulse(I, Ix, Iy, I_Max, I_Max_x, I_Max_y, Time_OC, T, t, sel
             plt.plot(Time_OC, Iy, linewidth=plot_settings.get("line_thickness", 1.4),color=plot_settings.get("line_color", "black"))
 
         if 'coord' in CO_FWHM:
-            idx_y = np.argmax(Iy)
-            max_I_y = t[idx_y]
+            max_I_y = t[metrics["peak_index"][2]]
             half_I_y = I_Max_y / 2
-
-            left_idx_candidates_y  = np.where(Iy[:idx_y] <= half_I_y)[0]
-            right_idx_candidates_y = np.where(Iy[idx_y:] <= half_I_y)[0]
-
-            if left_idx_candidates_y.size > 0:
-                left_idx_y = left_idx_candidates_y[-1]
-            else:
-                left_idx_y = 0
-
-            if right_idx_candidates_y.size > 0:
-                right_idx_y = right_idx_candidates_y[0] + idx_y
-            else:
-                right_idx_y = len(Iy) - 1
-
-            t_left_y  = Time_OC[left_idx_y]
-            t_right_y = Time_OC[right_idx_y]
-
-            FWHM_y = t_right_y - t_left_y
+            t_left_y  = metrics["t_left"][2]
+            t_right_y = metrics["t_right"][2]
+            FWHM_y = metrics["fwhm"][2]
             FWHM_SI_y = FWHM_y * T * TIMEau
             FWHM_as_y = FWHM_SI_y * 1e18
 
@@ -341,8 +304,24 @@ def atto_plot_connector(lambda0_nm, qstart, qmax, filtering, attosecond_method,
         return        
     if file_path:
         try:
-            I, Ix, Iy, I_Max, I_Max_x, I_Max_y, Time_OC, T, t = attosecond_pulses(lambda0_nm, qstart, qmax, filtering, attosecond_method, window_func, file_path)
-            plot_attosecond_pulse(I, Ix, Iy, I_Max, I_Max_x, I_Max_y, Time_OC, T, t, selected_components, CO_FWHM, lambda0_nm, qstart, qmax, TIMEau, extract_data_option, x_axis_unit, plot_settings)
+            w, ax, ay, t, T = attosecond_spectrum(lambda0_nm, qstart, qmax, filtering, attosecond_method, window_func, file_path)
+            I, Ix, Iy, I_Max, I_Max_x, I_Max_y, Time_OC, T, t = pulses_from_spectrum(w, ax, ay, t, T)
+            with profile_stage("Attosecond pulse", "plot"):
+                plot_attosecond_pulse(I, Ix, Iy, I_Max, I_Max_x, I_Max_y, Time_OC, T, t, selected_components, CO_FWHM, lambda0_nm, qstart, qmax, TIMEau, extract_data_option, x_axis_unit, plot_settings)
+            burst_msg = ""
+            if 'bursts' in CO_FWHM:
+                with profile_stage("Pulse train", "post-process"):
+                    tables = pulse_train_metrics(I, Ix, Iy, t, T)
+                burst_msg = format_burst_table(tables, T)
+                if 'extract_data' in extract_data_option:
+                    save_burst_tables(tables, T)
+            chirp_msg = ""
+            if 'chirp' in CO_FWHM:
+                with profile_stage("Chirp compensation", "transform"):
+                    scan = compensation_scan(w, ax, ay, T, *default_phase_grid(w))
+                chirp_msg = format_compensation_scan(scan)
+                with profile_stage("Chirp compensation", "plot"):
+                    plot_compensation_scan(scan, plot_settings)
             max_Time_OC = np.max(Time_OC)
             T_SI = T*2.418884326509*1e-17
             timestamp = datetime.now().strftime("[%H:%M:%S]")
@@ -356,6 +335,8 @@ def atto_plot_connector(lambda0_nm, qstart, qmax, filtering, attosecond_method,
                 f">>> T [a.u.]: {T:.12e}\n"
                 f">>> T [second]: {T_SI:.12e}\n"
                 f">>> Max optical cycle: {max_Time_OC}\n"
+                + burst_msg
+                + chirp_msg
                 + "-" * 75
             )
             print_to_console(ipy_console, msg)
@@ -797,9 +778,13 @@ class ModernDialog(QDialog):
     
         self.extract_data_checkbox = QCheckBox("Extract Data")
         self.atto_coordinate_checkbox = QCheckBox("Coordinates and FWHM")
+        self.atto_bursts_checkbox = QCheckBox("Burst Table")
+        self.atto_chirp_checkbox = QCheckBox("Chirp Compensation Scan")
     
         options_layout.addWidget(self.extract_data_checkbox)
         options_layout.addWidget(self.atto_coordinate_checkbox)
+        options_layout.addWidget(self.atto_bursts_checkbox)
+        options_layout.addWidget(self.atto_chirp_checkbox)
         options_layout.addStretch()
 
         ##-------
@@ -1141,6 +1126,10 @@ class ModernDialog(QDialog):
             CO_FWHM = []
             if self.atto_coordinate_checkbox.isChecked():
                 CO_FWHM.append('coord')
+            if self.atto_bursts_checkbox.isChecked():
+                CO_FWHM.append('bursts')
+            if self.atto_chirp_checkbox.isChecked():
+                CO_FWHM.append('chirp')
 
             self.accept()
             # Update
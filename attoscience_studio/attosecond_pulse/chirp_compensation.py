@@ -0,0 +1,167 @@
+# attosecond_pulse/chirp_compensation.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import matplotlib.pyplot as plt
+#--------------------------------
+from attoscience_studio.utils.peak_metrics import peak_metrics
+from attoscience_studio.helper_functions.constants import AtomicUnits
+TIMEau = AtomicUnits.TIMEau
+##----------------------------------------------------
+AS_AU = 1e-18 / TIMEau          # 1 as in a.u. of time
+DEFAULT_CHUNK_BYTES = 64 * 1024**2
+##----------------------------------------------------
+def spectral_phase(w, gdd_as2, tod_as3, wc=None):
+    """
+    phi(w) = GDD/2 (w - wc)^2 + TOD/6 (w - wc)^3 for every (GDD, TOD) pair.
+
+    Parameters:
+    - w: Angular frequencies [a.u.] (Nw,).
+    - gdd_as2, tod_as3: Arrays of the same shape (P,) [as^2], [as^3].
+    - wc: Expansion point [a.u.]; centre of the window by default.
+
+    Returns (P, Nw).
+    """
+    wc = 0.5 * (w[0] + w[-1]) if wc is None else wc
+    dw = (w - wc)[None, :]
+    gdd = np.asarray(gdd_as2, dtype=float)[:, None] * AS_AU**2
+    tod = np.asarray(tod_as3, dtype=float)[:, None] * AS_AU**3
+    return gdd / 2 * dw**2 + tod / 6 * dw**3
+
+def synthesize(w, ax, ay, phases, n_fft):
+    """
+    Pulses of the band-passed spectra ax, ay (uniform w) with extra spectral
+    phases (P, Nw), by one zero-padded inverse FFT per row. Same intensity
+    definition as attosecond_pulses(): I = (|Ex|^2 + |Ey|^2)^2.
+    Returns the time axis (n_fft,) [a.u.] and I (P, n_fft).
+    """
+    dw = w[1] - w[0]
+    # Trapezoid weights so that a flat phase reproduces np.trapz(a * exp(1j*w*t), w)
+    weights = np.full(len(w), dw)
+    weights[[0, -1]] *= 0.5
+    correction = np.exp(1j * phases)
+    ex = n_fft * np.fft.ifft(ax * weights * correction, n=n_fft, axis=-1)
+    ey = n_fft * np.fft.ifft(ay * weights * correction, n=n_fft, axis=-1)
+    # exp(1j*w[0]*t) only rotates the phase and drops out of |E|^2
+    t = np.arange(n_fft) * 2 * np.pi / (n_fft * dw)
+    return t, (np.abs(ex)**2 + np.abs(ey)**2)**2
+
+def centre_peaks(I):
+    """
+    Circularly shifts every row of I (P, n_fft) so that its maximum sits in
+    the middle of the window. The synthesized pulses live on a periodic window
+    (the zero-phase peak is at t = 0, index 0) while peak_metrics() does not
+    wrap around, so a burst straddling the window edge would be cut in half.
+    """
+    n_fft = I.shape[-1]
+    shift = np.argmax(I, axis=-1) - n_fft // 2
+    index = (np.arange(n_fft)[None, :] + shift[:, None]) % n_fft
+    return np.take_along_axis(I, index, axis=-1)
+
+def fft_length(w, T, samples_per_cycle=200):
+    # Zero padding for a time step of about T/samples_per_cycle
+    dw = w[1] - w[0]
+    n = int(np.ceil(2 * np.pi / dw / (T / samples_per_cycle)))
+    return int(2**np.ceil(np.log2(max(n, len(w)))))
+
+def compensation_scan(w, ax, ay, T, gdd_as2, tod_as3, samples_per_cycle=200, max_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    FWHM [as] of the attosecond pulse for every GDD x TOD correction.
+
+    All candidates of a chunk (bounded by max_bytes) are synthesized with one
+    batched FFT and measured with peak_metrics.
+
+    Parameters:
+    - w, ax, ay: Band-passed spectrum from attosecond_spectrum().
+    - T: Driver period [a.u.].
+    - gdd_as2, tod_as3: 1D grids of the added group-delay dispersion [as^2] and third-order dispersion [as^3].
+
+    Returns a dict: gdd, tod, fwhm_as (n_gdd, n_tod), peak (n_gdd, n_tod),
+    best (gdd, tod, fwhm_as), uncompensated_fwhm_as, transform_limited_fwhm_as
+    and consistent (the transform-limited pulse is not longer than the
+    uncompensated one, as it must be unless the FWHM is ill-defined).
+    """
+    gdd_as2 = np.atleast_1d(np.asarray(gdd_as2, dtype=float))
+    tod_as3 = np.atleast_1d(np.asarray(tod_as3, dtype=float))
+    n_fft = fft_length(w, T, samples_per_cycle)
+    gdd_grid, tod_grid = np.meshgrid(gdd_as2, tod_as3, indexing="ij")
+    gdd_flat, tod_flat = gdd_grid.ravel(), tod_grid.ravel()
+
+    # ~4 complex/real temporaries of n_fft per candidate
+    chunk = max(1, int(max_bytes // (4 * 16 * n_fft)))
+    fwhm = np.empty(gdd_flat.size)
+    peak = np.empty(gdd_flat.size)
+    for first in range(0, gdd_flat.size, chunk):
+        sl = slice(first, first + chunk)
+        t, I = synthesize(w, ax, ay, spectral_phase(w, gdd_flat[sl], tod_flat[sl]), n_fft)
+        metrics = peak_metrics(centre_peaks(I), t)
+        fwhm[sl] = metrics["fwhm"] / AS_AU
+        peak[sl] = metrics["peak_value"]
+
+    t, I_ref = synthesize(w, ax, ay, np.zeros((1, len(w))), n_fft)
+    uncompensated = peak_metrics(centre_peaks(I_ref), t)["fwhm"][0] / AS_AU
+    t, I_tl = synthesize(w, np.abs(ax), np.abs(ay), np.zeros((1, len(w))), n_fft)
+    transform_limited = peak_metrics(centre_peaks(I_tl), t)["fwhm"][0] / AS_AU
+
+    best = int(np.argmin(fwhm))
+    return {
+        "gdd": gdd_as2, "tod": tod_as3,
+        "fwhm_as": fwhm.reshape(gdd_grid.shape), "peak": peak.reshape(gdd_grid.shape),
+        "best": (gdd_flat[best], tod_flat[best], fwhm[best]),
+        "uncompensated_fwhm_as": uncompensated,
+        "transform_limited_fwhm_as": transform_limited,
+        "consistent": bool(transform_limited <= uncompensated * (1 + 1e-6)),
+    }
+
+def default_phase_grid(w, n_gdd=41, n_tod=21):
+    """
+    GDD/TOD grids scaled to the bandwidth: +-4 rad of quadratic and +-4 rad
+    of cubic phase at the window edges.
+    """
+    half_band = 0.5 * (w[-1] - w[0]) * AS_AU       # [rad/as]
+    gdd_max = 2 * 4.0 / half_band**2
+    tod_max = 6 * 4.0 / half_band**3
+    return np.linspace(-gdd_max, gdd_max, n_gdd), np.linspace(-tod_max, tod_max, n_tod)
+
+##----------------------------------------------------
+def plot_compensation_scan(scan, plot_settings=None):
+    plot_settings = plot_settings or {}
+    fig = plt.figure()
+    fig.patch.set_facecolor(plot_settings.get("background_color", "white"))
+    mesh = plt.pcolormesh(scan["gdd"], scan["tod"], scan["fwhm_as"].T, shading="nearest", cmap=plot_settings.get("colormap", "viridis_r"))
+    plt.colorbar(mesh, label="FWHM [as]")
+    gdd, tod, fwhm = scan["best"]
+    plt.plot(gdd, tod, 'o', markersize=5, markeredgecolor='w', markerfacecolor='r')
+    plt.title(plot_settings.get("graph_title", f"Chirp compensation (best {fwhm:.1f} as, uncompensated {scan['uncompensated_fwhm_as']:.1f} as)"))
+    plt.xlabel(r"GDD [as$^2$]")
+    plt.ylabel(r"TOD [as$^3$]")
+    plt.show()
+    return fig
+
+def format_compensation_scan(scan):
+    gdd, tod, fwhm = scan["best"]
+    return (
+        f">>> Chirp compensation: {scan['fwhm_as'].size} GDD/TOD candidates\n"
+        f">>> Uncompensated FWHM [as]: {scan['uncompensated_fwhm_as']:.6e}\n"
+        f">>> Transform-limited FWHM [as]: {scan['transform_limited_fwhm_as']:.6e}\n"
+        f">>> Best FWHM [as]: {fwhm:.6e} at GDD [as^2]: {gdd:.6e}, TOD [as^3]: {tod:.6e}\n"
+        + ("" if scan["consistent"] else
+           ">>> Warning: the transform-limited FWHM exceeds the uncompensated one; the pulse has no\n"
+           ">>>          single well-defined peak and the FWHM values are not reliable\n")
+    )
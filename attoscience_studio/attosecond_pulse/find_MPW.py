@@ -27,10 +27,13 @@ from functools import partial
 
 from PyQt5.QtCore import QObject, QThread, pyqtSignal
 from attoscience_studio.resources_rc import *
+from attoscience_studio.utils.profiler import profile_stage
+from attoscience_studio.utils.peak_metrics import peak_metrics
 ##----------------------------------------------------
 def read_data_for_MPW(file_path):
     try:
-        data = np.loadtxt(file_path)
+        with profile_stage("MPW search", "load"):
+            data = np.loadtxt(file_path)
         if data.size == 0:
             raise ValueError("The file is empty.")
         t = data[:, 1]
@@ -76,29 +79,9 @@ def find_MPW_core(t, dt, jx, jy, lambda0_nm, qstart, qmax):
         Iy = np.abs(Iy)**2    
         I = np.abs(Ix + Iy) ** 2
 
-        idx_tot = np.argmax(I)
-        
-        OC = Time_OC[idx_tot] #time corresponding to I_Max
-
-        I_Max = max(I)
-        half_I_tot = I_Max / 2
-
-        left_idx_candidates_tot = np.where(I[:idx_tot] <= half_I_tot)[0]
-        right_idx_candidates_tot = np.where(I[idx_tot:] <= half_I_tot)[0]
-
-        if left_idx_candidates_tot.size > 0:
-            left_idx_tot = left_idx_candidates_tot[-1]
-        else:
-            left_idx_tot = 0
-
-        if right_idx_candidates_tot.size > 0:
-            right_idx_tot = right_idx_candidates_tot[0] + idx_tot
-        else:
-            right_idx_tot = len(I) - 1
-
-        t_left_tot = Time_OC[left_idx_tot]
-        t_right_tot = Time_OC[right_idx_tot]
-        FWHM_tot = t_right_tot - t_left_tot
+        metrics = peak_metrics(I, Time_OC)
+        OC = metrics["peak_time"] #time corresponding to I_Max
+        FWHM_tot = metrics["fwhm"]
 
         atomic_to_seconds = 2.4188843265857e-17
         FWHM_SI_tot = FWHM_tot * T * atomic_to_seconds
@@ -110,14 +93,16 @@ def find_MPW_core(t, dt, jx, jy, lambda0_nm, qstart, qmax):
         FWHM, OC = calculate_FWHM(qstart_inner, qmax_inner)
         return FWHM, OC, qstart_inner, qmax_inner
     n_jobs = 4
-    results = Parallel(n_jobs=n_jobs)(
-        delayed(parallel_calculate)(qstart_inner, qmax_inner)
-        for qstart_inner in range(int(qstart), int(qmax - 1))
-        for qmax_inner in range(int(qstart_inner + 1), int(qmax + 1))
-    )
+    with profile_stage("MPW search", "transform"):
+        results = Parallel(n_jobs=n_jobs)(
+            delayed(parallel_calculate)(qstart_inner, qmax_inner)
+            for qstart_inner in range(int(qstart), int(qmax - 1))
+            for qmax_inner in range(int(qstart_inner + 1), int(qmax + 1))
+        )
     
-    min_result = min(results, key=lambda x: x[0])
-    min_FWHM, OC, optimal_qstart, optimal_qmax = min_result
+    with profile_stage("MPW search", "post-process"):
+        min_result = min(results, key=lambda x: x[0])
+        min_FWHM, OC, optimal_qstart, optimal_qmax = min_result
 
     return min_FWHM, optimal_qstart, optimal_qmax, OC, last_OC, max_Time_OC
 
@@ -19,7 +19,6 @@
 
 import os, sys
 import math
-import time
 import warnings
 import numpy as np
 import matplotlib.pyplot as plt
@@ -42,12 +41,20 @@ from qtconsole.rich_jupyter_widget import RichJupyterWidget
 from attoscience_studio.resources_rc import *
 #--------------------------------
 from attoscience_studio.utils.window_func import TotalCurrentFilter
+from attoscience_studio.utils.profiler import profile_stage
+from attoscience_studio.attosecond_pulse.tf_engine import (polarization_maps, save_tf_maps, plot_polarization_maps,
+                                                            gabor_sweep, plot_gabor_sweep, morlet_transform)
+from attoscience_studio.attosecond_pulse.tf_ridges import extract_ridges, format_ridges, save_ridges, plot_ridges
 #--------------------------------
 from attoscience_studio.helper_functions.constants import PhysicalConstants
 Ip_HeV = PhysicalConstants.Ip_HeV
 #--------------------------------
 from attoscience_studio.utils.status_symbols import Symbols
 ##----------------------------------------------------
+TRANSFORMS = ("gabor", "morlet")
+# Directory of the saved g_factor sweep
+SWEEP_DIR = "tf_gabor_sweep"
+##----------------------------------------------------
 def read_gtf(file_path):
     try:
         data = np.loadtxt(file_path)
@@ -87,14 +94,7 @@ def GTF_core(t, dt, hx, hy, w, sigma_gabor):
     
     return Ax, Ay
 ##----------------------------------------------------
-def time_frequency(t, dt, jx, jy, lambda0_nm, qstart, qend, g_factor, filtering, window_func):
-    w0 = 45.563 / lambda0_nm
-    T0 = 2 * np.pi / w0
-    dw = w0/2
-    
-    sigma_gabor = T0 / g_factor
-
-    #---------------------------------------
+def filtered_currents(t, jx, jy, filtering, window_func):
     EoP = 1.0 - filtering/100
     filter_method = window_func[0]
     WF_param = window_func[1]
@@ -110,27 +110,61 @@ def time_frequency(t, dt, jx, jy, lambda0_nm, qstart, qend, g_factor, filtering,
         decay_rate = WF_param
     
     #---------------CALL--------------------
-    filter_obj = TotalCurrentFilter(method=filter_method, EoP=EoP, exponent=exponent, sigma=sigma, decay_rate=decay_rate)
-    hx, hy = filter_obj.apply_filter(t, jx, jy)
+    with profile_stage("Time-frequency", "filter"):
+        filter_obj = TotalCurrentFilter(method=filter_method, EoP=EoP, exponent=exponent, sigma=sigma, decay_rate=decay_rate)
+        hx, hy = filter_obj.apply_filter(t, jx, jy)
     #---------------------------------------
-    
+    return hx, hy
+
+def harmonic_axis(lambda0_nm, qstart, qend):
+    # Analysed frequencies: half-order steps between qstart and qend
+    w0 = 45.563 / lambda0_nm
+    T0 = 2 * np.pi / w0
+    dw = w0/2
     w = np.arange(qstart * w0, qend * w0 + dw, dw)
     www = (w * Ip_HeV)
+    return w, w0, T0, www
 
-    start_time = time.perf_counter()
+def currents_transform(t, dt, hx, hy, w, T0, g_factor, transform="gabor", omega_c=6.0):
+    # Complex transforms Ax, Ay (Nt, Nw) of already filtered currents, and the window width(s)
+    if transform not in TRANSFORMS:
+        raise ValueError(f"Unknown transform '{transform}'. Expected one of {TRANSFORMS}.")
     #---------------CALL--------------------
-    Ax, Ay = GTF_core(t, dt, hx, hy, w, sigma_gabor)
+    with profile_stage("Time-frequency", "transform"):
+        if transform == "morlet":
+            Ax, Ay, sigma_gabor = morlet_transform(t, dt, hx, hy, w, omega_c)
+        else:
+            sigma_gabor = T0 / g_factor
+            Ax, Ay = GTF_core(t, dt, hx, hy, w, sigma_gabor)
     #---------------------------------------
-    end_time = time.perf_counter()
-    print(f"GTF_core() execution time: {end_time - start_time:.4f} seconds")
-
-    Ax_abs = np.abs(Ax)
-    Ax_log = np.log10(Ax_abs)
-    Ay_abs = np.abs(Ay)
-    Ay_log = np.log10(Ay_abs)
-    Atot_abs = np.sqrt(Ax_abs ** 2 + Ay_abs ** 2)
-    Atot_log = np.log10(Atot_abs)
-    
+    return Ax, Ay, sigma_gabor
+
+def gabor_transform(t, dt, jx, jy, lambda0_nm, qstart, qend, g_factor, filtering, window_func, transform="gabor", omega_c=6.0):
+    """
+    Filtered currents and their complex time-frequency transforms Ax, Ay (Nt, Nw).
+    transform is 'gabor' (fixed window T0/g_factor) or 'morlet' (wavelet of
+    width omega_c/w, g_factor unused).
+    Returns Ax, Ay, t, T0, w, w0, www, sigma_gabor (per frequency for 'morlet').
+    """
+    w, w0, T0, www = harmonic_axis(lambda0_nm, qstart, qend)
+    hx, hy = filtered_currents(t, jx, jy, filtering, window_func)
+    Ax, Ay, sigma_gabor = currents_transform(t, dt, hx, hy, w, T0, g_factor, transform, omega_c)
+    return Ax, Ay, t, T0, w, w0, www, sigma_gabor
+
+def log_amplitudes(Ax, Ay):
+    with profile_stage("Time-frequency", "post-process"):
+        Ax_abs = np.abs(Ax)
+        Ax_log = np.log10(Ax_abs)
+        Ay_abs = np.abs(Ay)
+        Ay_log = np.log10(Ay_abs)
+        Atot_abs = np.sqrt(Ax_abs ** 2 + Ay_abs ** 2)
+        Atot_log = np.log10(Atot_abs)
+    return Ax_log, Ay_log, Atot_log
+
+def time_frequency(t, dt, jx, jy, lambda0_nm, qstart, qend, g_factor, filtering, window_func, transform="gabor", omega_c=6.0):
+    Ax, Ay, t, T0, w, w0, www, sigma_gabor = gabor_transform(t, dt, jx, jy, lambda0_nm, qstart, qend, g_factor, filtering, window_func,
+                                                             transform, omega_c)
+    Ax_log, Ay_log, Atot_log = log_amplitudes(Ax, Ay)
     return Ax_log, Ay_log, Atot_log, t, T0, w, w0, www, sigma_gabor
 
 ##----------------------------------------------------
@@ -138,7 +172,8 @@ def print_to_console(console: RichJupyterWidget, msg: str):
     if hasattr(console, "_kernel_client"):
         console._kernel_client.execute(f"print('''{msg}''')")
 
-def time_frequency_connector(lambda0_nm, qstart, qend, g_factor, filtering, selected_components, window_func, extract_data_option, plot_settings, ipy_console=None):
+def time_frequency_connector(lambda0_nm, qstart, qend, g_factor, filtering, selected_components, window_func, extract_data_option, plot_settings, ipy_console=None,
+                             polarization_option=False, g_factor_sweep=None, ridge_option=False, transform="gabor", omega_c=6.0):
     file_path, _ = QFileDialog.getOpenFileName(None, "Select total_current file")
     if "total_current" not in file_path.lower():
         QMessageBox.warning(None, "File Error", "Please upload the 'total_current' file.")
@@ -146,19 +181,81 @@ def time_frequency_connector(lambda0_nm, qstart, qend, g_factor, filtering, sele
     
     if file_path:
         try:
-            start_time = time.perf_counter()
-            t, dt, jx, jy = read_gtf(file_path)
-            end_time = time.perf_counter()
-            print(f"read_gtf() execution time: {end_time - start_time:.4f} seconds")
+            with profile_stage("Time-frequency", "load"):
+                t, dt, jx, jy = read_gtf(file_path)
             
-            Ax_log, Ay_log, Atot_log, t, T0, w, w0, www, sigma_gabor = time_frequency(t, dt, jx, jy ,lambda0_nm, qstart, qend, g_factor, filtering, window_func)
-
-            plot_time_frequency(Ax_log, Ay_log, Atot_log, t, T0, w, w0, www, lambda0_nm, qstart, qend, g_factor, selected_components, extract_data_option, plot_settings)
+            # The filtered currents are reused by the g_factor sweep and the
+            # complex transforms by the polarization maps
+            w, w0, T0, www = harmonic_axis(lambda0_nm, qstart, qend)
+            hx, hy = filtered_currents(t, jx, jy, filtering, window_func)
+            Ax, Ay, sigma_gabor = currents_transform(t, dt, hx, hy, w, T0, g_factor, transform, omega_c)
+            Ax_log, Ay_log, Atot_log = log_amplitudes(Ax, Ay)
+
+            with profile_stage("Time-frequency", "plot"):
+                plot_time_frequency(Ax_log, Ay_log, Atot_log, t, T0, w, w0, www, lambda0_nm, qstart, qend, g_factor, selected_components, extract_data_option, plot_settings,
+                                    transform, omega_c)
+
+            polarization_msg = ""
+            if polarization_option:
+                with profile_stage("Time-frequency", "post-process"):
+                    maps = polarization_maps(Ax, Ay)
+                if 'extract_data' in extract_data_option:
+                    save_tf_maps(maps, t, w, lambda0_nm=lambda0_nm, T0=T0, w0=w0,
+                                 **({"omega_c": omega_c} if transform == "morlet" else {"g_factor": g_factor}))
+                with profile_stage("Time-frequency", "plot"):
+                    plot_polarization_maps(maps, t, T0, w, w0, plot_settings)
+                polarization_msg = (
+                    f">>> Ellipticity/phase maps: {maps['ellipticity'].shape[0]} x {maps['ellipticity'].shape[1]} (t x w), float32\n"
+                    f">>> Mean |ellipticity| (above floor): {np.nanmean(np.abs(maps['ellipticity'])):.6e}\n"
+                    + (">>> Maps saved to: tf_polarization_maps.npz\n" if 'extract_data' in extract_data_option else "")
+                )
 
             Time_OC = t/T0
             max_Time_OC = np.max(Time_OC)
             T_SI = T0*2.418884326509*1e-17
             sigma_gabor_SI = sigma_gabor*2.418884326509*1e-17
+            if transform == "morlet":
+                window_msg = (
+                    f">>> Transform: Morlet wavelet (omega_c = {omega_c})\n"
+                    f">>> Time window [a.u.]: {sigma_gabor[-1]} (order {qend}) - {sigma_gabor[0]} (order {qstart})\n"
+                    f">>> Time window [s]: {sigma_gabor_SI[-1]} - {sigma_gabor_SI[0]}\n"
+                )
+            else:
+                window_msg = (
+                    f">>> Time window [a.u.]: {sigma_gabor}\n"
+                    f">>> Time window [s]: {sigma_gabor_SI}\n"
+                )
+
+            ridge_msg = ""
+            if ridge_option:
+                with profile_stage("Time-frequency", "post-process"):
+                    ridges = extract_ridges(Atot_log, t, w, T0)
+                if 'extract_data' in extract_data_option:
+                    save_ridges(ridges, w, w0, T0)
+                with profile_stage("Time-frequency", "plot"):
+                    plot_ridges(Atot_log, t, T0, w, w0, ridges, plot_settings)
+                ridge_msg = format_ridges(ridges, T0)
+
+            sweep_msg = ""
+            if g_factor_sweep:
+                with profile_stage("Time-frequency", "transform"):
+                    # Saved sweeps go straight to memory-mapped .npy stacks (bounded memory);
+                    # otherwise gabor_sweep() refuses stacks too large for memory
+                    sweep_dir = SWEEP_DIR if 'extract_data' in extract_data_option else None
+                    sweep = gabor_sweep(t, dt, hx, hy, w, T0, g_factor_sweep, components=selected_components,
+                                        output_dir=sweep_dir)
+                if sweep_dir:
+                    np.savez(os.path.join(sweep_dir, "axes.npz"), t=t, w=w, T0=T0, w0=w0, lambda0_nm=lambda0_nm,
+                             g_factor=sweep["g_factor"], sigma=sweep["sigma"])
+                with profile_stage("Time-frequency", "plot"):
+                    for component in selected_components:
+                        key = {"total": "Atot_log", "x": "Ax_log", "y": "Ay_log"}[component]
+                        plot_gabor_sweep(sweep, t, T0, w, w0, key, plot_settings)
+                sweep_msg = (
+                    f">>> g_factor sweep: {', '.join(f'{g:g}' for g in sweep['g_factor'])}\n"
+                    f">>> Time windows [a.u.]: {', '.join(f'{s:.6e}' for s in sweep['sigma'])}\n"
+                    + (f">>> Sweep saved to: {sweep_dir}/ (axes.npz and one .npy stack per component)\n" if sweep_dir else "")
+                )
 
             timestamp = datetime.now().strftime("[%H:%M:%S]")
             msg = (
@@ -172,8 +269,10 @@ def time_frequency_connector(lambda0_nm, qstart, qend, g_factor, filtering, sele
                 f">>> T [second]: {T_SI:.12e}\n"
                 f">>> w0: {w0:.12e}\n"
                 f">>> Max optical cycle: {max_Time_OC}\n"
-                f">>> Time window [a.u.]: {sigma_gabor}\n"
-                f">>> Time window [s]: {sigma_gabor_SI}\n"
+                + window_msg
+                + polarization_msg
+                + ridge_msg
+                + sweep_msg
                 + "-" * 75
             )
             print_to_console(ipy_console, msg)
@@ -183,8 +282,12 @@ def time_frequency_connector(lambda0_nm, qstart, qend, g_factor, filtering, sele
             return
 
 ##----------------------------------------------------
-def plot_time_frequency(Ax_log, Ay_log, Atot_log, t, T0, w, w0, www, lambda0_nm, qstart, qend, g_factor, selected_components, extract_data_option, plot_settings):   
+def plot_time_frequency(Ax_log, Ay_log, Atot_log, t, T0, w, w0, www, lambda0_nm, qstart, qend, g_factor, selected_components, extract_data_option, plot_settings,
+                        transform="gabor", omega_c=6.0):   
     ww = w/w0
+    # Window parameter actually used: g_factor (Gabor) or omega_c (Morlet)
+    window_header = (f"# Morlet omega_c:          {omega_c}\n" if transform == "morlet"
+                     else f"# g_factor:                {g_factor}\n")
     x_min = t[1]/T0
     x_max = t[-1]/T0
     if 'total' in selected_components:
@@ -196,7 +299,7 @@ def plot_time_frequency(Ax_log, Ay_log, Atot_log, t, T0, w, w0, www, lambda0_nm,
                 f"# w0 [a.u.]:               {w0}\n"
                 f"# Min HO:                  {qstart}\n"
                 f"# Max HO:                  {qend}\n"
-                f"# g_factor:                {g_factor}\n"
+                + window_header +
                 "# Atot_log (Intensity [arb.u])\n"
                 + '#' * 60
             )
@@ -230,7 +333,7 @@ def plot_time_frequency(Ax_log, Ay_log, Atot_log, t, T0, w, w0, www, lambda0_nm,
                 f"# w0 [a.u.]:               {w0}\n"
                 f"# Min HO:                  {qstart}\n"
                 f"# Max HO:                  {qend}\n"
-                f"# g_factor:                {g_factor}\n"
+                + window_header +
                 "# Ax_log (Intensity [arb.u])\n"
                 + '#' * 60
             )
@@ -264,7 +367,7 @@ def plot_time_frequency(Ax_log, Ay_log, Atot_log, t, T0, w, w0, www, lambda0_nm,
                 f"# w0 [a.u.]:               {w0}\n"
                 f"# Min HO:                  {qstart}\n"
                 f"# Max HO:                  {qend}\n"
-                f"# g_factor:                {g_factor}\n"
+                + window_header +
                 "# Ay_log (Intensity [arb.u])\n"
                 + '#' * 60
             )
@@ -556,6 +659,32 @@ class ModernDialog(QDialog):
     
         basic_params_layout.addRow("G_factor:", g_factor_container)
 
+        # (5) optional g_factor sweep
+        self.g_factor_sweep_entry = QLineEdit()
+        self.g_factor_sweep_entry.setPlaceholderText("Optional: compare windows (e.g., 1, 2, 3, 5, 8)")
+        self.g_factor_sweep_entry.setText(previous_input_time_frequency.get("g_factor_sweep", ""))
+        basic_params_layout.addRow("G_factor sweep:", self.g_factor_sweep_entry)
+
+        # (6) transform: fixed Gabor window or Morlet wavelet
+        transform_container = QWidget()
+        transform_layout = QHBoxLayout(transform_container)
+        transform_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.transform_combo = QComboBox()
+        self.transform_combo.addItems(["Gabor", "Morlet wavelet"])
+        self.transform_combo.setCurrentIndex(TRANSFORMS.index(previous_input_time_frequency.get("transform", "gabor")))
+        self.omega_c_entry = QLineEdit()
+        self.omega_c_entry.setPlaceholderText("6")
+        self.omega_c_entry.setText(str(previous_input_time_frequency.get("omega_c", "6.0")))
+        self.omega_c_entry.setMaxLength(10)
+        omega_c_unit_label = QLabel(f"{Symbols.TAU} = {Symbols.OMEGA}_c / {Symbols.OMEGA} (Morlet)")
+        omega_c_unit_label.setStyleSheet("color: #666; font-style: italic; min-width: 30px;")
+
+        transform_layout.addWidget(self.transform_combo)
+        transform_layout.addWidget(self.omega_c_entry)
+        transform_layout.addWidget(omega_c_unit_label)
+        basic_params_layout.addRow("Transform:", transform_container)
+
         #------
         basic_params_group.setLayout(basic_params_layout)
         required_layout.addWidget(basic_params_group)
@@ -720,8 +849,15 @@ class ModernDialog(QDialog):
         options_layout.setContentsMargins(10, 10, 10, 10)
     
         self.extract_data_checkbox = QCheckBox("Extract Data")
+        self.polarization_checkbox = QCheckBox("Ellipticity/Phase Maps")
+        self.polarization_checkbox.setChecked(previous_input_time_frequency.get("polarization", False))
     
         options_layout.addWidget(self.extract_data_checkbox)
+        options_layout.addWidget(self.polarization_checkbox)
+
+        self.ridge_checkbox = QCheckBox("Emission-Time Ridges")
+        self.ridge_checkbox.setChecked(previous_input_time_frequency.get("ridges", False))
+        options_layout.addWidget(self.ridge_checkbox)
         options_layout.addStretch()
     
         ##-------
@@ -1030,6 +1166,20 @@ class ModernDialog(QDialog):
                         "g_factor is too large — the Gabor window becomes too small and may cause instability."
                     )
             previous_input_time_frequency["g_factor"] = g_factor
+
+            g_factor_sweep = None
+            sweep_text = self.g_factor_sweep_entry.text().strip()
+            if sweep_text:
+                g_factor_sweep = [float(value) for value in sweep_text.replace(";", ",").split(",") if value.strip()]
+                if any(value <= 0 for value in g_factor_sweep):
+                    raise ValueError("g_factor sweep values must be positive.")
+            previous_input_time_frequency["g_factor_sweep"] = sweep_text
+
+            transform = TRANSFORMS[self.transform_combo.currentIndex()]
+            omega_c = float(self.omega_c_entry.text() or 6.0)
+            if omega_c <= 0:
+                raise ValueError("The Morlet parameter omega_c must be positive.")
+            previous_input_time_frequency.update({"transform": transform, "omega_c": omega_c})
             
             
             selected_components = []
@@ -1106,12 +1256,16 @@ class ModernDialog(QDialog):
             
             # Update
             previous_input_time_frequency.update({"lambda0_nm": lambda0_nm, "filtering": filtering,
-                                                  "qstart": qstart, "qend": qend, "g_factor": g_factor})
+                                                  "qstart": qstart, "qend": qend, "g_factor": g_factor,
+                                                  "polarization": self.polarization_checkbox.isChecked(),
+                                                  "ridges": self.ridge_checkbox.isChecked()})
             
             self.accept()
 
             # CALL
-            time_frequency_connector(lambda0_nm, qstart, qend, g_factor, filtering, selected_components, window_func, extract_data_option, plot_settings, self.parent().ipy_console)
+            time_frequency_connector(lambda0_nm, qstart, qend, g_factor, filtering, selected_components, window_func, extract_data_option, plot_settings, self.parent().ipy_console,
+                                     self.polarization_checkbox.isChecked(), g_factor_sweep, self.ridge_checkbox.isChecked(),
+                                     transform, omega_c)
                 
         except ValueError as e:
             QMessageBox.warning(self, "Invalid Input", f"Error: {e}")
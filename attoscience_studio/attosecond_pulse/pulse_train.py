@@ -0,0 +1,138 @@
+# attosecond_pulse/pulse_train.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+from scipy.signal import find_peaks
+from scipy.integrate import cumulative_trapezoid
+#--------------------------------
+from attoscience_studio.utils.peak_metrics import peak_metrics
+from attoscience_studio.helper_functions.constants import AtomicUnits
+TIMEau = AtomicUnits.TIMEau
+##----------------------------------------------------
+COMPONENTS = ("total", "x", "y")
+##----------------------------------------------------
+def segment_bursts(curve, t, min_separation, rel_height=0.05):
+    """
+    Splits a pulse train into bursts.
+
+    Parameters:
+    - curve: Intensity I(t).
+    - t: Uniform time axis [a.u.].
+    - min_separation: Minimum distance between two bursts [a.u.] (half a cycle for HHG trains).
+    - rel_height: Bursts below rel_height * max(curve) are ignored.
+
+    Returns the peak indices and the first/last sample of every burst. Bursts
+    are separated at the minimum between neighbouring peaks.
+    """
+    curve = np.asarray(curve, dtype=float)
+    dt = t[1] - t[0]
+    peaks, _ = find_peaks(curve, height=rel_height * np.max(curve), distance=max(1, int(round(min_separation / dt))))
+    if peaks.size == 0:
+        peaks = np.array([int(np.argmax(curve))])
+
+    # One argmin per gap between consecutive peaks, on a padded (B-1, L) batch
+    if peaks.size > 1:
+        gap = np.max(np.diff(peaks))
+        rows = np.minimum(peaks[:-1, None] + np.arange(gap + 1), peaks[1:, None])
+        splits = np.take_along_axis(rows, np.argmin(curve[rows], axis=1)[:, None], axis=1)[:, 0]
+    else:
+        splits = np.array([], dtype=int)
+    lo = np.concatenate(([0], splits))
+    hi = np.concatenate((splits, [len(curve) - 1]))
+    return peaks, lo, hi
+
+def burst_table(curve, t, min_separation, rel_height=0.05, method="linear"):
+    """
+    Per-burst metrics of one pulse train, all bursts evaluated in one batch.
+
+    Returns a dict of arrays (one entry per burst): peak_time, centroid,
+    t_left, t_right, fwhm [a.u.], peak, energy (integral of I dt),
+    energy_fraction, satellite_contrast (highest neighbouring burst / this
+    burst), resolved (half maximum reached inside the burst), plus the
+    scalars main (index of the strongest burst) and isolation (second
+    strongest / strongest peak, 0 for a single burst).
+    """
+    curve = np.asarray(curve, dtype=float)
+    t = np.asarray(t, dtype=float)
+    peaks, lo, hi = segment_bursts(curve, t, min_separation, rel_height)
+
+    # Bursts side by side in a padded batch; sample positions are mapped back to t
+    length = np.max(hi - lo) + 1
+    rows = np.minimum(lo[:, None] + np.arange(length), len(curve) - 1)
+    metrics = peak_metrics(curve[rows], None, method=method, lo=0, hi=hi - lo)
+    to_time = lambda position: np.interp(lo + position, np.arange(len(t)), t)
+
+    cumulative = cumulative_trapezoid(curve, t, initial=0.0)
+    cumulative_t = cumulative_trapezoid(curve * t, t, initial=0.0)
+    energy = cumulative[hi] - cumulative[lo]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        centroid = np.where(energy > 0, (cumulative_t[hi] - cumulative_t[lo]) / energy, to_time(metrics["peak_index"]))
+        energy_fraction = energy / np.sum(energy) if np.sum(energy) > 0 else np.zeros_like(energy)
+
+    peak = metrics["peak_value"]
+    neighbours = np.maximum(np.concatenate(([0.0], peak[:-1])), np.concatenate((peak[1:], [0.0])))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        satellite_contrast = np.where(peak > 0, neighbours / peak, 0.0)
+
+    ranked = np.sort(peak)[::-1]
+    return {
+        "peak_time": to_time(metrics["peak_index"]),
+        "centroid": centroid,
+        "t_left": to_time(metrics["t_left"]),
+        "t_right": to_time(metrics["t_right"]),
+        "fwhm": to_time(metrics["t_right"]) - to_time(metrics["t_left"]),
+        "peak": peak,
+        "energy": energy,
+        "energy_fraction": energy_fraction,
+        "satellite_contrast": satellite_contrast,
+        "resolved": metrics["resolved"],
+        "main": int(np.argmax(peak)),
+        "isolation": float(ranked[1] / ranked[0]) if len(ranked) > 1 and ranked[0] > 0 else 0.0,
+    }
+
+def pulse_train_metrics(I, Ix, Iy, t, T, min_separation_oc=0.25, rel_height=0.05, method="linear"):
+    """
+    burst_table() for the total, x and y intensities of attosecond_pulses().
+    min_separation_oc is in optical cycles of the driver (period T [a.u.]).
+    """
+    return {name: burst_table(np.real(curve), t, min_separation_oc * T, rel_height, method)
+            for name, curve in zip(COMPONENTS, (I, Ix, Iy))}
+
+##----------------------------------------------------
+def format_burst_table(tables, T):
+    lines = []
+    for name, table in tables.items():
+        lines.append(f">>> Bursts ({name}): {len(table['peak'])}, main burst: {table['main'] + 1}, "
+                     f"isolation (2nd/1st peak): {table['isolation']:.4e}")
+        lines.append("    #    t_peak [o.c.]   FWHM [as]      energy frac.   satellite contr.")
+        for b in range(len(table["peak"])):
+            fwhm_as = table["fwhm"][b] * TIMEau * 1e18
+            flag = "" if table["resolved"][b] else "  (half max. not reached)"
+            lines.append(f"    {b + 1:<4d} {table['peak_time'][b] / T:<15.6f} {fwhm_as:<14.4f} "
+                         f"{table['energy_fraction'][b]:<14.4e} {table['satellite_contrast'][b]:.4e}{flag}")
+    return "\n".join(lines) + "\n"
+
+def save_burst_tables(tables, T, prefix="pulse_train"):
+    header = ("burst, t_peak [a.u.], centroid [a.u.], t_left [a.u.], t_right [a.u.], FWHM [a.u.], "
+              "peak, energy, energy fraction, satellite contrast, resolved")
+    for name, table in tables.items():
+        columns = np.column_stack((np.arange(1, len(table["peak"]) + 1), table["peak_time"], table["centroid"],
+                                   table["t_left"], table["t_right"], table["fwhm"], table["peak"], table["energy"],
+                                   table["energy_fraction"], table["satellite_contrast"], table["resolved"]))
+        np.savetxt(f"{prefix}_{name}.txt", columns, header=f"# T [a.u.]: {T}\n# {header}", comments='', fmt='%.12e')
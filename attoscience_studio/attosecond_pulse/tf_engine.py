@@ -0,0 +1,296 @@
+# attosecond_pulse/tf_engine.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import numpy as np
+import scipy.fft
+import matplotlib.pyplot as plt
+from matplotlib.widgets import Slider
+##----------------------------------------------------
+# Shared time-frequency backend. The currents are Fourier transformed once
+# (signal_spectrum); a Gaussian window of width sigma centred at w is then a
+# product with its analytic spectrum, so every (w, sigma) costs one inverse
+# FFT instead of a full convolution; a Morlet wavelet is the same window with
+# a frequency-dependent width. The polarization maps are built from the
+# resulting complex Ax(t, w), Ay(t, w) row block by row block, so only one
+# (chunk, Nw) temporary is alive at a time.
+##----------------------------------------------------
+DEFAULT_CHUNK_BYTES = 64 * 1024**2
+# Largest set of gabor_sweep() stacks kept in memory; larger sweeps need an output_dir
+MAX_IN_MEMORY_SWEEP_BYTES = 1024**3
+GABOR_TRUNCATION = 6            # GTF_core() cuts the window at 6 sigma
+POLARIZATION_MAPS = ("ellipticity", "phase_x", "phase_y", "phase_tot", "phase_diff")
+##----------------------------------------------------
+def _row_chunk(n_cols, max_bytes, n_temporaries=8):
+    # Rows per block for ~n_temporaries complex128 arrays of n_cols
+    return max(1, int(max_bytes // (n_temporaries * 16 * max(n_cols, 1))))
+
+def signal_spectrum(t, dt, hx, hy, max_sigma, workers=-1):
+    """
+    FFT of the currents, zero padded so that windows up to max_sigma wide do
+    not wrap around (linear convolution, as fftconvolve(..., mode='same')).
+    Returns a dict: Hx, Hy (n_fft,), nu (angular frequencies [a.u.]), t, dt, n_fft.
+    """
+    t = np.asarray(t, dtype=float)
+    n_fft = scipy.fft.next_fast_len(len(t) + int(np.ceil(GABOR_TRUNCATION * max_sigma / dt)) + 1)
+    return {
+        "Hx": scipy.fft.fft(np.asarray(hx, dtype=float), n=n_fft, workers=workers),
+        "Hy": scipy.fft.fft(np.asarray(hy, dtype=float), n=n_fft, workers=workers),
+        "nu": 2 * np.pi * scipy.fft.fftfreq(n_fft, dt),
+        "t": t, "dt": dt, "n_fft": n_fft,
+    }
+
+def _window_response(spectrum, w, sigma):
+    # dt * DFT of exp(-tau^2 / 2 sigma^2) exp(1j w tau), w: (M,), sigma: scalar or (M,)
+    period = 2 * np.pi / spectrum["dt"]
+    detuning = np.mod(spectrum["nu"][None, :] - w[:, None] + period / 2, period) - period / 2
+    sigma = np.broadcast_to(np.asarray(sigma, dtype=float), w.shape)[:, None]
+    return sigma * np.sqrt(2 * np.pi) * np.exp(-0.5 * (sigma * detuning)**2)
+
+def windowed_blocks(spectrum, w, sigma, max_bytes=DEFAULT_CHUNK_BYTES, workers=-1):
+    """
+    Generator over frequency blocks of the windowed transform (see
+    windowed_transform()): yields (slice of w, Ax block, Ay block (Nt, block)).
+    Each block is a single batched, multithreaded inverse FFT and only one
+    block's temporaries (~max_bytes) are alive at a time.
+    """
+    w = np.atleast_1d(np.asarray(w, dtype=float))
+    sigma = np.broadcast_to(np.asarray(sigma, dtype=float), w.shape)
+    t, n_fft = spectrum["t"], spectrum["n_fft"]
+    nt = len(t)
+    chunk = max(1, int(max_bytes // (4 * 16 * max(n_fft, 1))))
+    for first in range(0, len(w), chunk):
+        sl = slice(first, first + chunk)
+        response = _window_response(spectrum, w[sl], sigma[sl])
+        demodulation = np.exp(-1j * t[:, None] * w[None, sl])
+        ax = scipy.fft.ifft(spectrum["Hx"] * response, axis=-1, workers=workers)[:, :nt].T * demodulation
+        ay = scipy.fft.ifft(spectrum["Hy"] * response, axis=-1, workers=workers)[:, :nt].T * demodulation
+        yield sl, ax, ay
+
+def windowed_transform(spectrum, w, sigma, max_bytes=DEFAULT_CHUNK_BYTES, workers=-1):
+    """
+    Complex Ax, Ay (Nt, Nw) for Gaussian windows of width sigma [a.u.] centred
+    at the frequencies w: Ax(t, w) = exp(-1j w t) IFFT[Hx G(nu - w)](t).
+    sigma is a scalar (Gabor) or one width per frequency (wavelets).
+    Frequencies are processed in blocks bounded by max_bytes.
+    """
+    w = np.atleast_1d(np.asarray(w, dtype=float))
+    nt = len(spectrum["t"])
+    Ax = np.empty((nt, len(w)), dtype=complex)
+    Ay = np.empty((nt, len(w)), dtype=complex)
+    for sl, ax, ay in windowed_blocks(spectrum, w, sigma, max_bytes, workers):
+        Ax[:, sl] = ax
+        Ay[:, sl] = ay
+    return Ax, Ay
+
+def gabor_sweep(t, dt, hx, hy, w, T0, g_factors, components=("total",), max_bytes=DEFAULT_CHUNK_BYTES, workers=-1,
+                output_dir=None, max_in_memory_bytes=MAX_IN_MEMORY_SWEEP_BYTES):
+    """
+    Gabor maps for several window widths sigma = T0 / g_factor from a single
+    FFT of the currents.
+
+    Parameters:
+    - t, dt, hx, hy: Time axis and (filtered) currents.
+    - w: Analysed frequencies [a.u.].
+    - T0: Driver period [a.u.].
+    - g_factors: Window factors to compare.
+    - components: Any of 'total', 'x', 'y'.
+    - output_dir: If given, the stacks are memory-mapped .npy files there
+      (<key>.npy), so the working memory stays within max_bytes whatever
+      the number of g_factors. Without it the stacks are held in memory
+      and may not exceed max_in_memory_bytes (ValueError).
+
+    Returns a dict: g_factor, sigma and one float32 stack (n_g, Nt, Nw) of
+    log10 amplitudes per component (Atot_log, Ax_log, Ay_log), the layout of
+    time_frequency(). Every block of every window is reduced to the requested
+    components and written straight into the stacks; the complex transforms
+    are never held in full.
+    """
+    g_factors = np.atleast_1d(np.asarray(g_factors, dtype=float))
+    if np.any(g_factors <= 0):
+        raise ValueError("g_factor values must be positive.")
+    sigmas = T0 / g_factors
+    spectrum = signal_spectrum(t, dt, hx, hy, np.max(sigmas), workers)
+    keys = {"total": "Atot_log", "x": "Ax_log", "y": "Ay_log"}
+    shape = (len(g_factors), len(t), len(w))
+    stack_bytes = 4 * int(np.prod(shape)) * len(components)
+    if output_dir is None and stack_bytes > max_in_memory_bytes:
+        raise ValueError(f"The g_factor sweep needs {stack_bytes / 1024**2:.0f} MB; use fewer g_factors or "
+                         f"harmonics, or save the data so the maps are memory-mapped to disk.")
+    sweep = {"g_factor": g_factors, "sigma": sigmas}
+    for name in components:
+        if output_dir is None:
+            sweep[keys[name]] = np.empty(shape, dtype=np.float32)
+        else:
+            os.makedirs(output_dir, exist_ok=True)
+            sweep[keys[name]] = np.lib.format.open_memmap(os.path.join(output_dir, f"{keys[name]}.npy"),
+                                                          mode="w+", dtype=np.float32, shape=shape)
+
+    with np.errstate(divide='ignore'):
+        for k, sigma in enumerate(sigmas):
+            for sl, ax, ay in windowed_blocks(spectrum, w, sigma, max_bytes, workers):
+                ax_abs, ay_abs = np.abs(ax), np.abs(ay)
+                if "total" in components:
+                    sweep["Atot_log"][k, :, sl] = np.log10(np.sqrt(ax_abs**2 + ay_abs**2))
+                if "x" in components:
+                    sweep["Ax_log"][k, :, sl] = np.log10(ax_abs)
+                if "y" in components:
+                    sweep["Ay_log"][k, :, sl] = np.log10(ay_abs)
+    return sweep
+
+def morlet_transform(t, dt, hx, hy, w, omega_c=6.0, max_bytes=DEFAULT_CHUNK_BYTES, workers=-1):
+    """
+    Morlet continuous wavelet transform of the currents at the frequencies w.
+
+    The wavelet at w is a Gaussian of width sigma(w) = omega_c / w modulated
+    at w (the admissibility correction is negligible for omega_c >= 5), so the
+    window shrinks with the order: high orders get time resolution, low orders
+    frequency resolution. All scales come from one FFT of the currents and
+    batched inverse FFTs (windowed_transform()). Amplitudes are L1 normalized,
+    a harmonic of amplitude a gives |A| = a / 2 at every scale.
+
+    Returns Ax, Ay (Nt, Nw), the layout of GTF_core(), and sigma (Nw,) [a.u.].
+    """
+    w = np.atleast_1d(np.asarray(w, dtype=float))
+    if omega_c <= 0 or np.any(w <= 0):
+        raise ValueError("The Morlet parameter and all frequencies must be positive.")
+    sigma = omega_c / w
+    spectrum = signal_spectrum(t, dt, hx, hy, np.max(sigma), workers)
+    Ax, Ay = windowed_transform(spectrum, w, sigma, max_bytes, workers)
+    norm = 1.0 / (sigma * np.sqrt(2 * np.pi))
+    Ax *= norm
+    Ay *= norm
+    return Ax, Ay, sigma
+
+def polarization_maps(Ax, Ay, amplitude_floor=1e-3, max_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Time-resolved ellipticity and phases of the harmonic emission.
+
+    Same definitions as the full-time spectra: calcu_ellips() (circular basis,
+    eps = (|a_R| - |a_L|) / (|a_R| + |a_L|)) and calcu_PHASE() (angles of Ax,
+    Ay and Ax + Ay), applied to every (t, w) cell of the Gabor transforms.
+
+    Parameters:
+    - Ax, Ay: Complex transforms (Nt, Nw) from GTF_core().
+    - amplitude_floor: Cells weaker than amplitude_floor * max(|A|) are set to NaN
+      (the polarization of noise is meaningless); 0 keeps everything.
+    - max_bytes: Memory bound of the per-block temporaries.
+
+    Returns a dict of float32 (Nt, Nw) maps: ellipticity, phase_x, phase_y,
+    phase_tot and phase_diff (phase_y - phase_x wrapped to [-pi, pi)) [rad].
+    """
+    if Ax.shape != Ay.shape:
+        raise ValueError("Ax and Ay must have the same shape.")
+    n_rows, n_cols = Ax.shape
+    maps = {name: np.empty((n_rows, n_cols), dtype=np.float32) for name in POLARIZATION_MAPS}
+
+    # Floor relative to the strongest cell of the total amplitude
+    peak = 0.0
+    chunk = _row_chunk(n_cols, max_bytes)
+    for first in range(0, n_rows, chunk):
+        sl = slice(first, first + chunk)
+        peak = max(peak, float(np.max(np.abs(Ax[sl])**2 + np.abs(Ay[sl])**2, initial=0.0)))
+    floor = amplitude_floor * np.sqrt(peak)
+
+    for first in range(0, n_rows, chunk):
+        sl = slice(first, first + chunk)
+        ax, ay = Ax[sl], Ay[sl]
+        a_right = np.abs(ax + 1j * ay) / np.sqrt(2)
+        a_left = np.abs(ax - 1j * ay) / np.sqrt(2)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            ellipticity = (a_right - a_left) / (a_right + a_left)
+        weak = np.sqrt(np.abs(ax)**2 + np.abs(ay)**2) < floor if floor > 0 else np.zeros(ax.shape, dtype=bool)
+
+        phase_x = np.angle(ax)
+        phase_y = np.angle(ay)
+        values = {
+            "ellipticity": ellipticity,
+            "phase_x": phase_x,
+            "phase_y": phase_y,
+            "phase_tot": np.angle(ax + ay),
+            "phase_diff": np.mod(phase_y - phase_x + np.pi, 2 * np.pi) - np.pi,
+        }
+        for name, value in values.items():
+            maps[name][sl] = np.where(weak, np.nan, value)
+    return maps
+
+def save_tf_maps(maps, t, w, file_path="tf_polarization_maps.npz", **metadata):
+    # One compressed archive; float32 maps plus the axes and any scalar metadata
+    np.savez_compressed(file_path, t=np.asarray(t), w=np.asarray(w),
+                        **{key: np.asarray(value) for key, value in maps.items()},
+                        **{key: np.asarray(value) for key, value in metadata.items()})
+
+##----------------------------------------------------
+def plot_polarization_maps(maps, t, T0, w, w0, plot_settings=None):
+    plot_settings = plot_settings or {}
+    ww = w / w0
+    extent = [t[0] / T0, t[-1] / T0, ww[0], ww[-1]]
+    panels = (("ellipticity", "Ellipticity", "seismic", (-1.0, 1.0)),
+              ("phase_diff", r"$\varphi_y - \varphi_x$ [rad]", "twilight", (-np.pi, np.pi)))
+
+    fig, axes = plt.subplots(2, 1, sharex=True)
+    fig.patch.set_facecolor(plot_settings.get("background_color", "white"))
+    for ax, (name, label, cmap, (vmin, vmax)) in zip(axes, panels):
+        image = ax.imshow(maps[name].T, extent=extent, aspect=plot_settings.get("aspect", 'auto'),
+                          origin=plot_settings.get("origin", 'lower'), cmap=cmap,
+                          interpolation=plot_settings.get("interpolation", 'nearest'), vmin=vmin, vmax=vmax)
+        fig.colorbar(image, ax=ax, label=label)
+        ax.set_ylabel(plot_settings.get("y_label", "Harmonic order"))
+    axes[-1].set_xlabel(plot_settings.get("x_label", "Time [o.c.]"))
+    axes[0].set_title(plot_settings.get("graph_title", "Time-resolved polarization"))
+    plt.show()
+    return fig
+
+def plot_gabor_sweep(sweep, t, T0, w, w0, key="Atot_log", plot_settings=None):
+    """
+    One Gabor map of the sweep at a time, the window factor is chosen with a slider.
+    """
+    plot_settings = plot_settings or {}
+    stack = sweep[key]
+    ww = w / w0
+    fig = plt.figure()
+    fig.patch.set_facecolor(plot_settings.get("background_color", "white"))
+    ax = fig.add_axes([0.12, 0.25, 0.70, 0.65])
+    cax = fig.add_axes([0.85, 0.25, 0.03, 0.65])
+    finite = stack[np.isfinite(stack)]
+    image = ax.imshow(stack[0].T, extent=[t[0] / T0, t[-1] / T0, ww[0], ww[-1]],
+                      aspect=plot_settings.get("aspect", 'auto'), origin=plot_settings.get("origin", 'lower'),
+                      cmap=plot_settings.get("cmap", 'jet'), interpolation=plot_settings.get("interpolation", 'nearest'),
+                      vmin=plot_settings.get("vmin", np.min(finite) if finite.size else None),
+                      vmax=plot_settings.get("vmax", np.max(finite) if finite.size else None))
+    fig.colorbar(image, cax=cax, label=plot_settings.get("colorbar_label", 'log_{10} (Intensity) [arb. units]'))
+    ax.set_xlabel(plot_settings.get("x_label", "Time [o.c.]"))
+    ax.set_ylabel(plot_settings.get("y_label", "Harmonic order"))
+    title = plot_settings.get("graph_title", "Time-Frequency Analysis")
+    ax.set_title(f"{title} (g_factor = {sweep['g_factor'][0]:g})")
+
+    g_factors = sweep["g_factor"]
+    if len(g_factors) > 1:
+        slider_ax = fig.add_axes([0.20, 0.08, 0.55, 0.03])
+        slider = Slider(slider_ax, "g_factor", np.min(g_factors), np.max(g_factors), valinit=g_factors[0], valstep=np.sort(g_factors))
+        def on_change(value):
+            k = int(np.argmin(np.abs(g_factors - value)))
+            image.set_data(stack[k].T)
+            ax.set_title(f"{title} (g_factor = {g_factors[k]:g})")
+            fig.canvas.draw_idle()
+        slider.on_changed(on_change)
+        # Keep the widget alive as long as the figure
+        fig._gabor_slider = slider
+    plt.show()
+    return fig
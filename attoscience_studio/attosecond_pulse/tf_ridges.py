@@ -0,0 +1,236 @@
+# attosecond_pulse/tf_ridges.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import matplotlib.pyplot as plt
+#--------------------------------
+from attoscience_studio.helper_functions.constants import PhysicalConstants, AtomicUnits
+Ip_HeV = PhysicalConstants.Ip_HeV
+TIMEau = AtomicUnits.TIMEau
+##----------------------------------------------------
+# Emission time versus harmonic order from a Gabor map. Within one half cycle
+# every frequency column contributes its strongest local maxima in time; the
+# short (emission time increasing with order) and long (decreasing) branches
+# are the best-scoring monotonic paths through those candidates, found by
+# dynamic programming across the orders. The two branches never share a
+# candidate: the pair of paths with the best joint score is kept, and a branch
+# left without enough points, or whose attochirp has the wrong sign, is
+# reported as undefined. Only the half-cycle window of the map is touched.
+##----------------------------------------------------
+BRANCHES = {"short": 1, "long": -1}
+# Fewest points (half-order steps) for a branch and its attochirp to be reported
+MIN_RIDGE_POINTS = 3
+##----------------------------------------------------
+def _default_window(Atot_log, t, T0):
+    # Half a cycle centred on the strongest emission, away from the edges of
+    # the map where the window overlaps the end of the current
+    strongest = np.max(np.where(np.isfinite(Atot_log), Atot_log, -np.inf), axis=1)
+    interior = (t >= t[0] + T0 / 2) & (t <= t[-1] - T0 / 2)
+    if np.any(interior):
+        strongest = np.where(interior, strongest, -np.inf)
+    centre = t[int(np.argmax(strongest))]
+    return centre - T0 / 4, centre + T0 / 4
+
+def ridge_candidates(Atot_log, t, time_window, n_candidates=4):
+    """
+    The n_candidates strongest local maxima in time of every frequency column
+    inside time_window = (start, end) [a.u.].
+
+    Returns the candidate time indices (n_candidates, Nw) into t and their
+    values; missing candidates have value -inf. A column without any interior
+    maximum keeps its largest sample as position, with value -inf.
+    """
+    i0 = max(int(np.searchsorted(t, time_window[0])), 0)
+    i1 = min(int(np.searchsorted(t, time_window[1], side="right")), len(t))
+    if i1 - i0 < 3:
+        raise ValueError("The time window must contain at least three samples.")
+    sub = Atot_log[i0:i1]                       # view of the window only
+    inner = sub[1:-1]
+    maxima = np.where((inner > sub[:-2]) & (inner >= sub[2:]) & np.isfinite(inner), inner, -np.inf)
+
+    k = min(n_candidates, maxima.shape[0])
+    order = np.argpartition(-maxima, k - 1, axis=0)[:k]
+    values = np.take_along_axis(maxima, order, axis=0)
+    index = order + 1
+
+    empty = ~np.any(np.isfinite(values), axis=0)
+    if np.any(empty):
+        fallback = np.argmax(np.where(np.isfinite(sub[:, empty]), sub[:, empty], -np.inf), axis=0)
+        index[0, empty] = fallback
+    return index + i0, values
+
+def _step_cost(step, direction, jump_penalty, reverse_penalty, T0):
+    return (jump_penalty * np.abs(step) + reverse_penalty * np.maximum(-direction * step, 0.0)) / T0
+
+def link_ridge(times, values, direction, jump_penalty, T0, reverse_penalty=200.0, excluded=None):
+    """
+    Best path through the candidates (one per column) that follows `direction`
+    (+1: time increasing with frequency, -1: decreasing).
+
+    The score is the sum of the candidate values minus
+    (jump_penalty * |dt| + reverse_penalty * max(0, -direction * dt)) / T0
+    for every step between neighbouring columns; moving against the branch is
+    expensive but allowed, so the path survives where both branches merge.
+    excluded (n_candidates, Nw) marks candidates treated as missing (taken by
+    the other branch). Returns the chosen candidate per column (-1 if there
+    are no candidates) and the path score.
+    """
+    n_cand, n_cols = values.shape
+    if excluded is not None:
+        values = np.where(excluded, -np.inf, values)
+    # A missing candidate costs ten decades more than the weakest real one
+    finite = np.isfinite(values)
+    if not np.any(finite):
+        return np.full(n_cols, -1, dtype=int), -np.inf
+    values = np.where(finite, values, np.min(values[finite]) - 10.0)
+    score = values[:, 0].copy()
+    back = np.zeros((n_cand, n_cols), dtype=int)
+    for j in range(1, n_cols):
+        step = times[None, :, j] - times[:, None, j - 1]           # (prev, cur)
+        cost = _step_cost(step, direction, jump_penalty, reverse_penalty, T0)
+        total = score[:, None] - cost
+        back[:, j] = np.argmax(total, axis=0)
+        score = np.max(total, axis=0) + values[:, j]
+
+    path = np.full(n_cols, -1, dtype=int)
+    path[-1] = int(np.argmax(score))
+    for j in range(n_cols - 1, 0, -1):
+        path[j - 1] = back[path[j], j]
+    return path, float(np.max(score))
+
+def _distinct_paths(times, values, jump_penalty, T0, reverse_penalty):
+    # Short and long paths that never take the same candidate: each branch in
+    # turn is linked first and the other one around it; the pair with the
+    # better joint score wins. Returns the paths and the candidate values each
+    # branch may use (the other branch's candidates set to -inf)
+    columns = np.arange(values.shape[1])
+    best = None
+    for first, second in (("short", "long"), ("long", "short")):
+        paths, total = {}, 0.0
+        paths[first], score = link_ridge(times, values, BRANCHES[first], jump_penalty, T0, reverse_penalty)
+        total += score
+        excluded = np.zeros(values.shape, dtype=bool)
+        taken = paths[first] >= 0
+        excluded[paths[first][taken], columns[taken]] = True
+        paths[second], score = link_ridge(times, values, BRANCHES[second], jump_penalty, T0, reverse_penalty, excluded)
+        total += score if np.isfinite(score) else 0.0
+        if best is None or total > best[0]:
+            best = (total, paths, {first: values, second: np.where(excluded, -np.inf, values)})
+    return best[1], best[2]
+
+def attochirp(emission_time, w):
+    """
+    Slope of a linear fit of the emission time [as] against the photon
+    energy [eV], in as/eV, over the finite part of the ridge.
+    """
+    valid = np.isfinite(emission_time)
+    if np.count_nonzero(valid) < 2:
+        return np.nan
+    return float(np.polyfit(w[valid] * Ip_HeV, emission_time[valid] * TIMEau * 1e18, 1)[0])
+
+def extract_ridges(Atot_log, t, w, T0, time_window=None, n_candidates=4, jump_penalty=20.0, reverse_penalty=200.0):
+    """
+    Short- and long-trajectory ridges of a Gabor map.
+
+    Parameters:
+    - Atot_log: log10 amplitude (Nt, Nw), as returned by time_frequency().
+    - t, w: Time [a.u.] and frequency [a.u.] axes.
+    - T0: Driver period [a.u.].
+    - time_window: (start, end) [a.u.]; default half a cycle around the strongest emission.
+    - n_candidates: Local maxima per frequency considered for the linking.
+    - jump_penalty: Cost (in decades of amplitude) of a one-cycle jump between neighbouring orders.
+    - reverse_penalty: Extra cost of a one-cycle step against the branch direction.
+
+    Returns a dict with the time_window and, per branch ('short', 'long'):
+    emission_time [a.u.] (Nw,) (NaN where the branch has no point),
+    amplitude (Nw,), attochirp [as/eV] and defined. A branch is undefined
+    (all NaN) when it has fewer than MIN_RIDGE_POINTS points of its own (e.g. a single
+    maximum per column) or its attochirp contradicts its direction.
+    """
+    if time_window is None:
+        time_window = _default_window(Atot_log, t, T0)
+    index, values = ridge_candidates(Atot_log, t, time_window, n_candidates)
+    times = t[index]
+
+    ridges = {"time_window": tuple(time_window)}
+    paths, branch_values = _distinct_paths(times, values, jump_penalty, T0, reverse_penalty)
+    columns = np.arange(len(w))
+    for name, direction in BRANCHES.items():
+        path = paths[name]
+        chosen = np.clip(path, 0, None)
+        amplitude = np.where(path >= 0, branch_values[name][chosen, columns], np.nan)
+        amplitude = np.where(np.isfinite(amplitude), amplitude, np.nan)
+        emission_time = np.where(np.isfinite(amplitude), times[chosen, columns], np.nan)
+        chirp = attochirp(emission_time, w)
+        defined = bool(np.count_nonzero(np.isfinite(emission_time)) >= MIN_RIDGE_POINTS
+                       and np.sign(chirp) == direction)
+        if not defined:
+            emission_time = np.full(len(w), np.nan)
+            amplitude = np.full(len(w), np.nan)
+            chirp = np.nan
+        ridges[name] = {"emission_time": emission_time, "amplitude": amplitude,
+                        "attochirp": chirp, "defined": defined}
+    return ridges
+
+##----------------------------------------------------
+def format_ridges(ridges, T0):
+    start, end = ridges["time_window"]
+    lines = [f">>> Ridge window [o.c.]: {start / T0:.4f} - {end / T0:.4f}"]
+    for name in BRANCHES:
+        if ridges[name]["defined"]:
+            lines.append(f">>> Attochirp ({name} trajectories) [as/eV]: {ridges[name]['attochirp']:.6e}")
+        else:
+            lines.append(f">>> {name.capitalize()} trajectories: not resolved in this window")
+    return "\n".join(lines) + "\n"
+
+def save_ridges(ridges, w, w0, T0, file_path="tf_ridges.txt"):
+    columns = [w / w0] + [ridges[name]["emission_time"] / T0 for name in BRANCHES]
+    header = (
+        f"# T [a.u.]: {T0}\n"
+        + "".join(f"# Attochirp ({name}) [as/eV]: {ridges[name]['attochirp'] if ridges[name]['defined'] else 'undefined'}\n"
+                  for name in BRANCHES)
+        + "# Harmonic order, t_emission short [o.c.], t_emission long [o.c.]"
+    )
+    np.savetxt(file_path, np.column_stack(columns), header=header, comments='', fmt='%.12e')
+
+def plot_ridges(Atot_log, t, T0, w, w0, ridges, plot_settings=None):
+    plot_settings = plot_settings or {}
+    ww = w / w0
+    fig = plt.figure()
+    fig.patch.set_facecolor(plot_settings.get("background_color", "white"))
+    plt.imshow(Atot_log.T, extent=[t[0] / T0, t[-1] / T0, ww[0], ww[-1]],
+               aspect=plot_settings.get("aspect", 'auto'), origin=plot_settings.get("origin", 'lower'),
+               cmap=plot_settings.get("cmap", 'jet'), interpolation=plot_settings.get("interpolation", 'nearest'),
+               vmin=plot_settings.get("vmin", None), vmax=plot_settings.get("vmax", None))
+    plt.colorbar(label=plot_settings.get("colorbar_label", 'log_{10} (Intensity) [arb. units]'))
+    for name, style in (("short", 'w-o'), ("long", 'k--s')):
+        if not ridges[name]["defined"]:
+            continue
+        plt.plot(ridges[name]["emission_time"] / T0, ww, style, markersize=3,
+                 label=f"{name} ({ridges[name]['attochirp']:.1f} as/eV)")
+    start, end = ridges["time_window"]
+    plt.xlim(left=plot_settings.get("x_min", start / T0 - 0.25), right=plot_settings.get("x_max", end / T0 + 0.25))
+    plt.ylim(bottom=plot_settings.get("y_min", ww[0]), top=plot_settings.get("y_max", ww[-1]))
+    plt.xlabel(plot_settings.get("x_label", "Time [o.c.]"))
+    plt.ylabel(plot_settings.get("y_label", "Harmonic order"))
+    plt.title(plot_settings.get("graph_title", "Emission-time ridges"))
+    if any(ridges[name]["defined"] for name in BRANCHES):
+        plt.legend()
+    plt.show()
+    return fig
@@ -0,0 +1,366 @@
+# benchmarks/equivalence.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import os, sys
+import json
+import shutil
+import argparse
+import tempfile
+import itertools
+import numpy as np
+#--------------------------------
+from attoscience_studio.benchmarks import reference
+from attoscience_studio.benchmarks.octopus_synth import write_total_current, write_kpoint_frames
+from attoscience_studio.high_harmonic.hhg_spectrum import calculate_spectrum
+from attoscience_studio.attosecond_pulse.atto_pulse import attosecond_pulses
+from attoscience_studio.attosecond_pulse.find_MPW import find_MPW_core
+from attoscience_studio.attosecond_pulse.gtf import GTF_core
+from attoscience_studio.attosecond_pulse.tf_engine import signal_spectrum, windowed_transform, morlet_transform
+from attoscience_studio.electron_dynamics.nex_anim import CurrentNexAnalysisThread
+from attoscience_studio.pg_analyzing.pg import polarization_gating
+from attoscience_studio.pg_analyzing.gw import gate_width
+from attoscience_studio.electron_dynamics.bz_geometry import PLANE_AXES, reciprocal_lattice, plane_reciprocal_vectors
+##----------------------------------------------------
+# Reference-vs-fast harness. Every engine maps a set of named inputs to named
+# outputs twice: once with the frozen reference (benchmarks/reference.py) and
+# once with the path the application actually runs. Faster implementations are
+# registered with register_engine() and must stay within the tolerances.
+##----------------------------------------------------
+LAMBDA0_NM = 800.0
+FILTERING = 10
+WINDOW_FUNC = ["Gaussian", 200.0]
+SYNTHETIC_SAMPLES = 6000
+SYNTHETIC_KPOINTS = 784
+DEFAULT_TEST_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "test_data")
+##----------------------------------------------------
+def max_relative_error(ref, fast):
+    # Largest deviation relative to the peak magnitude of the reference
+    ref = np.asarray(ref)
+    fast = np.asarray(fast)
+    if ref.shape != fast.shape:
+        raise ValueError(f"shape mismatch {fast.shape} != {ref.shape}")
+    scale = np.max(np.abs(ref)) if ref.size else 0.0
+    diff = np.max(np.abs(fast - ref)) if ref.size else 0.0
+    if scale == 0:
+        return 0.0 if diff == 0 else float("inf")
+    return float(diff / scale)
+
+def max_phase_error(ref, fast, floor=1e-3):
+    # Largest phase deviation [rad] where |ref| is above floor * max|ref|
+    ref = np.asarray(ref)
+    fast = np.asarray(fast)
+    if not (np.iscomplexobj(ref) or np.iscomplexobj(fast)):
+        return None
+    magnitude = np.abs(ref)
+    mask = magnitude >= floor * np.max(magnitude) if ref.size else magnitude > 0
+    if not mask.any():
+        return 0.0
+    return float(np.max(np.abs(np.angle(fast[mask] * np.conj(ref[mask])))))
+
+##----------------------------------------------------
+class EquivalenceInputs:
+    """
+    Input sets shared by all engines: the shipped test_data (when available)
+    and a small synthetic Octopus output written to a scratch directory.
+    """
+    def __init__(self, work_dir, test_data_dir=None, synthetic_samples=SYNTHETIC_SAMPLES, synthetic_kpoints=SYNTHETIC_KPOINTS):
+        self.sets = {}
+        if test_data_dir and os.path.isdir(test_data_dir):
+            self.sets["test_data"] = self._build(
+                os.path.join(test_data_dir, "total_current"),
+                os.path.join(test_data_dir, "n_excited_el_kpt.kz=0"))
+        current_file = os.path.join(work_dir, "total_current")
+        write_total_current(current_file, synthetic_samples, lambda0_nm=LAMBDA0_NM)
+        frame_dir = write_kpoint_frames(os.path.join(work_dir, "kpoints"), synthetic_kpoints, n_frames=1)[0]
+        self.sets["synthetic"] = self._build(current_file, os.path.join(frame_dir, "n_excited_el_kpt.kz=0"))
+
+    def _build(self, current_file, kpoint_file):
+        data = np.loadtxt(current_file)
+        t = data[:, 1]
+        jx = data[:, 2] - data[0, 2]
+        jy = data[:, 3] - data[0, 3]
+        kpt = np.loadtxt(kpoint_file, skiprows=1)
+        x_grid, y_grid = np.meshgrid(np.linspace(kpt[:, 0].min(), kpt[:, 0].max(), 100),
+                                     np.linspace(kpt[:, 1].min(), kpt[:, 1].max(), 100))
+        return {"current_file": current_file, "t": t, "dt": t[1] - t[0], "jx": jx, "jy": jy,
+                "kpoint_file": kpoint_file, "x_grid": x_grid, "y_grid": y_grid}
+
+##----------------------------------------------------
+class EquivalenceEngine:
+    def __init__(self, name, reference, candidate, rtol=1e-3, phase_tol=1e-2, phase_floor=1e-3):
+        self.name = name
+        self.reference = reference
+        self.candidate = candidate
+        self.rtol = rtol
+        self.phase_tol = phase_tol
+        self.phase_floor = phase_floor
+
+EQUIVALENCE_ENGINES = []
+
+def register_engine(name, reference, candidate, rtol=1e-3, phase_tol=1e-2, phase_floor=1e-3):
+    """
+    Registers an engine. reference and candidate both take one input set (dict)
+    and return a dict of named output arrays.
+    """
+    EQUIVALENCE_ENGINES[:] = [engine for engine in EQUIVALENCE_ENGINES if engine.name != name]
+    EQUIVALENCE_ENGINES.append(EquivalenceEngine(name, reference, candidate, rtol, phase_tol, phase_floor))
+
+#----
+SPECTRUM_ARGS = dict(lambda0_nm=LAMBDA0_NM, q_value=25, filtering=FILTERING, window_func=WINDOW_FUNC, time_derivative='True')
+
+def _spectrum_reference(inp):
+    w, Dx, Dy = reference.spectrum_reference(file_path=inp["current_file"], **SPECTRUM_ARGS)
+    return {"Dx": Dx, "Dy": Dy}
+
+def _spectrum_candidate(inp):
+    result = calculate_spectrum(file_path=inp["current_file"], **SPECTRUM_ARGS)
+    return {"Dx": result[5], "Dy": result[6]}
+
+def _atto_args(method):
+    return dict(lambda0_nm=LAMBDA0_NM, qstart=11, qmax=21, filtering=FILTERING, attosecond_method=method, window_func=WINDOW_FUNC)
+
+def _atto_reference(method):
+    def run(inp):
+        I, Ix, Iy = reference.attosecond_reference(file_path=inp["current_file"], **_atto_args(method))
+        return {"I": I, "Ix": Ix, "Iy": Iy}
+    return run
+
+def _atto_candidate(method):
+    def run(inp):
+        I, Ix, Iy = attosecond_pulses(file_path=inp["current_file"], **_atto_args(method))[:3]
+        return {"I": I, "Ix": Ix, "Iy": Iy}
+    return run
+
+MPW_ARGS = dict(lambda0_nm=LAMBDA0_NM, qstart=11, qmax=15)
+
+def _mpw_reference(inp):
+    min_FWHM, optimal_qstart, optimal_qmax, OC = reference.mpw_reference(inp["t"], inp["dt"], inp["jx"], inp["jy"], **MPW_ARGS)
+    return {"FWHM": np.array([min_FWHM]), "window": np.array([optimal_qstart, optimal_qmax])}
+
+def _mpw_candidate(inp):
+    min_FWHM, optimal_qstart, optimal_qmax = find_MPW_core(inp["t"], inp["dt"], inp["jx"], inp["jy"], **MPW_ARGS)[:3]
+    return {"FWHM": np.array([min_FWHM]), "window": np.array([optimal_qstart, optimal_qmax])}
+
+def gtf_args(inp):
+    w0 = 45.563 / LAMBDA0_NM
+    T0 = 2 * np.pi / w0
+    w = np.arange(11 * w0, 25 * w0 + w0 / 2, w0 / 2)
+    return dict(t=inp["t"], dt=inp["dt"], hx=inp["jx"], hy=inp["jy"], w=w, sigma_gabor=T0 / 3)
+
+def _gtf_reference(inp):
+    Ax, Ay = reference.gtf_reference(**gtf_args(inp))
+    return {"Ax": Ax, "Ay": Ay}
+
+def _gtf_candidate(inp):
+    Ax, Ay = GTF_core(**gtf_args(inp))
+    return {"Ax": Ax, "Ay": Ay}
+
+def _spectral_gabor_candidate(inp):
+    # Same windows from one FFT of the currents (tf_engine.gabor_sweep backend)
+    args = gtf_args(inp)
+    spectrum = signal_spectrum(args["t"], args["dt"], args["hx"], args["hy"], args["sigma_gabor"])
+    Ax, Ay = windowed_transform(spectrum, args["w"], args["sigma_gabor"])
+    return {"Ax": Ax, "Ay": Ay}
+
+MORLET_OMEGA_C = 6.0
+
+def _morlet_reference(inp):
+    # One reference convolution per frequency with the wavelet width omega_c / w
+    args = gtf_args(inp)
+    columns = [reference.gtf_reference(args["t"], args["dt"], args["hx"], args["hy"], [w_i], MORLET_OMEGA_C / w_i)
+               for w_i in args["w"]]
+    norm = args["w"] / (MORLET_OMEGA_C * np.sqrt(2 * np.pi))
+    return {"Ax": np.hstack([c[0] for c in columns]) * norm, "Ay": np.hstack([c[1] for c in columns]) * norm}
+
+def _morlet_candidate(inp):
+    args = gtf_args(inp)
+    Ax, Ay, sigma = morlet_transform(args["t"], args["dt"], args["hx"], args["hy"], args["w"], MORLET_OMEGA_C)
+    return {"Ax": Ax, "Ay": Ay}
+
+def _kgrid_reference(inp):
+    return {"nex": reference.kgrid_reference(inp["kpoint_file"], inp["x_grid"], inp["y_grid"])}
+
+def _kgrid_candidate(inp):
+    thread = CurrentNexAnalysisThread({})
+    return {"nex": thread.load_and_interpolate_data_nex(inp["kpoint_file"], inp["x_grid"], inp["y_grid"])}
+
+# Analytic fields: the input sets are not used, both envelope shapes are checked instead
+PG_ARGS = dict(lambda1_nm=800.0, lambda2_nm=800.0, intensity1=100.0, intensity2=80.0, cycles1=5, cycles2=4,
+               eps1=0.8, eps2=-0.6, alpha1=10.0, alpha2=-20.0, cep1=0.3, cep2=0.1, delay=1.5, time_step=0.5)
+
+def _pg_reference(inp):
+    outputs = {}
+    for envelope_name in ('Sine_square', 'Gaussian'):
+        t, At_x, At_y, envelope1, envelope2 = reference.polarization_gating_reference(envelope_name=envelope_name, **PG_ARGS)
+        outputs.update({f"At_x[{envelope_name}]": At_x, f"At_y[{envelope_name}]": At_y,
+                        f"env1[{envelope_name}]": envelope1, f"env2[{envelope_name}]": envelope2})
+    return outputs
+
+def _pg_candidate(inp):
+    outputs = {}
+    for envelope_name in ('Sine_square', 'Gaussian'):
+        t, At_x, At_y, envelope1, envelope2 = polarization_gating(envelope_name=envelope_name, extract_data_option='False', **PG_ARGS)[4:]
+        outputs.update({f"At_x[{envelope_name}]": At_x, f"At_y[{envelope_name}]": At_y,
+                        f"env1[{envelope_name}]": envelope1, f"env2[{envelope_name}]": envelope2})
+    return outputs
+
+GW_ARGS = {key: PG_ARGS[key] for key in ("lambda1_nm", "lambda2_nm", "intensity1", "intensity2", "cycles1", "cycles2", "delay", "time_step")}
+
+def _gw_reference(inp):
+    outputs = {}
+    for envelope_name in ('Sine_square', 'Gaussian'):
+        t, ellipt = reference.gate_width_reference(envelope_name=envelope_name, **GW_ARGS)
+        outputs[f"eps[{envelope_name}]"] = np.nan_to_num(ellipt)
+    return outputs
+
+def _gw_candidate(inp):
+    # Same arguments as the dialog passes, including its ellipticities, which
+    # must not change the gate
+    outputs = {}
+    for envelope_name in ('Sine_square', 'Gaussian'):
+        ellipt = gate_width(eps1=PG_ARGS["eps1"], eps2=PG_ARGS["eps2"], envelope_name=envelope_name, **GW_ARGS)[-1]
+        outputs[f"eps[{envelope_name}]"] = np.nan_to_num(ellipt)
+    return outputs
+
+# Non-orthogonal lattices [bohr]; the input sets are not used. The in-plane
+# reciprocal lattice is oblique in plane_x for the first and in plane_z for the
+# second. Both sides list the shortest in-plane |G|, which fixes the lattice.
+ZONE_LATTICES = {"plane_x": np.array([[6.0, 0.0, 0.0], [2.0, 5.0, 0.0], [1.5, -1.0, 9.0]]),
+                 "plane_z": np.array([[6.0, 0.0, 0.0], [2.0, 5.0, 0.0], [0.0, 0.0, 9.0]])}
+SHORTEST_G = 8
+
+def _shortest_lengths(points):
+    lengths = np.sort(np.linalg.norm(points, axis=1))
+    return lengths[lengths > 1e-12][:SHORTEST_G]
+
+def _zone_reference(inp):
+    # Brute force over all reciprocal lattice points with |n_i| <= 10
+    outputs = {}
+    for plane, lattice in ZONE_LATTICES.items():
+        i, j = PLANE_AXES[plane]
+        points = np.array(list(itertools.product(range(-10, 11), repeat=3))) @ reciprocal_lattice(lattice)
+        outputs[f"|G|[{plane}]"] = _shortest_lengths(points[np.abs(points[:, 3 - i - j]) < 1e-9])
+    return outputs
+
+def _zone_candidate(inp):
+    outputs = {}
+    for plane, lattice in ZONE_LATTICES.items():
+        basis = plane_reciprocal_vectors(lattice, plane)
+        outputs[f"|G|[{plane}]"] = _shortest_lengths(np.array(list(itertools.product(range(-4, 5), repeat=2))) @ basis)
+    return outputs
+
+register_engine("calculate_spectrum", _spectrum_reference, _spectrum_candidate)
+register_engine("attosecond_pulses[Method 1]", _atto_reference('Method 1'), _atto_candidate('Method 1'))
+register_engine("attosecond_pulses[Method 2]", _atto_reference('Method 2'), _atto_candidate('Method 2'))
+# The reference snaps the half-maximum crossings to samples, the app interpolates
+# them (utils/peak_metrics.py): the FWHM may move by up to one sample per edge
+register_engine("find_MPW_core", _mpw_reference, _mpw_candidate, rtol=2.5e-2)
+register_engine("GTF_core", _gtf_reference, _gtf_candidate)
+register_engine("gabor_sweep", _gtf_reference, _spectral_gabor_candidate)
+register_engine("morlet_cwt", _morlet_reference, _morlet_candidate)
+register_engine("nex_anim_interpolation", _kgrid_reference, _kgrid_candidate)
+register_engine("polarization_gating", _pg_reference, _pg_candidate, rtol=1e-10)
+register_engine("gate_width", _gw_reference, _gw_candidate, rtol=1e-10)
+register_engine("plane_reciprocal_vectors", _zone_reference, _zone_candidate, rtol=1e-10)
+
+##----------------------------------------------------
+def load_snapshot(file_path):
+    with np.load(file_path) as data:
+        return {key: data[key] for key in data.files}
+
+def run_equivalence(engine_names=None, test_data_dir=None, snapshot=None, save_snapshot=None,
+                    synthetic_samples=SYNTHETIC_SAMPLES, log=print):
+    """
+    Compares every registered engine against the reference (or a stored
+    snapshot of it) and returns one row per engine, input set and output.
+    """
+    engines = [engine for engine in EQUIVALENCE_ENGINES if not engine_names or engine.name in engine_names]
+    stored = load_snapshot(snapshot) if snapshot else {}
+    new_snapshot = {}
+    rows = []
+
+    work_dir = tempfile.mkdtemp(prefix="attoscience_equiv_")
+    try:
+        inputs = EquivalenceInputs(work_dir, test_data_dir, synthetic_samples)
+        for engine in engines:
+            for label, inp in inputs.sets.items():
+                prefix = f"{engine.name}/{label}/"
+                try:
+                    with np.errstate(all='ignore'):
+                        if stored and any(key.startswith(prefix) for key in stored):
+                            ref = {key[len(prefix):]: value for key, value in stored.items() if key.startswith(prefix)}
+                        else:
+                            ref = engine.reference(inp)
+                        fast = engine.candidate(inp)
+                except Exception as e:
+                    rows.append({"engine": engine.name, "input": label, "output": "-", "status": "error", "reason": str(e)})
+                    log(f"  {engine.name:<30} {label:<10} error: {e}")
+                    continue
+                new_snapshot.update({prefix + key: np.asarray(value) for key, value in ref.items()})
+
+                for output, ref_value in ref.items():
+                    row = {"engine": engine.name, "input": label, "output": output}
+                    try:
+                        rel = max_relative_error(ref_value, fast[output])
+                        phase = max_phase_error(ref_value, fast[output], engine.phase_floor)
+                        passed = rel <= engine.rtol and (phase is None or phase <= engine.phase_tol)
+                        row.update(max_rel_error=rel, max_phase_error=phase, rtol=engine.rtol,
+                                   phase_tol=engine.phase_tol, status="pass" if passed else "fail")
+                    except (KeyError, ValueError) as e:
+                        row.update(status="error", reason=str(e))
+                    rows.append(row)
+                    phase_text = "-" if row.get("max_phase_error") is None else f"{row['max_phase_error']:.2e}"
+                    rel_text = f"{row['max_rel_error']:.2e}" if "max_rel_error" in row else "-"
+                    log(f"  {engine.name:<30} {label:<10} {output:<8} rel={rel_text:<10} phase={phase_text:<10} {row['status']}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if save_snapshot:
+        np.savez_compressed(save_snapshot, **new_snapshot)
+        log(f">>> Reference snapshot saved to: {save_snapshot}")
+    return rows
+
+##----------------------------------------------------
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m attoscience_studio.benchmarks.equivalence",
+                                     description="Check the fast engines against the reference implementations.")
+    parser.add_argument("--engines", nargs="+", metavar="NAME", help="Check only these engines.")
+    parser.add_argument("--list", action="store_true", help="List the registered engines and exit.")
+    parser.add_argument("--test-data", default=DEFAULT_TEST_DATA_DIR, metavar="DIR", help="test_data directory.")
+    parser.add_argument("--no-test-data", action="store_true", help="Only use synthetic inputs.")
+    parser.add_argument("--snapshot", metavar="FILE", help="Compare against a stored reference snapshot (.npz).")
+    parser.add_argument("--save-snapshot", metavar="FILE", help="Store the reference outputs as a snapshot (.npz).")
+    parser.add_argument("--output", metavar="FILE", help="Write the report as JSON.")
+    args = parser.parse_args(argv)
+
+    if args.list:
+        for engine in EQUIVALENCE_ENGINES:
+            print(f"{engine.name:<30} rtol={engine.rtol:g} phase_tol={engine.phase_tol:g}")
+        return 0
+
+    test_data_dir = None if args.no_test_data else args.test_data
+    print(">>> Checking numerical equivalence")
+    rows = run_equivalence(args.engines, test_data_dir, args.snapshot, args.save_snapshot)
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(rows, f, indent=2)
+    return 0 if all(row["status"] == "pass" for row in rows) else 1
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,278 @@
+# benchmarks/octopus_synth.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import os, sys
+import json
+import argparse
+import numpy as np
+##----------------------------------------------------
+# Synthetic Octopus output with the same headers and column layouts as the
+# files in test_data/. Every writer streams its rows in chunks, so the size is
+# only limited by disk, and returns a dict describing the analytic content.
+##----------------------------------------------------
+CHUNK_SIZE = 100000
+HEADER_RULE = "#" * 80
+
+def _envelope(t, Ttot):
+    return np.sin(np.pi * np.clip(t / Ttot, 0.0, 1.0))**2
+
+def _write_rows(f, n_rows, make_chunk, fmt):
+    for start in range(0, n_rows, CHUNK_SIZE):
+        stop = min(start + CHUNK_SIZE, n_rows)
+        np.savetxt(f, make_chunk(start, stop), fmt=fmt)
+
+def _check_samples(n_samples):
+    # The time step spans the pulse over n_samples - 1 intervals
+    if n_samples < 2:
+        raise ValueError(f"n_samples must be at least 2, got {n_samples}.")
+
+##----------------------------------------------------
+def harmonic_content(lambda0_nm=800.0, max_order=31, cutoff_order=21):
+    """
+    Odd harmonics with a plateau up to cutoff_order and an exponential
+    fall-off beyond it; x and y carry different amplitudes and phases.
+    """
+    orders = np.arange(1, max_order + 1, 2)
+    amplitudes_x = np.where(orders <= cutoff_order, 1.0 / orders, np.exp(-0.5 * (orders - cutoff_order)) / orders)
+    amplitudes_y = 0.3 * amplitudes_x
+    phases_x = 0.05 * orders**2
+    phases_y = 0.05 * orders**2 + np.pi / 4
+    return {
+        "lambda0_nm": lambda0_nm,
+        "w0": 45.5633 / lambda0_nm,
+        "orders": orders.tolist(),
+        "amplitudes_x": amplitudes_x.tolist(),
+        "amplitudes_y": amplitudes_y.tolist(),
+        "phases_x": phases_x.tolist(),
+        "phases_y": phases_y.tolist(),
+    }
+
+def harmonic_current(t, content, Ttot):
+    w0 = content["w0"]
+    env = _envelope(t, Ttot)
+    jx = np.zeros(len(t))
+    jy = np.zeros(len(t))
+    for q, ax, ay, px, py in zip(content["orders"], content["amplitudes_x"], content["amplitudes_y"],
+                                 content["phases_x"], content["phases_y"]):
+        jx += ax * np.sin(q * w0 * t + px)
+        jy += ay * np.sin(q * w0 * t + py)
+    return env * jx, env * jy
+
+def write_total_current(file_path, n_samples, lambda0_nm=800.0, dt=0.1, max_order=31, cutoff_order=21):
+    _check_samples(n_samples)
+    content = harmonic_content(lambda0_nm, max_order, cutoff_order)
+    Ttot = (n_samples - 1) * dt
+
+    def make_chunk(start, stop):
+        it = np.arange(start, stop)
+        t = it * dt
+        jx, jy = harmonic_current(t, content, Ttot)
+        zeros = np.zeros(len(t))
+        # I(1..3), In(1..3) and the I-sp1(1..3) spin channel, as in Octopus
+        return np.column_stack((it, t, jx, jy, zeros, np.abs(jx), np.abs(jy), zeros, jx, jy, zeros))
+
+    columns = ["I(1)", "I(2)", "I(3)", "In1)", "In2)", "In3)", "I-sp1(1)", "I-sp1(2)", "I-sp1(3)"]
+    with open(file_path, "w") as f:
+        f.write(HEADER_RULE + "\n# HEADER\n")
+        f.write("# Iter             t" + "".join(c.rjust(20) for c in columns) + "      \n")
+        f.write(HEADER_RULE + "\n")
+        _write_rows(f, n_samples, make_chunk, ["%8d"] + ["%19.12e"] * 10)
+
+    content.update(n_samples=n_samples, dt=dt, envelope="sin^2", duration=Ttot)
+    return content
+
+##----------------------------------------------------
+def write_laser(file_path, n_samples, lambda0_nm=800.0, dt=0.2, A0=1.0, eps=0.0, dual=False, lambda2_nm=None, eps2=0.0, A02=None):
+    """
+    Vector potential of one (5 columns) or two (8 columns) sin^2 pulses.
+    The second pulse has the opposite helicity of the first.
+    """
+    _check_samples(n_samples)
+    w1 = 45.5633 / lambda0_nm
+    w2 = 45.5633 / (lambda2_nm or lambda0_nm)
+    A02 = A0 if A02 is None else A02
+    Ttot = (n_samples - 1) * dt
+
+    def make_chunk(start, stop):
+        it = np.arange(start, stop)
+        t = it * dt
+        env = _envelope(t, Ttot)
+        zeros = np.zeros(len(t))
+        Ax1 = A0 * env * np.cos(w1 * t)
+        Ay1 = A0 * eps * env * np.sin(w1 * t)
+        if not dual:
+            return np.column_stack((it, t, Ax1, Ay1, zeros))
+        Ax2 = A02 * env * np.cos(w2 * t)
+        Ay2 = -A02 * eps2 * env * np.sin(w2 * t)
+        return np.column_stack((it, t, Ax1, Ay1, zeros, Ax2, Ay2, zeros))
+
+    n_columns = 8 if dual else 5
+    with open(file_path, "w") as f:
+        _write_rows(f, n_samples, make_chunk, ["%8d"] + ["%19.12e"] * (n_columns - 1))
+
+    return {"n_samples": n_samples, "dt": dt, "w0": [w1, w2] if dual else [w1], "A0": [A0, A02] if dual else [A0],
+            "eps": [eps, -eps2] if dual else [eps], "envelope": "sin^2", "duration": Ttot}
+
+##----------------------------------------------------
+def n_ex_analytic(t, Ttot, n_final):
+    # Integral of the sin^2 envelope, normalised so Nex(Ttot) = n_final
+    x = np.clip(t / Ttot, 0.0, 1.0)
+    return n_final * (x - np.sin(2 * np.pi * x) / (2 * np.pi))
+
+def write_n_ex(file_path, n_samples, dt=0.2, nik=784, n_final=1e-3):
+    _check_samples(n_samples)
+    Ttot = (n_samples - 1) * dt
+
+    def make_chunk(start, stop):
+        it = np.arange(start, stop)
+        t = it * dt
+        return np.column_stack((it, t, n_ex_analytic(t, Ttot, n_final)))
+
+    with open(file_path, "w") as f:
+        f.write(HEADER_RULE + "\n# HEADER\n")
+        f.write("# nspin         1\n#%\n")
+        f.write(f"# nik {nik:9d}\n")
+        f.write("#  st         1       9\n# ust         1       9\n")
+        f.write("# Iter             t            #  iter t Nex(t)  \n")
+        f.write(HEADER_RULE + "\n")
+        _write_rows(f, n_samples, make_chunk, ["%8d", "%19.12e", "%19.12e"])
+
+    return {"n_samples": n_samples, "dt": dt, "nik": nik, "n_final": n_final, "duration": Ttot}
+
+##----------------------------------------------------
+def hexagonal_kpoints(n_kpoints, a_bohr=6.21342):
+    """
+    Monkhorst-Pack-like sampling of a hexagonal reciprocal cell (cartesian, bohr^-1),
+    symmetric about Gamma like the Octopus k-point grids (Gamma is a grid point
+    for odd n, the points are shifted by half a step from it for even n).
+    """
+    n = max(int(np.ceil(np.sqrt(n_kpoints))), 2)
+    b = 2 * np.pi / a_bohr
+    b1 = b * np.array([1.0, 1.0 / np.sqrt(3)])
+    b2 = b * np.array([0.0, 2.0 / np.sqrt(3)])
+    frac = (np.arange(n) - (n - 1) / 2) / n
+    i, j = np.meshgrid(frac, frac, indexing="ij")
+    k = i.reshape(-1, 1) * b1 + j.reshape(-1, 1) * b2
+    k = k[np.argsort(np.hypot(k[:, 0], k[:, 1]), kind="stable")][:n_kpoints]
+    return k[:, 0], k[:, 1]
+
+def write_kpoint_file(file_path, ki, kj, values):
+    # Octopus writes a 3-digit exponent (E-017); the readers accept either form
+    np.savetxt(file_path, np.column_stack((ki, kj, values)), fmt="%23.14E", comments="",
+               header="#        kx                     ky                     Re                     Im")
+
+def kpoint_fields(ki, kj, phase, scale):
+    """
+    Analytic k-resolved current components and excitation for one frame.
+    """
+    k2 = ki**2 + kj**2
+    gauss = np.exp(-k2 / 0.2)
+    jx = scale * gauss * np.sin(20 * ki + phase)
+    jy = scale * gauss * np.sin(20 * kj + phase)
+    jz = np.zeros(len(ki))
+    nex = scale * 1e-4 * np.exp(-k2 / 0.05)
+    return jx, jy, jz, nex
+
+def write_kpoint_frames(base_dir, n_kpoints, n_frames=2, iterations_per_frame=100, plane="kz=0"):
+    """
+    Writes td.XXXXXXX directories with current_kpt-{x,y,z} and n_excited_el_kpt
+    for one k-plane, and returns the list of frame directories.
+    """
+    ki, kj = hexagonal_kpoints(n_kpoints)
+    frame_dirs = []
+    for frame in range(n_frames):
+        phase = 2 * np.pi * frame / max(n_frames, 1)
+        scale = (frame + 1) / n_frames
+        jx, jy, jz, nex = kpoint_fields(ki, kj, phase, scale)
+        frame_dir = os.path.join(base_dir, f"td.{frame * iterations_per_frame:07d}")
+        os.makedirs(frame_dir, exist_ok=True)
+        write_kpoint_file(os.path.join(frame_dir, f"current_kpt-x.{plane}"), ki, kj, jx)
+        write_kpoint_file(os.path.join(frame_dir, f"current_kpt-y.{plane}"), ki, kj, jy)
+        write_kpoint_file(os.path.join(frame_dir, f"current_kpt-z.{plane}"), ki, kj, jz)
+        write_kpoint_file(os.path.join(frame_dir, f"n_excited_el_kpt.{plane}"), ki, kj, nex)
+        frame_dirs.append(frame_dir)
+    return frame_dirs
+
+##----------------------------------------------------
+def write_bandstructure(file_path, n_kpoints, n_bands=20, n_valence=None, gap_H=0.06, width_H=0.1):
+    """
+    Cosine bands along a straight k-path; the valence maximum and conduction
+    minimum both sit at the first k-point, so the gap is direct and equal to gap_H.
+    """
+    n_valence = n_bands // 2 if n_valence is None else n_valence
+    coord = np.linspace(0.0, 1.0, n_kpoints)
+    kx = 0.5 * coord
+    ky = 0.5 / np.sqrt(3) * coord
+    kz = np.zeros(n_kpoints)
+
+    bands = np.empty((n_kpoints, n_bands))
+    for n in range(n_bands):
+        dispersion = width_H * (1 - np.cos(np.pi * coord)) / (1 + 0.2 * abs(n - n_valence))
+        if n < n_valence:
+            bands[:, n] = -gap_H / 2 - 0.08 * (n_valence - 1 - n) - dispersion
+        else:
+            bands[:, n] = gap_H / 2 + 0.08 * (n - n_valence) + dispersion
+    bands.sort(axis=1)
+
+    with open(file_path, "w") as f:
+        f.write(f"# coord. kx ky kz (red. coord.), bands: {n_bands:5d} [H]\n")
+        np.savetxt(f, np.column_stack((coord, kx, ky, kz, bands)), fmt="%14.8f")
+
+    return {"n_kpoints": n_kpoints, "n_bands": n_bands, "n_valence": n_valence, "gap_H": gap_H,
+            "vbm_H": float(bands[:, n_valence - 1].max()), "cbm_H": float(bands[:, n_valence].min())}
+
+##----------------------------------------------------
+def generate_dataset(out_dir, n_samples=10**5, n_kpoints=784, n_frames=4, n_bands=20, lambda0_nm=800.0):
+    """
+    Writes a complete synthetic Octopus output tree and a manifest.json with
+    the analytic content of every file.
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    manifest = {
+        "total_current": write_total_current(os.path.join(out_dir, "total_current"), n_samples, lambda0_nm),
+        "laser": write_laser(os.path.join(out_dir, "laser"), n_samples, lambda0_nm),
+        "laser2": write_laser(os.path.join(out_dir, "laser2"), n_samples, lambda0_nm, eps=1.0, dual=True,
+                              lambda2_nm=lambda0_nm / 2, eps2=1.0),
+        "n_ex": write_n_ex(os.path.join(out_dir, "n_ex"), n_samples, nik=n_kpoints),
+        "bandstructure": write_bandstructure(os.path.join(out_dir, "bandstructure"), n_kpoints, n_bands),
+    }
+    frame_dirs = write_kpoint_frames(os.path.join(out_dir, "output_iter"), n_kpoints, n_frames)
+    manifest["kpoint_frames"] = {"n_kpoints": n_kpoints, "frames": [os.path.basename(d) for d in frame_dirs]}
+
+    with open(os.path.join(out_dir, "manifest.json"), "w") as f:
+        json.dump(manifest, f, indent=2)
+    return manifest
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="python -m attoscience_studio.benchmarks.octopus_synth",
+                                     description="Write synthetic Octopus output files for load testing.")
+    parser.add_argument("out_dir", help="Output directory.")
+    parser.add_argument("--samples", type=int, default=10**5, help="Number of time samples.")
+    parser.add_argument("--kpoints", type=int, default=784, help="Number of k-points per plane.")
+    parser.add_argument("--frames", type=int, default=4, help="Number of td.* frames.")
+    parser.add_argument("--bands", type=int, default=20, help="Number of bands.")
+    parser.add_argument("--lambda0", type=float, default=800.0, help="Driving wavelength [nm].")
+    args = parser.parse_args(argv)
+
+    generate_dataset(args.out_dir, args.samples, args.kpoints, args.frames, args.bands, args.lambda0)
+    print(f">>> Synthetic Octopus output written to: {args.out_dir}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
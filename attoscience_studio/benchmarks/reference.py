@@ -0,0 +1,200 @@
+# benchmarks/reference.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+from scipy.signal import fftconvolve
+from scipy.interpolate import griddata
+#--------------------------------
+from attoscience_studio.utils.window_func import TotalCurrentFilter
+from attoscience_studio.utils import window_func_ATTO
+from attoscience_studio.helper_functions.constants import PhysicalConstants
+c_au = PhysicalConstants.c_au
+##----------------------------------------------------
+# Frozen, Qt-free copies of the original numerical cores. They are the ground
+# truth of the equivalence harness and must not be optimised: any faster path
+# is checked against these loops, not against itself.
+##----------------------------------------------------
+def filter_params(filtering, window_func):
+    EoP = 1.0 - filtering/100
+    filter_method = window_func[0]
+    WF_param = window_func[1]
+    exponent = 0.0
+    sigma = 0.0
+    decay_rate = 0.0
+    if filter_method=="cosine":
+        exponent = WF_param
+    elif filter_method=="Gaussian":
+        sigma = WF_param
+    elif filter_method=="Exponential Decay":
+        decay_rate = WF_param
+    return dict(method=filter_method, EoP=EoP, exponent=exponent, sigma=sigma, decay_rate=decay_rate)
+
+##----------------------------------------------------
+def spectrum_reference(lambda0_nm, q_value, filtering, window_func, time_derivative, file_path):
+    # calculate_spectrum(): trapezoid DFT of the (derivative of the) filtered current
+    data = np.loadtxt(file_path)
+    w0 = 45.5633 / lambda0_nm
+    t  = data[:, 1]
+    jx = data[:, 2] - data[0, 2]
+    jy = data[:, 3] - data[0, 3]
+    hx, hy = TotalCurrentFilter(**filter_params(filtering, window_func)).apply_filter(t, jx, jy)
+    if time_derivative == 'True':
+        dhx = np.gradient(hx, t)
+        dhy = np.gradient(hy, t)
+    else:
+        dhx = hx
+        dhy = hy
+    dw = 0.001
+    w = np.arange(0, q_value * w0 + dw, dw)
+    Dx = np.zeros(len(w), dtype=np.complex128)
+    Dy = np.zeros(len(w), dtype=np.complex128)
+    for m in range(len(w)):
+        Dx[m] = np.trapz(np.exp(1j * w[m] * t) * dhx, t)
+        Dy[m] = np.trapz(np.exp(1j * w[m] * t) * dhy, t)
+    return w, Dx, Dy
+
+##----------------------------------------------------
+def attosecond_reference(lambda0_nm, qstart, qmax, filtering, attosecond_method, window_func, file_path):
+    # attosecond_pulses(): band-pass by forward trapezoid DFT, then inverse DFT per time sample
+    data = np.loadtxt(file_path)
+    w0 = 45.5633 / lambda0_nm
+    dw = 0.01
+    w = w0 * np.arange(qstart, qmax + dw, dw)
+    t = data[:, 1]
+    dt = t[1] - t[0]
+    jx = data[:, 2] - data[0, 2]
+    jy = data[:, 3] - data[0, 3]
+    djx = np.gradient(jx) / dt; djx -= djx[0]
+    djy = np.gradient(jy) / dt; djy -= djy[0]
+    filter_obj = window_func_ATTO.TotalCurrentFilter(**filter_params(filtering, window_func))
+    hx, hy, dhx, dhy = filter_obj.apply_filter(t, jx, jy, djx, djy)
+
+    ax = np.zeros(len(w), dtype=complex)
+    ay = np.zeros(len(w), dtype=complex)
+    for l in range(len(w)):
+        if attosecond_method == 'Method 1':
+            ax[l] = np.trapz(hx * np.exp(-1j * w[l] * t), t)
+            ay[l] = np.trapz(hy * np.exp(-1j * w[l] * t), t)
+        else:
+            ax[l] = w[l] * np.trapz(dhx * np.exp(-1j * w[l] * t), t)
+            ay[l] = w[l] * np.trapz(dhy * np.exp(-1j * w[l] * t), t)
+
+    Ix = np.zeros(len(t), dtype=complex)
+    Iy = np.zeros(len(t), dtype=complex)
+    for j in range(len(t)):
+        Ix[j] = np.trapz(ax * np.exp(1j * w * t[j]), w)
+        Iy[j] = np.trapz(ay * np.exp(1j * w * t[j]), w)
+    Ix = np.abs(Ix)**2
+    Iy = np.abs(Iy)**2
+    I = np.abs(Ix + Iy)**2
+    return I, Ix, Iy
+
+##----------------------------------------------------
+def mpw_reference(t, dt, jx, jy, lambda0_nm, qstart, qmax):
+    # find_MPW_core(): serial scan over all (qstart, qmax) windows, Method 2 without filtering
+    w0 = 45.5633 / lambda0_nm
+    T = 2 * np.pi / w0
+    dw = 0.1
+    Time_OC = t / T
+
+    results = []
+    for qstart_inner in range(int(qstart), int(qmax - 1)):
+        for qmax_inner in range(int(qstart_inner + 1), int(qmax + 1)):
+            w = w0 * np.arange(qstart_inner, qmax_inner + dw, dw)
+            ajx = np.array([w[l] * np.trapz(jx * np.exp(-1j * w[l] * t), t) for l in range(len(w))])
+            ajy = np.array([w[l] * np.trapz(jy * np.exp(-1j * w[l] * t), t) for l in range(len(w))])
+            Ix = np.array([np.trapz(ajx * np.exp(1j * w * tj), w) for tj in t])
+            Iy = np.array([np.trapz(ajy * np.exp(1j * w * tj), w) for tj in t])
+            I = np.abs(np.abs(Ix)**2 + np.abs(Iy)**2)**2
+
+            idx = np.argmax(I)
+            half = I[idx] / 2
+            left = np.where(I[:idx] <= half)[0]
+            right = np.where(I[idx:] <= half)[0]
+            left_idx = left[-1] if left.size > 0 else 0
+            right_idx = right[0] + idx if right.size > 0 else len(I) - 1
+            FWHM_as = (Time_OC[right_idx] - Time_OC[left_idx]) * T * 2.4188843265857e-17 * 1e18
+            results.append((FWHM_as, Time_OC[idx], qstart_inner, qmax_inner))
+
+    min_FWHM, OC, optimal_qstart, optimal_qmax = min(results, key=lambda x: x[0])
+    return min_FWHM, optimal_qstart, optimal_qmax, OC
+
+##----------------------------------------------------
+def gtf_reference(t, dt, hx, hy, w, sigma_gabor):
+    # GTF_core(): Gaussian-windowed transform, one convolution per frequency
+    half_kernel = int(np.ceil(6 * sigma_gabor / dt))
+    tau = np.arange(-half_kernel, half_kernel + 1) * dt
+    kernel = np.exp(-0.5 * tau**2 / sigma_gabor**2)
+    Ax = np.zeros((len(t), len(w)), dtype=complex)
+    Ay = np.zeros((len(t), len(w)), dtype=complex)
+    for iw, w_i in enumerate(w):
+        Ax[:, iw] = fftconvolve(hx * np.exp(-1j * w_i * t), kernel, mode='same') * dt
+        Ay[:, iw] = fftconvolve(hy * np.exp(-1j * w_i * t), kernel, mode='same') * dt
+    return Ax, Ay
+
+##----------------------------------------------------
+def kgrid_reference(file_path, x_grid, y_grid):
+    # CurrentNexAnalysisThread.load_and_interpolate_data_nex(): cubic griddata, NaN -> 0
+    raw = np.loadtxt(file_path, skiprows=1)
+    values = griddata(points=(raw[:, 0], raw[:, 1]), values=raw[:, 2], xi=(x_grid, y_grid), method='cubic')
+    return np.nan_to_num(values, nan=0.0)
+
+##----------------------------------------------------
+def _pg_pulses(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, delay, envelope_name):
+    # Per-sample envelope lambdas of polarization_gating()/gate_width()
+    w01 = 0.045563 / (lambda1_nm * 1.0e-3)
+    w02 = 0.045563 / (lambda2_nm * 1.0e-3)
+    T01 = 2 * np.pi / w01; T02 = 2 * np.pi / w02
+    A01 = np.sqrt(intensity1 * 1.0e12) / np.sqrt(3.509470 * 1.0e16) * c_au / w01
+    A02 = np.sqrt(intensity2 * 1.0e12) / np.sqrt(3.509470 * 1.0e16) * c_au / w02
+    Ttot1 = cycles1 * T01; Ttot2 = cycles2 * T02
+    Tst1 = 0 * T01
+    Tst2 = Tst1 + (Ttot1 / 2) + delay * T01 - (Ttot2 / 2)
+    Tend1 = Tst1 + Ttot1; Tend2 = Tst2 + Ttot2
+    tm1 = Tst1 + Ttot1 / 2; tm2 = Tst2 + Ttot2 / 2
+    heaviside = lambda x: 1.0 * (x >= 0)
+    if envelope_name == 'Sine_square':
+        env1 = lambda t: A01 * np.sin(np.pi * (t - Tst1) / Ttot1)**2 * heaviside(Tend1 - t) * heaviside(t - Tst1)
+        env2 = lambda t: A02 * np.sin(np.pi * (t - Tst2) / Ttot2)**2 * heaviside(Tend2 - t) * heaviside(t - Tst2)
+    else:
+        env1 = lambda t: A01 * np.exp(-2 * np.log(2) * ((t - tm1) / (Ttot1 / 2))**2)
+        env2 = lambda t: A02 * np.exp(-2 * np.log(2) * ((t - tm2) / (Ttot2 / 2))**2)
+    return w01, w02, T01, T02, Ttot1, Ttot2, Tend2, env1, env2
+
+def polarization_gating_reference(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2,
+                                  alpha1, alpha2, cep1, cep2, delay, envelope_name, time_step):
+    w01, w02, T01, T02, Ttot1, Ttot2, Tend2, env1, env2 = _pg_pulses(
+        lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, delay, envelope_name)
+    a1 = alpha1 * np.pi / 180; a2 = alpha2 * np.pi / 180
+    t = np.arange(0, Tend2 + time_step, time_step)
+    Ax1 = lambda t: np.real((np.cos(a1) + 1j * eps1 * np.sin(a1)) * np.exp(1j * w01 * (t - Ttot1 / 2) + cep1) * env1(t))
+    Ax2 = lambda t: np.real((np.cos(a2) + 1j * eps2 * np.sin(a2)) * np.exp(1j * w02 * (t - Ttot2 / 2) + cep2) * env2(t))
+    Ay1 = lambda t: np.real((np.sin(a1) - 1j * eps1 * np.cos(a1)) * np.exp(1j * w01 * (t - Ttot1 / 2) + cep1) * env1(t))
+    Ay2 = lambda t: np.real((np.sin(a2) - 1j * eps2 * np.cos(a2)) * np.exp(1j * w02 * (t - Ttot2 / 2) + cep2) * env2(t))
+    At_x = np.array([Ax1(ti) for ti in t]) + np.array([Ax2(ti) for ti in t])
+    At_y = np.array([Ay1(ti) for ti in t]) + np.array([Ay2(ti) for ti in t])
+    envelope1 = np.array([env1(ti) for ti in t])
+    envelope2 = np.array([env2(ti) for ti in t])
+    return t, At_x, At_y, envelope1, envelope2
+
+def gate_width_reference(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, delay, envelope_name, time_step):
+    w01, w02, T01, T02, Ttot1, Ttot2, Tend2, env1, env2 = _pg_pulses(
+        lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, delay, envelope_name)
+    t = np.arange(0, Tend2 + time_step, time_step)
+    return t, np.array([(env1(ti) - env2(ti)) / (env1(ti) + env2(ti)) for ti in t])
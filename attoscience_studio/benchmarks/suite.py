@@ -0,0 +1,382 @@
+# benchmarks/suite.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import os, sys
+import json
+import time
+import shutil
+import argparse
+import platform
+import tempfile
+from datetime import datetime
+import numpy as np
+import psutil
+#--------------------------------
+from attoscience_studio.utils.profiler import PeakMemorySampler
+from attoscience_studio.high_harmonic.hhg_spectrum import calculate_spectrum
+from attoscience_studio.high_harmonic.hhg_yield import calcu_YIELD
+from attoscience_studio.attosecond_pulse.atto_pulse import attosecond_pulses
+from attoscience_studio.attosecond_pulse.find_MPW import find_MPW_core
+from attoscience_studio.attosecond_pulse.gtf import GTF_core
+from attoscience_studio.attosecond_pulse.tf_engine import gabor_sweep, morlet_transform
+from attoscience_studio.pg_analyzing.pg import polarization_gating
+from attoscience_studio.pg_analyzing.gw import gate_width
+from attoscience_studio.electron_dynamics.nex_anim import CurrentNexAnalysisThread
+from attoscience_studio.benchmarks.octopus_synth import write_total_current, write_kpoint_frames
+from attoscience_studio.benchmarks.equivalence import run_equivalence
+##----------------------------------------------------
+# Synthetic sizes: number of time samples ("time") or k-points ("kpoints")
+SIZE_PRESETS = {
+    "quick":    {"time": [10**3, 10**4],               "kpoints": [10**2, 10**3]},
+    "standard": {"time": [10**3, 10**4, 10**5],        "kpoints": [10**2, 10**3, 10**4]},
+    "full":     {"time": [10**3, 10**4, 10**5, 10**6], "kpoints": [10**2, 10**3, 10**4]},
+}
+TEST_DATA = "test_data"
+# Relative to the working directory, not the (possibly read-only) installed package
+DEFAULT_BASELINE = "benchmark_baseline.json"
+DEFAULT_TEST_DATA_DIR = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), "test_data")
+
+LAMBDA0_NM = 800.0
+WINDOW_FUNC = ["Gaussian", 200.0]
+FILTERING = 10
+##----------------------------------------------------
+class BenchmarkInputs:
+    """
+    Builds (and caches) the inputs for every size, either synthetic files in a
+    scratch directory or the shipped test_data samples.
+    """
+    def __init__(self, work_dir, test_data_dir=None):
+        self.work_dir = work_dir
+        self.test_data_dir = test_data_dir
+        self.content = {}
+        self._arrays = {}
+
+    def current_file(self, size):
+        if size == TEST_DATA:
+            return os.path.join(self.test_data_dir, "total_current")
+        file_path = os.path.join(self.work_dir, f"total_current_{size}")
+        if not os.path.exists(file_path):
+            self.content[size] = write_total_current(file_path, size, lambda0_nm=LAMBDA0_NM)
+        return file_path
+
+    def current_arrays(self, size):
+        if size not in self._arrays:
+            data = np.loadtxt(self.current_file(size))
+            t = data[:, 1]
+            jx = data[:, 2] - data[0, 2]
+            jy = data[:, 3] - data[0, 3]
+            self._arrays[size] = (t, t[1] - t[0], jx, jy)
+        return self._arrays[size]
+
+    def kpoint_frames(self, size):
+        if size == TEST_DATA:
+            return [self.test_data_dir]
+        base_dir = os.path.join(self.work_dir, f"kpoints_{size}")
+        if not os.path.isdir(base_dir):
+            return write_kpoint_frames(base_dir, size, n_frames=2)
+        return sorted(os.path.join(base_dir, name) for name in os.listdir(base_dir) if name.startswith("td."))
+
+##----------------------------------------------------
+class BenchmarkCase:
+    def __init__(self, name, axis, setup, run, uses_test_data=True, check=None):
+        self.name = name
+        self.axis = axis
+        self.setup = setup
+        self.run = run
+        self.uses_test_data = uses_test_data
+        self.check = check
+
+def _pg_time_step(size, cycles1, cycles2, delay, lambda1_nm, lambda2_nm):
+    # Same pulse timing as polarization_gating()/gate_width(), so `size` maps to len(t)
+    T01 = 2 * np.pi / (0.045563 / (lambda1_nm * 1.0e-3))
+    T02 = 2 * np.pi / (0.045563 / (lambda2_nm * 1.0e-3))
+    Tend2 = cycles1 * T01 / 2 + delay * T01 + cycles2 * T02 / 2
+    return Tend2 / size
+
+#----
+def _setup_spectrum(inputs, size):
+    return dict(lambda0_nm=LAMBDA0_NM, q_value=25, filtering=FILTERING, window_func=WINDOW_FUNC,
+                time_derivative='True', file_path=inputs.current_file(size))
+
+def _check_spectrum(inputs, size, result):
+    # Distance (in harmonic orders) of each spectral peak from the generator's harmonics
+    content = inputs.content.get(size)
+    if content is None:
+        return {}
+    w, Sx, Sy, SS, w0 = result[:5]
+    errors = []
+    for q in content["orders"]:
+        band = (w >= (q - 0.5) * w0) & (w <= (q + 0.5) * w0)
+        if q + 0.5 <= w[-1] / w0 and band.any():
+            errors.append(abs(w[band][np.argmax(Sx[band])] / w0 - q))
+    return {"harmonic_peak_error": max(errors)} if errors else {}
+
+def _setup_yield(inputs, size):
+    t, dt, jx, jy = inputs.current_arrays(size)
+    return dict(t=t, jx=jx, jy=jy, lambda0_nm=LAMBDA0_NM, filtering=FILTERING, qstart=11, qend=25,
+                time_derivative='True', selected_yields=['total', 'x', 'y'], window_func=WINDOW_FUNC)
+
+def _setup_atto(method):
+    def setup(inputs, size):
+        return dict(lambda0_nm=LAMBDA0_NM, qstart=11, qmax=21, filtering=FILTERING, attosecond_method=method,
+                    window_func=WINDOW_FUNC, file_path=inputs.current_file(size))
+    return setup
+
+def _setup_mpw(inputs, size):
+    t, dt, jx, jy = inputs.current_arrays(size)
+    return dict(t=t, dt=dt, jx=jx, jy=jy, lambda0_nm=LAMBDA0_NM, qstart=11, qmax=15)
+
+def _setup_gtf(inputs, size):
+    t, dt, jx, jy = inputs.current_arrays(size)
+    w0 = 45.563 / LAMBDA0_NM
+    T0 = 2 * np.pi / w0
+    w = np.arange(11 * w0, 25 * w0 + w0 / 2, w0 / 2)
+    return dict(t=t, dt=dt, hx=jx, hy=jy, w=w, sigma_gabor=T0 / 3)
+
+def _setup_gabor_sweep(inputs, size):
+    kwargs = _setup_gtf(inputs, size)
+    T0 = kwargs.pop("sigma_gabor") * 3
+    return dict(kwargs, T0=T0, g_factors=[1, 2, 3, 5, 8])
+
+def _setup_morlet(inputs, size):
+    kwargs = _setup_gtf(inputs, size)
+    kwargs.pop("sigma_gabor")
+    return dict(kwargs, omega_c=6.0)
+
+PG_PARAMS = dict(lambda1_nm=800.0, lambda2_nm=800.0, intensity1=100.0, intensity2=100.0, cycles1=5, cycles2=5, delay=1.5)
+
+def _setup_pg(inputs, size):
+    p = PG_PARAMS
+    time_step = _pg_time_step(size, p["cycles1"], p["cycles2"], p["delay"], p["lambda1_nm"], p["lambda2_nm"])
+    return dict(p, eps1=1.0, eps2=-1.0, alpha1=0.0, alpha2=0.0, cep1=0.0, cep2=0.0,
+                envelope_name='Sine_square', time_step=time_step, extract_data_option='False')
+
+def _setup_gw(inputs, size):
+    p = PG_PARAMS
+    time_step = _pg_time_step(size, p["cycles1"], p["cycles2"], p["delay"], p["lambda1_nm"], p["lambda2_nm"])
+    return dict(p, eps1=1.0, eps2=-1.0, envelope_name='Sine_square', time_step=time_step)
+
+def _setup_nex_anim(inputs, size):
+    return dict(frame_dirs=inputs.kpoint_frames(size), A=100, num_interpolated_frames=10)
+
+def nex_anim_interpolation(frame_dirs, A, num_interpolated_frames):
+    # Per-frame load + cubic griddata and the linear frame blending of CurrentNexAnalysisThread
+    thread = CurrentNexAnalysisThread({})
+    kpt_data = np.loadtxt(os.path.join(frame_dirs[0], "current_kpt-x.kz=0"), skiprows=1)
+    x_grid, y_grid = np.meshgrid(np.linspace(np.min(kpt_data[:, 0]), np.max(kpt_data[:, 0]), A),
+                                 np.linspace(np.min(kpt_data[:, 1]), np.max(kpt_data[:, 1]), A))
+    arrays_curr = []
+    arrays_nex = []
+    for frame_dir in frame_dirs:
+        arrays_curr.append(thread.load_and_interpolate_data_curr(
+            os.path.join(frame_dir, "current_kpt-x.kz=0"), os.path.join(frame_dir, "current_kpt-y.kz=0"), x_grid, y_grid))
+        arrays_nex.append(thread.load_and_interpolate_data_nex(
+            os.path.join(frame_dir, "n_excited_el_kpt.kz=0"), x_grid, y_grid))
+    smooth_frames_curr = thread.interpolate_frames(arrays_curr, num_interpolated_frames)
+    smooth_frames_nex = thread.interpolate_frames(arrays_nex, num_interpolated_frames)
+    return smooth_frames_curr, smooth_frames_nex
+
+BENCHMARK_CASES = [
+    BenchmarkCase("calculate_spectrum", "time", _setup_spectrum, calculate_spectrum, check=_check_spectrum),
+    BenchmarkCase("calcu_YIELD", "time", _setup_yield, calcu_YIELD),
+    BenchmarkCase("attosecond_pulses[Method 1]", "time", _setup_atto('Method 1'), attosecond_pulses),
+    BenchmarkCase("attosecond_pulses[Method 2]", "time", _setup_atto('Method 2'), attosecond_pulses),
+    BenchmarkCase("find_MPW_core", "time", _setup_mpw, find_MPW_core),
+    BenchmarkCase("GTF_core", "time", _setup_gtf, GTF_core),
+    BenchmarkCase("gabor_sweep", "time", _setup_gabor_sweep, gabor_sweep),
+    BenchmarkCase("morlet_transform", "time", _setup_morlet, morlet_transform),
+    BenchmarkCase("polarization_gating", "time", _setup_pg, polarization_gating, uses_test_data=False),
+    BenchmarkCase("gate_width", "time", _setup_gw, gate_width, uses_test_data=False),
+    BenchmarkCase("nex_anim_interpolation", "kpoints", _setup_nex_anim, nex_anim_interpolation),
+]
+
+##----------------------------------------------------
+def time_case(case, kwargs, repeat):
+    durations = []
+    peak_delta = 0.0
+    process = psutil.Process(os.getpid())
+    for _ in range(repeat):
+        sampler = PeakMemorySampler(process)
+        sampler.start()
+        start = time.perf_counter()
+        with np.errstate(all='ignore'):
+            result = case.run(**kwargs)
+        durations.append(time.perf_counter() - start)
+        start_rss, peak_rss = sampler.stop()
+        peak_delta = max(peak_delta, (peak_rss - start_rss) / 1024**2)
+    return {
+        "best_s": min(durations),
+        "median_s": float(np.median(durations)),
+        "repeats": repeat,
+        "peak_delta_mb": peak_delta,
+    }, result
+
+def run_suite(preset="quick", case_names=None, repeat=3, max_seconds=120.0, test_data_dir=None, log=print):
+    sizes = SIZE_PRESETS[preset]
+    cases = [case for case in BENCHMARK_CASES if not case_names or case.name in case_names]
+    work_dir = tempfile.mkdtemp(prefix="attoscience_bench_")
+    inputs = BenchmarkInputs(work_dir, test_data_dir)
+    results = []
+    try:
+        for case in cases:
+            case_sizes = list(sizes[case.axis])
+            if test_data_dir and case.uses_test_data:
+                case_sizes = [TEST_DATA] + case_sizes
+            last = None
+            for size in case_sizes:
+                entry = {"case": case.name, "axis": case.axis, "size": size}
+                # Skip sizes whose linear extrapolation from the previous size exceeds the budget
+                if last is not None and size != TEST_DATA and last[0] != TEST_DATA:
+                    estimate = last[1] * size / last[0]
+                    if estimate > max_seconds:
+                        entry.update(status="skipped", reason=f"estimated {estimate:.1f} s > budget {max_seconds:.0f} s")
+                        results.append(entry)
+                        log(f"  {case.name:<30} {str(size):>10}   skipped ({entry['reason']})")
+                        continue
+                try:
+                    kwargs = case.setup(inputs, size)
+                    # Expensive sizes are run once, cheap ones repeatedly
+                    n_repeat = 1 if last is not None and last[1] * repeat > max_seconds / 4 else repeat
+                    timing, result = time_case(case, kwargs, n_repeat)
+                    entry.update(timing)
+                    if case.check is not None:
+                        entry.update(case.check(inputs, size, result))
+                    entry["status"] = "ok"
+                    last = (size, entry["best_s"])
+                    checks = "".join(f", {key}={entry[key]:.3g}" for key in entry if key.endswith("_error"))
+                    log(f"  {case.name:<30} {str(size):>10}   {entry['best_s']:10.4f} s   (x{n_repeat}, +{entry['peak_delta_mb']:.1f} MB{checks})")
+                except Exception as e:
+                    entry.update(status="error", reason=str(e))
+                    log(f"  {case.name:<30} {str(size):>10}   error: {e}")
+                results.append(entry)
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    return {
+        "meta": {
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "preset": preset,
+            "platform": platform.platform(),
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "cpu_count": psutil.cpu_count(),
+        },
+        "results": results,
+    }
+
+##----------------------------------------------------
+def compare_to_baseline(report, baseline, tolerance=0.25):
+    reference = {(r["case"], str(r["size"])): r for r in baseline.get("results", []) if r.get("status") == "ok"}
+    rows = []
+    for entry in report["results"]:
+        if entry.get("status") != "ok":
+            continue
+        base = reference.get((entry["case"], str(entry["size"])))
+        if base is None:
+            continue
+        ratio = entry["best_s"] / base["best_s"] if base["best_s"] > 0 else float("inf")
+        if ratio > 1 + tolerance:
+            verdict = "regression"
+        elif ratio < 1 / (1 + tolerance):
+            verdict = "improved"
+        else:
+            verdict = "unchanged"
+        rows.append({"case": entry["case"], "size": entry["size"], "baseline_s": base["best_s"],
+                     "current_s": entry["best_s"], "ratio": ratio, "verdict": verdict})
+    return rows
+
+def load_json(file_path):
+    with open(file_path) as f:
+        return json.load(f)
+
+def save_json(data, file_path):
+    with open(file_path, "w") as f:
+        json.dump(data, f, indent=2)
+
+##----------------------------------------------------
+def build_parser():
+    parser = argparse.ArgumentParser(prog="python -m attoscience_studio.benchmarks",
+                                     description="Benchmark the numerical cores of Attoscience Studio.")
+    parser.add_argument("--preset", choices=sorted(SIZE_PRESETS), default="quick", help="Synthetic size preset.")
+    parser.add_argument("--cases", nargs="+", metavar="NAME", help="Run only these cases (see --list).")
+    parser.add_argument("--list", action="store_true", help="List the available cases and exit.")
+    parser.add_argument("--repeat", type=int, default=3, help="Repetitions per size; the best time is reported.")
+    parser.add_argument("--max-seconds", type=float, default=120.0, help="Per-run time budget used to skip larger sizes.")
+    parser.add_argument("--test-data", nargs="?", const=DEFAULT_TEST_DATA_DIR, default=None, metavar="DIR",
+                        help="Also run the cores on the shipped test_data samples.")
+    parser.add_argument("--output", metavar="FILE", help="Write the results as JSON.")
+    parser.add_argument("--compare", nargs="?", const=DEFAULT_BASELINE, default=None, metavar="FILE",
+                        help="Compare against a stored baseline.")
+    parser.add_argument("--save-baseline", nargs="?", const=DEFAULT_BASELINE, default=None, metavar="FILE",
+                        help="Store the results as the new baseline.")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Relative slowdown reported as a regression.")
+    parser.add_argument("--fail-on-regression", action="store_true", help="Exit with status 1 if a regression is found.")
+    parser.add_argument("--check-equivalence", action="store_true",
+                        help="Also check the engines against the reference implementations (fails on mismatch).")
+    parser.add_argument("--snapshot", metavar="FILE", help="Reference snapshot (.npz) used by --check-equivalence.")
+    return parser
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+
+    if args.list:
+        for case in BENCHMARK_CASES:
+            print(f"{case.name:<30} [{case.axis}]")
+        return 0
+
+    unknown = set(args.cases or []) - {case.name for case in BENCHMARK_CASES}
+    if unknown:
+        print(f"Unknown benchmark case(s): {', '.join(sorted(unknown))}", file=sys.stderr)
+        return 2
+    if args.test_data and not os.path.isdir(args.test_data):
+        print(f"test_data directory not found: {args.test_data}", file=sys.stderr)
+        return 2
+
+    print(f">>> Running '{args.preset}' benchmarks")
+    report = run_suite(args.preset, args.cases, args.repeat, args.max_seconds, args.test_data)
+
+    if args.output:
+        save_json(report, args.output)
+        print(f">>> Results written to: {args.output}")
+
+    status = 0
+    if args.compare:
+        if not os.path.exists(args.compare):
+            print(f">>> No baseline found at {args.compare}; run with --save-baseline first.")
+        else:
+            rows = compare_to_baseline(report, load_json(args.compare), args.tolerance)
+            print(">>> Comparison against baseline:")
+            for row in rows:
+                print(f"  {row['case']:<30} {str(row['size']):>10}   {row['baseline_s']:10.4f} s -> {row['current_s']:10.4f} s"
+                      f"   x{row['ratio']:.2f}  {row['verdict']}")
+            if args.fail_on_regression and any(row["verdict"] == "regression" for row in rows):
+                status = 1
+
+    if args.check_equivalence:
+        print(">>> Checking numerical equivalence")
+        report["equivalence"] = run_equivalence(test_data_dir=args.test_data, snapshot=args.snapshot)
+        if any(row["status"] != "pass" for row in report["equivalence"]):
+            status = 1
+        if args.output:
+            save_json(report, args.output)
+
+    if args.save_baseline:
+        save_json(report, args.save_baseline)
+        print(f">>> Baseline saved to: {args.save_baseline}")
+    return status
@@ -19,13 +19,13 @@
 
 import os, sys
 import math
+import tempfile
 import time
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 from matplotlib import gridspec
 from mpl_toolkits.mplot3d import Axes3D
-from scipy.interpolate import griddata
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QFileDialog, QDialog, QFormLayout, QProgressBar, QStyle,
                              QRadioButton, QButtonGroup, QScrollArea, QColorDialog, QLineEdit, QMessageBox,
                              QPushButton, QVBoxLayout, QHBoxLayout, QGroupBox, QGridLayout, QSplashScreen, QDoubleSpinBox,
@@ -37,6 +37,12 @@ from PyQt5.QtCore import Qt, QSize, QTimer, QEvent, QCoreApplication, QPropertyA
 from datetime import datetime
 from qtconsole.rich_jupyter_widget import RichJupyterWidget
 from attoscience_studio.resources_rc import *
+from attoscience_studio.utils.profiler import profile_stage
+from attoscience_studio.electron_dynamics.bz_symmetry import unfold_from_parser_log, symmetry_warning
+from attoscience_studio.electron_dynamics.bz_geometry import lattice_from_file, plane_zone, zone_points, zone_grid
+from attoscience_studio.electron_dynamics.grid_backends import interpolate_to_grid, INTERP_METHODS
+from attoscience_studio.electron_dynamics.k_spectra import (load_current_cube, k_harmonic_spectra, save_k_spectra,
+                                                            format_k_spectra, plot_k_spectra)
 ##----------------------------------------------------
 def read_bznex(file_path, file_format):
     try:
@@ -64,25 +70,30 @@ def read_bznex(file_path, file_format):
     except Exception as e:
         raise ValueError(f"Failed to read current data file: {e}")
 ##----------------------------------------------------
-def grid_interp(ki, kj, mag_curr, A, interp_method):
+def grid_interp(ki, kj, mag_curr, A, interp_method, zone=None):
+    # Returns the interpolated grid and the backend used ('auto' resolves to one)
     try:
-        i_grid = np.linspace(np.min(ki), np.max(ki), A)
-        j_grid = np.linspace(np.min(kj), np.max(kj), A)
-        i_grid, j_grid = np.meshgrid(i_grid, j_grid)
-    
-        # Interpolate
-        nex_interp = griddata((ki, kj), mag_curr, (i_grid, j_grid), method=interp_method)
+        if zone is None:
+            i_grid = np.linspace(np.min(ki), np.max(ki), A)
+            j_grid = np.linspace(np.min(kj), np.max(kj), A)
+            i_grid, j_grid = np.meshgrid(i_grid, j_grid)
+            inside = None
+        else:
+            # Only the grid points inside the first BZ are interpolated
+            i_grid, j_grid, inside = zone_grid(zone, A)
+
+        curr_interp, backend = interpolate_to_grid(ki, kj, mag_curr, i_grid, j_grid, interp_method, inside)
     
     except Exception as e:   
         raise RuntimeError(f"Grid interpolation failed with method='{interp_method}': {e}") from e
     
-    return nex_interp
+    return curr_interp, backend
 ##----------------------------------------------------
 def print_to_console(console: RichJupyterWidget, msg: str):
     if hasattr(console, "_kernel_client"):
         console._kernel_client.execute(f"print('''{msg}''')")
 
-def bzcurr_connector(A, interp_method, file_format, plot_settings, ipy_console=None):
+def bzcurr_connector(A, interp_method, file_format, plot_settings, ipy_console=None, unfold_option=False, bz_option=False):
     file_path = []
     if 'plane_x' in file_format:
         file_path_y, _ = QFileDialog.getOpenFileName(None, "Select 'current_kpt-y.kx=0' file")
@@ -118,13 +129,42 @@ def bzcurr_connector(A, interp_method, file_format, plot_settings, ipy_console=N
         QMessageBox.warning(None, "File Error", "Please upload the 'current_kpt-z.kx=0' or 'current_kpt-z.ky=0' or 'current_kpt-y.kz=0' file.")
         return
 
+    parser_log = None
+    if unfold_option:
+        parser_log, _ = QFileDialog.getOpenFileName(None, "Select the 'parser.log' file of the run")
+        if "parser.log" not in parser_log.lower():
+            QMessageBox.warning(None, "File Error", "Please upload the 'parser.log' file.")
+            return
+    elif bz_option:
+        # The zone only needs the lattice, which a CIF file also provides
+        parser_log, _ = QFileDialog.getOpenFileName(None, "Select the 'parser.log' file of the run (or the CIF file of the crystal)")
+        if "parser.log" not in parser_log.lower() and not parser_log.lower().endswith(".cif"):
+            QMessageBox.warning(None, "File Error", "Please upload the 'parser.log' or '.cif' file.")
+            return
+
     if file_path:
         try:
-            ki, kj, mag_curr = read_bznex(file_path, file_format)
-
-            curr_interp = grid_interp(ki, kj, mag_curr, A, interp_method)
+            with profile_stage("BZ current", "load"):
+                ki, kj, mag_curr = read_bznex(file_path, file_format)
+
+            with profile_stage("BZ current", "transform"):
+                n_read, unfold_msg = len(ki), ""
+                if unfold_option:
+                    # Full zone from the irreducible k-points before the single interpolation
+                    ki, kj, mag_curr, n_ops, mismatch = unfold_from_parser_log(parser_log, ki, kj, mag_curr, file_format[0])
+                    unfold_msg = (f">>> Unfolded with {n_ops} symmetry operations: {n_read} -> {len(ki)} k-points\n"
+                                  + symmetry_warning(mismatch))
+                zone = None
+                if bz_option:
+                    vectors, zone = plane_zone(lattice_from_file(parser_log), file_format[0])
+                    ki, kj, mag_curr = zone_points(ki, kj, mag_curr, vectors, zone)
+                    unfold_msg += f">>> Folded into the first BZ ({len(zone)} vertices)\n"
+                    if parser_log.lower().endswith(".cif"):
+                        unfold_msg += ">>> Zone from the CIF cell in the standard orientation (a along x)\n"
+                curr_interp, backend = grid_interp(ki, kj, mag_curr, A, interp_method, zone)
             
-            bzcurr_plot(ki, kj, curr_interp, plot_settings)
+            with profile_stage("BZ current", "plot"):
+                bzcurr_plot(ki, kj, curr_interp, plot_settings, zone)
    
             timestamp = datetime.now().strftime("[%H:%M:%S]")
             msg = (
@@ -135,7 +175,8 @@ def bzcurr_connector(A, interp_method, file_format, plot_settings, ipy_console=N
                 ">>> BZ curr visualization successfully completed!\n"
                 f">>> File loaded from: {file_path}\n"
                 f">>> Grid Resolution: {A}\n"
-                f">>> Interpolation method: {interp_method}\n"
+                f">>> Interpolation method: {interp_method}" + (f" ({backend})" if backend != interp_method else "") + "\n"
+                + unfold_msg
                 + "-" * 75
             )
             print_to_console(ipy_console, msg)
@@ -145,9 +186,54 @@ def bzcurr_connector(A, interp_method, file_format, plot_settings, ipy_console=N
             return
 
 ##----------------------------------------------------
-def bzcurr_plot(ki, kj, curr_interp, plot_settings):
+def kspectra_connector(lambda0_nm, orders, dt, time_derivative, file_format, plot_settings, ipy_console=None):
+    base_dir_iter = QFileDialog.getExistingDirectory(None, "Select the directory with the td.* outputs")
+    if not base_dir_iter:
+        return
+    try:
+        w0 = 45.5633 / lambda0_nm
+        with tempfile.TemporaryDirectory(prefix="k_spectra_") as scratch_dir:
+            with profile_stage("k-resolved spectra", "load"):
+                iterations, ki, kj, J_i, J_j = load_current_cube(base_dir_iter, file_format[0], scratch_dir)
+            t = iterations * dt
+
+            with profile_stage("k-resolved spectra", "transform"):
+                result = k_harmonic_spectra(t, J_i, J_j, w0, orders, time_derivative=time_derivative)
+            # Release the memory maps before the scratch directory is removed
+            del J_i, J_j
+
+        with profile_stage("k-resolved spectra", "post-process"):
+            save_k_spectra(result, ki, kj, lambda0_nm=lambda0_nm, dt=dt, iterations=iterations)
+
+        with profile_stage("k-resolved spectra", "plot"):
+            plot_k_spectra(result, ki, kj, plot_settings)
+
+        timestamp = datetime.now().strftime("[%H:%M:%S]")
+        msg = (
+            f">>> Time                          {timestamp}\n"
+            + "-" * 75 + "\n"
+            + "--                     k-resolved harmonic spectra log!                     --\n"
+            + "-" * 75 + "\n"
+            f">>> Directory: {base_dir_iter}\n"
+            f">>> td.* outputs: {len(iterations)}, k-points: {len(ki)}\n"
+            f">>> Time window [a.u.]: {t[0]:.4f} - {t[-1]:.4f}\n"
+            + format_k_spectra(result, ki, kj)
+            + ">>> Saved to k_harmonic_spectra.npz\n"
+            + "-" * 75
+        )
+        print_to_console(ipy_console, msg)
+
+    except ValueError as e:
+        QMessageBox.warning(None, "Error", str(e))
+        return
+
+##----------------------------------------------------
+def bzcurr_plot(ki, kj, curr_interp, plot_settings, zone=None):
     fig = plt.figure()
-    extent = (np.min(ki), np.max(ki), np.min(kj), np.max(kj))
+    if zone is None:
+        extent = (np.min(ki), np.max(ki), np.min(kj), np.max(kj))
+    else:
+        extent = (np.min(zone[:, 0]), np.max(zone[:, 0]), np.min(zone[:, 1]), np.max(zone[:, 1]))
 
     ax1 = fig.add_subplot(1, 1, 1)
     img1 = ax1.imshow(
@@ -162,6 +248,9 @@ def bzcurr_plot(ki, kj, curr_interp, plot_settings):
     )
     plt.colorbar(img1, ax=ax1, label=plot_settings.get("colorbar_label", 'Current'))
     img1.set_clim(plot_settings.get("clim_min", None), plot_settings.get("clim_max", None))
+    if zone is not None:
+        outline = np.vstack((zone, zone[:1]))
+        ax1.plot(outline[:, 0], outline[:, 1], color=plot_settings.get("zone_color", 'white'), linewidth=1.2)
 
     ax1.set_title(plot_settings.get("graph_title", "Excited electrons"))
     ax1.set_xlabel(plot_settings.get("x_label", r'$\mathregular{K_x\ [2\pi/a]}$'))
@@ -310,6 +399,7 @@ class ModernDialog(QDialog):
         content_layout = QVBoxLayout(content_widget)
         
         self.create_required_section(content_layout)
+        self.create_kspectra_section(content_layout)
         self.create_optional_section(content_layout)
         
         scroll_area.setWidget(content_widget)
@@ -384,7 +474,7 @@ class ModernDialog(QDialog):
         interp_method_layout = QVBoxLayout()
         interp_method_label = QLabel("Interpolation Method:")
         self.interp_method_entry = QComboBox()
-        self.interp_method_entry.addItems(["cubic", "linear", "nearest"])
+        self.interp_method_entry.addItems(list(INTERP_METHODS))
         self.interp_method_entry.setStyleSheet("""QComboBox { min-height: 30px; font-size: 12px; }""")
 
         default_interp_method = previous_values_bzcurr.get("interp_method", "cubic").lower()
@@ -423,6 +513,19 @@ class ModernDialog(QDialog):
         combined_layout.addLayout(params_layout)
         combined_layout.addWidget(file_format_group)
 
+        # Symmetry unfolding -----------------------------
+        self.unfold_checkbox = QCheckBox("Unfold reduced k-points with the crystal symmetry (parser.log)")
+        self.unfold_checkbox.setToolTip("Rebuild the full zone from an irreducible k-point set before interpolating.\n"
+                                         "Only valid for data with the crystal symmetry (ground-state-like); laser-driven\n"
+                                         "data breaks it, and a warning is printed when equivalent k-points differ.")
+        self.unfold_checkbox.setChecked(previous_values_bzcurr.get("unfold", False))
+        combined_layout.addWidget(self.unfold_checkbox)
+
+        self.zone_checkbox = QCheckBox("Fold into the first Brillouin zone and draw its outline (parser.log or CIF)")
+        self.zone_checkbox.setToolTip("Interpolate only inside the Wigner-Seitz cell of the reciprocal lattice")
+        self.zone_checkbox.setChecked(previous_values_bzcurr.get("zone", False))
+        combined_layout.addWidget(self.zone_checkbox)
+
         params_group.setLayout(combined_layout)
         layout.addWidget(params_group)
 
@@ -434,6 +537,40 @@ class ModernDialog(QDialog):
                     checkbox.setChecked(False)         
     ##----------------------------------------
     
+    def create_kspectra_section(self, layout):
+        self.kspectra_checkbox = QCheckBox("k-resolved Harmonic Spectra (all td.* outputs)")
+        self.kspectra_checkbox.setStyleSheet("font-size: 14px; font-weight: 600; color: #1976d2;")
+        self.kspectra_checkbox.setToolTip("FFT of the k-resolved currents of every td.* output; "
+                                          "shows where in the BZ each harmonic is emitted")
+        layout.addWidget(self.kspectra_checkbox)
+
+        self.kspectra_group = QGroupBox("Harmonic Spectra Settings")
+        self.kspectra_group.setVisible(previous_values_bzcurr.get("kspectra", False))
+        kspectra_layout = QFormLayout(self.kspectra_group)
+
+        self.lambda0_spinbox = QDoubleSpinBox()
+        self.lambda0_spinbox.setRange(1.0, 100000.0)
+        self.lambda0_spinbox.setDecimals(2)
+        self.lambda0_spinbox.setValue(previous_values_bzcurr.get("lambda0_nm", 800.0))
+        self.lambda0_spinbox.setSuffix(" nm")
+        kspectra_layout.addRow("Wavelength:", self.lambda0_spinbox)
+
+        self.dt_entry = QLineEdit(str(previous_values_bzcurr.get("dt", "")))
+        self.dt_entry.setPlaceholderText("TDTimeStep of the run")
+        kspectra_layout.addRow("Time step [a.u.]:", self.dt_entry)
+
+        self.orders_entry = QLineEdit(previous_values_bzcurr.get("orders", "3, 5, 7"))
+        self.orders_entry.setPlaceholderText("e.g. 3, 5, 7")
+        kspectra_layout.addRow("Harmonic orders:", self.orders_entry)
+
+        self.kspectra_derivative_checkbox = QCheckBox("Time derivative")
+        self.kspectra_derivative_checkbox.setChecked(previous_values_bzcurr.get("time_derivative", 'False') == 'True')
+        kspectra_layout.addRow("", self.kspectra_derivative_checkbox)
+
+        layout.addWidget(self.kspectra_group)
+        self.kspectra_checkbox.stateChanged.connect(lambda state: self.kspectra_group.setVisible(state == Qt.Checked))
+        self.kspectra_checkbox.setChecked(previous_values_bzcurr.get("kspectra", False))
+
     def create_optional_section(self, layout):
         self.plot_options_checkbox = QCheckBox("Advanced Plot Customization") 
         self.plot_options_checkbox.setStyleSheet("font-size: 14px; font-weight: 600; color: #1976d2;")
@@ -744,13 +881,35 @@ class ModernDialog(QDialog):
                 }
             ## ----------------------------------------
 
+            if self.kspectra_checkbox.isChecked():
+                lambda0_nm = self.lambda0_spinbox.value()
+                dt = float(self.dt_entry.text())
+                if dt <= 0:
+                    raise ValueError("The time step must be positive.")
+                orders = [float(value) for value in self.orders_entry.text().split(",") if value.strip()]
+                if not orders:
+                    raise ValueError("Please enter at least one harmonic order.")
+                time_derivative = 'True' if self.kspectra_derivative_checkbox.isChecked() else 'False'
+
+                self.accept()
+
+                # Update
+                previous_values_bzcurr.update({"kspectra": True, "lambda0_nm": lambda0_nm, "dt": dt,
+                                               "orders": self.orders_entry.text(), "time_derivative": time_derivative})
+
+                # CALL
+                kspectra_connector(lambda0_nm, orders, dt, time_derivative, file_format, plot_settings, self.parent().ipy_console)
+                return
+
             self.accept()
             
             # Update
-            previous_values_bzcurr.update({"A": A})
+            unfold_option = self.unfold_checkbox.isChecked()
+            bz_option = self.zone_checkbox.isChecked()
+            previous_values_bzcurr.update({"A": A, "kspectra": False, "unfold": unfold_option, "zone": bz_option})
             
             # CALL
-            bzcurr_connector(A, interp_method, file_format, plot_settings, self.parent().ipy_console)
+            bzcurr_connector(A, interp_method, file_format, plot_settings, self.parent().ipy_console, unfold_option, bz_option)
             
         except ValueError as e:
             QMessageBox.warning(self, "Invalid Input", f"Error: {e}")
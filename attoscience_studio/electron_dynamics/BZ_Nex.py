@@ -25,7 +25,6 @@ import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 from matplotlib import gridspec
 from mpl_toolkits.mplot3d import Axes3D
-from scipy.interpolate import griddata
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QFileDialog, QDialog, QFormLayout, QProgressBar, QStyle,
                              QRadioButton, QButtonGroup, QScrollArea, QColorDialog, QLineEdit, QMessageBox,
                              QPushButton, QVBoxLayout, QHBoxLayout, QGroupBox, QGridLayout, QSplashScreen, QDoubleSpinBox,
@@ -37,6 +36,11 @@ from PyQt5.QtCore import Qt, QSize, QTimer, QEvent, QCoreApplication, QPropertyA
 from datetime import datetime
 from qtconsole.rich_jupyter_widget import RichJupyterWidget
 from attoscience_studio.resources_rc import *
+from attoscience_studio.utils.profiler import profile_stage
+from attoscience_studio.electron_dynamics.bz_symmetry import unfold_from_parser_log, symmetry_warning
+from attoscience_studio.electron_dynamics.bz_geometry import lattice_from_file, plane_zone, zone_points, zone_grid
+from attoscience_studio.electron_dynamics.grid_backends import interpolate_to_grid, INTERP_METHODS
+from attoscience_studio.electron_dynamics.k_batch import batch_kplanes, format_batch, plot_batch
 ##----------------------------------------------------
 def read_bznex(file_path):
     try:
@@ -55,25 +59,30 @@ def read_bznex(file_path):
     except Exception as e:
         raise ValueError(f"Failed to read N_ex or density_kpt data file: {e}")
 ##----------------------------------------------------
-def grid_interp(ki, kj, nex, A, interp_method):
+def grid_interp(ki, kj, nex, A, interp_method, zone=None):
+    # Returns the interpolated grid and the backend used ('auto' resolves to one)
     try:
-        i_grid = np.linspace(np.min(ki), np.max(ki), A)
-        j_grid = np.linspace(np.min(kj), np.max(kj), A)
-        i_grid, j_grid = np.meshgrid(i_grid, j_grid)
-    
-        # Interpolate
-        nex_interp = griddata((ki, kj), nex, (i_grid, j_grid), method=interp_method)
+        if zone is None:
+            i_grid = np.linspace(np.min(ki), np.max(ki), A)
+            j_grid = np.linspace(np.min(kj), np.max(kj), A)
+            i_grid, j_grid = np.meshgrid(i_grid, j_grid)
+            inside = None
+        else:
+            # Only the grid points inside the first BZ are interpolated
+            i_grid, j_grid, inside = zone_grid(zone, A)
+
+        nex_interp, backend = interpolate_to_grid(ki, kj, nex, i_grid, j_grid, interp_method, inside)
     
     except Exception as e:   
         raise RuntimeError(f"Grid interpolation failed with method='{interp_method}': {e}") from e
     
-    return nex_interp
+    return nex_interp, backend
 ##----------------------------------------------------
 def print_to_console(console: RichJupyterWidget, msg: str):
     if hasattr(console, "_kernel_client"):
         console._kernel_client.execute(f"print('''{msg}''')")
 
-def bznex_connector(A, interp_method, file_format, plot_settings, ipy_console=None):
+def bznex_connector(A, interp_method, file_format, plot_settings, ipy_console=None, unfold_option=False, bz_option=False):
     file_path, _ = QFileDialog.getOpenFileName(None, "Select N_ex file")
     if not any(substring in file_path.lower() for substring in [
         "n_excited_el_kpt.kx=0",
@@ -83,13 +92,42 @@ def bznex_connector(A, interp_method, file_format, plot_settings, ipy_console=No
         QMessageBox.warning(None, "File Error", "Please upload the 'n_excited_el_kpt.kx=0' or 'n_excited_el_kpt.ky=0' or 'n_excited_el_kpt.kz=0' file.")
         return
 
+    parser_log = None
+    if unfold_option:
+        parser_log, _ = QFileDialog.getOpenFileName(None, "Select the 'parser.log' file of the run")
+        if "parser.log" not in parser_log.lower():
+            QMessageBox.warning(None, "File Error", "Please upload the 'parser.log' file.")
+            return
+    elif bz_option:
+        # The zone only needs the lattice, which a CIF file also provides
+        parser_log, _ = QFileDialog.getOpenFileName(None, "Select the 'parser.log' file of the run (or the CIF file of the crystal)")
+        if "parser.log" not in parser_log.lower() and not parser_log.lower().endswith(".cif"):
+            QMessageBox.warning(None, "File Error", "Please upload the 'parser.log' or '.cif' file.")
+            return
+
     if file_path:
         try:
-            ki, kj, nex = read_bznex(file_path)
-
-            nex_interp = grid_interp(ki, kj, nex, A, interp_method)
+            with profile_stage("BZ excitation", "load"):
+                ki, kj, nex = read_bznex(file_path)
+
+            with profile_stage("BZ excitation", "transform"):
+                n_read, unfold_msg = len(ki), ""
+                if unfold_option:
+                    # Full zone from the irreducible k-points before the single interpolation
+                    ki, kj, nex, n_ops, mismatch = unfold_from_parser_log(parser_log, ki, kj, nex, file_format[0])
+                    unfold_msg = (f">>> Unfolded with {n_ops} symmetry operations: {n_read} -> {len(ki)} k-points\n"
+                                  + symmetry_warning(mismatch))
+                zone = None
+                if bz_option:
+                    vectors, zone = plane_zone(lattice_from_file(parser_log), file_format[0])
+                    ki, kj, nex = zone_points(ki, kj, nex, vectors, zone)
+                    unfold_msg += f">>> Folded into the first BZ ({len(zone)} vertices)\n"
+                    if parser_log.lower().endswith(".cif"):
+                        unfold_msg += ">>> Zone from the CIF cell in the standard orientation (a along x)\n"
+                nex_interp, backend = grid_interp(ki, kj, nex, A, interp_method, zone)
             
-            bznex_plot(ki, kj, nex_interp, plot_settings)
+            with profile_stage("BZ excitation", "plot"):
+                bznex_plot(ki, kj, nex_interp, plot_settings, zone)
    
             timestamp = datetime.now().strftime("[%H:%M:%S]")
             msg = (
@@ -100,7 +138,8 @@ def bznex_connector(A, interp_method, file_format, plot_settings, ipy_console=No
                 ">>> BZ Nex visualization successfully completed!\n"
                 f">>> File loaded from: {file_path}\n"
                 f">>> Grid Resolution: {A}\n"
-                f">>> Interpolation method: {interp_method}\n"
+                f">>> Interpolation method: {interp_method}" + (f" ({backend})" if backend != interp_method else "") + "\n"
+                + unfold_msg
                 + "-" * 75
             )
             print_to_console(ipy_console, msg)
@@ -110,9 +149,45 @@ def bznex_connector(A, interp_method, file_format, plot_settings, ipy_console=No
             return
 
 ##----------------------------------------------------
-def bznex_plot(ki, kj, nex_interp, plot_settings):
+def kbatch_connector(A, interp_method, save_arrays, plot_settings, ipy_console=None):
+    run_dir = QFileDialog.getExistingDirectory(None, "Select the run directory (k-plane files or td.* outputs)")
+    if not run_dir:
+        return
+    try:
+        output_dir = os.path.join(os.getcwd(), "k_batch") if save_arrays else None
+        with profile_stage("k-plane batch", "transform"):
+            results, skipped = batch_kplanes(run_dir, A, interp_method, output_dir=output_dir, last_only=not save_arrays)
+
+        if not save_arrays:
+            with profile_stage("k-plane batch", "plot"):
+                plot_batch(results, plot_settings=plot_settings)
+
+        timestamp = datetime.now().strftime("[%H:%M:%S]")
+        msg = (
+            f">>> Time                          {timestamp}\n"
+            + "-" * 75 + "\n"
+            + "--                        k-plane batch log!                               --\n"
+            + "-" * 75 + "\n"
+            f">>> Directory: {run_dir}\n"
+            f">>> Grid Resolution: {A}\n"
+            f">>> Interpolation method: {interp_method}\n"
+            + format_batch(results, skipped)
+            + (f">>> Arrays saved to {output_dir}\n" if save_arrays else ">>> Tiled figure of the last output\n")
+            + "-" * 75
+        )
+        print_to_console(ipy_console, msg)
+
+    except ValueError as e:
+        QMessageBox.warning(None, "Error", str(e))
+        return
+
+##----------------------------------------------------
+def bznex_plot(ki, kj, nex_interp, plot_settings, zone=None):
     fig = plt.figure()
-    extent = (np.min(ki), np.max(ki), np.min(kj), np.max(kj))
+    if zone is None:
+        extent = (np.min(ki), np.max(ki), np.min(kj), np.max(kj))
+    else:
+        extent = (np.min(zone[:, 0]), np.max(zone[:, 0]), np.min(zone[:, 1]), np.max(zone[:, 1]))
 
     ax1 = fig.add_subplot(1, 1, 1)
     img1 = ax1.imshow(
@@ -127,6 +202,9 @@ def bznex_plot(ki, kj, nex_interp, plot_settings):
     )
     plt.colorbar(img1, ax=ax1, label=plot_settings.get("colorbar_label", 'Excited electrons'))
     img1.set_clim(plot_settings.get("clim_min", None), plot_settings.get("clim_max", None))
+    if zone is not None:
+        outline = np.vstack((zone, zone[:1]))
+        ax1.plot(outline[:, 0], outline[:, 1], color=plot_settings.get("zone_color", 'white'), linewidth=1.2)
 
     ax1.set_title(plot_settings.get("graph_title", "Excited electrons"))
     ax1.set_xlabel(plot_settings.get("x_label", r'$\mathregular{K_x\ [2\pi/a]}$'))
@@ -276,6 +354,7 @@ class ModernDialog(QDialog):
         content_layout = QVBoxLayout(content_widget)
         
         self.create_required_section(content_layout)
+        self.create_batch_section(content_layout)
         self.create_optional_section(content_layout)
         
         scroll_area.setWidget(content_widget)
@@ -350,7 +429,7 @@ class ModernDialog(QDialog):
         interp_method_layout = QVBoxLayout()
         interp_method_label = QLabel("Interpolation Method:")
         self.interp_method_entry = QComboBox()
-        self.interp_method_entry.addItems(["cubic", "linear", "nearest"])
+        self.interp_method_entry.addItems(list(INTERP_METHODS))
         self.interp_method_entry.setStyleSheet("""QComboBox { min-height: 30px; font-size: 12px; }""")
 
         default_interp_method = previous_values_bznex.get("interp_method", "cubic").lower()
@@ -389,6 +468,19 @@ class ModernDialog(QDialog):
         combined_layout.addLayout(params_layout)
         combined_layout.addWidget(file_format_group)
 
+        # Symmetry unfolding -----------------------------
+        self.unfold_checkbox = QCheckBox("Unfold reduced k-points with the crystal symmetry (parser.log)")
+        self.unfold_checkbox.setToolTip("Rebuild the full zone from an irreducible k-point set before interpolating.\n"
+                                         "Only valid for data with the crystal symmetry (ground-state-like); laser-driven\n"
+                                         "data breaks it, and a warning is printed when equivalent k-points differ.")
+        self.unfold_checkbox.setChecked(previous_values_bznex.get("unfold", False))
+        combined_layout.addWidget(self.unfold_checkbox)
+
+        self.zone_checkbox = QCheckBox("Fold into the first Brillouin zone and draw its outline (parser.log or CIF)")
+        self.zone_checkbox.setToolTip("Interpolate only inside the Wigner-Seitz cell of the reciprocal lattice")
+        self.zone_checkbox.setChecked(previous_values_bznex.get("zone", False))
+        combined_layout.addWidget(self.zone_checkbox)
+
         params_group.setLayout(combined_layout)
         layout.addWidget(params_group)
 
@@ -400,6 +492,26 @@ class ModernDialog(QDialog):
                     checkbox.setChecked(False)         
     ##----------------------------------------
     
+    def create_batch_section(self, layout):
+        self.batch_checkbox = QCheckBox("Batch: all k-planes of a run directory")
+        self.batch_checkbox.setStyleSheet("font-size: 14px; font-weight: 600; color: #1976d2;")
+        self.batch_checkbox.setToolTip("Every *.kx=0, *.ky=0 and *.kz=0 file of the directory and its td.* outputs, "
+                                       "with one interpolator per plane")
+        layout.addWidget(self.batch_checkbox)
+
+        self.batch_group = QGroupBox("Batch Settings")
+        self.batch_group.setVisible(previous_values_bznex.get("batch", False))
+        batch_layout = QFormLayout(self.batch_group)
+
+        self.batch_output_combo = QComboBox()
+        self.batch_output_combo.addItems(["Tiled figure (last output)", "Binary arrays (.npy, all outputs)"])
+        self.batch_output_combo.setCurrentIndex(previous_values_bznex.get("batch_output", 0))
+        batch_layout.addRow("Output:", self.batch_output_combo)
+
+        layout.addWidget(self.batch_group)
+        self.batch_checkbox.stateChanged.connect(lambda state: self.batch_group.setVisible(state == Qt.Checked))
+        self.batch_checkbox.setChecked(previous_values_bznex.get("batch", False))
+
     def create_optional_section(self, layout):
         self.plot_options_checkbox = QCheckBox("Advanced Plot Customization") 
         self.plot_options_checkbox.setStyleSheet("font-size: 14px; font-weight: 600; color: #1976d2;")
@@ -678,7 +790,7 @@ class ModernDialog(QDialog):
             elif self.plane_z_checkbox.isChecked():
                 file_format.append('plane_z')
 
-            if not file_format:
+            if not file_format and not self.batch_checkbox.isChecked():
                 QMessageBox.warning(self, "Invalid input", "Please select one file format.")
                 return
 
@@ -711,12 +823,25 @@ class ModernDialog(QDialog):
                 }
             ## ----------------------------------------
 
+            if self.batch_checkbox.isChecked():
+                batch_output = self.batch_output_combo.currentIndex()
+                self.accept()
+
+                # Update
+                previous_values_bznex.update({"A": A, "batch": True, "batch_output": batch_output})
+
+                # CALL
+                kbatch_connector(A, interp_method, batch_output == 1, plot_settings, self.parent().ipy_console)
+                return
+
             self.accept()
             # Update
-            previous_values_bznex.update({"A": A})
+            unfold_option = self.unfold_checkbox.isChecked()
+            bz_option = self.zone_checkbox.isChecked()
+            previous_values_bznex.update({"A": A, "batch": False, "unfold": unfold_option, "zone": bz_option})
             
             # CALL
-            bznex_connector(A, interp_method, file_format, plot_settings, self.parent().ipy_console)
+            bznex_connector(A, interp_method, file_format, plot_settings, self.parent().ipy_console, unfold_option, bz_option)
             
         except ValueError as e:
             QMessageBox.warning(self, "Invalid Input", f"Error: {e}")
@@ -0,0 +1,207 @@
+# electron_dynamics/bz_geometry.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import itertools
+import numpy as np
+from scipy.spatial import Voronoi, cKDTree
+from matplotlib.path import Path
+#--------------------------------
+from attoscience_studio.parser.parserlog_parser import CrystalStructureParser
+from attoscience_studio.parser.cif_parser import parse_cif
+from attoscience_studio.helper_functions.constants import AtomicUnits
+##----------------------------------------------------
+# Reciprocal lattice and first Brillouin zone of the k-planes. Lattices are in
+# bohr (parser.log) or converted from Angstrom (CIF), so reciprocal vectors
+# and k-points are cartesian [bohr^-1] like the Octopus k-resolved outputs.
+##----------------------------------------------------
+BOHR_PER_ANGSTROM = AtomicUnits.BOHR_PER_ANGSTROM
+# Cartesian axes spanned by each k-plane file
+PLANE_AXES = {"plane_x": (1, 2), "plane_y": (0, 2), "plane_z": (0, 1)}
+##----------------------------------------------------
+def lattice_matrix(parser):
+    # Rows are the lattice vectors [bohr]
+    if len(parser.scaled_vectors) != 3:
+        raise ValueError("parser.log does not contain the LatticeParameters and LatticeVectors blocks.")
+    return np.array(parser.scaled_vectors, dtype=float)
+
+def lattice_from_parser_log(file_path):
+    parser = CrystalStructureParser(file_path)
+    parser.parse()
+    return lattice_matrix(parser)
+
+def lattice_from_cif(file_path):
+    """
+    Lattice vectors [bohr] from the CIF cell parameters, in the standard
+    orientation (a along x, b in the xy plane); the Octopus run may be rotated
+    with respect to it.
+    """
+    cell_params, _ = parse_cif(file_path)
+    try:
+        a, b, c = (cell_params[f'_cell_length_{name}'] * BOHR_PER_ANGSTROM for name in ('a', 'b', 'c'))
+        alpha, beta, gamma = (np.deg2rad(cell_params[f'_cell_angle_{name}']) for name in ('alpha', 'beta', 'gamma'))
+    except KeyError as e:
+        raise ValueError(f"Missing cell parameter {e} in the CIF file.")
+    cx = c * np.cos(beta)
+    cy = c * (np.cos(alpha) - np.cos(beta) * np.cos(gamma)) / np.sin(gamma)
+    return np.array([[a, 0.0, 0.0],
+                     [b * np.cos(gamma), b * np.sin(gamma), 0.0],
+                     [cx, cy, np.sqrt(c**2 - cx**2 - cy**2)]])
+
+def lattice_from_file(file_path):
+    # parser.log of the run, or the CIF file of the crystal when there is none
+    if file_path.lower().endswith('.cif'):
+        return lattice_from_cif(file_path)
+    return lattice_from_parser_log(file_path)
+
+def reciprocal_lattice(lattice):
+    # Rows b_i with a_i . b_j = 2 pi delta_ij
+    return 2 * np.pi * np.linalg.inv(lattice).T
+
+def reduce_basis(u, v):
+    # Lagrange-Gauss reduction of a 2D lattice basis: shortest pair spanning
+    # the same lattice, counter-clockwise
+    u, v = np.asarray(u, dtype=float), np.asarray(v, dtype=float)
+    while True:
+        if np.dot(v, v) < np.dot(u, u):
+            u, v = v, u
+        m = np.round(np.dot(u, v) / np.dot(u, u))
+        if m == 0:
+            break
+        v = v - m * u
+    if u[0] * v[1] - u[1] * v[0] < 0:
+        v = -v
+    return np.array([u, v])
+
+def plane_reciprocal_vectors(lattice, plane, shells=6, tol=1e-6):
+    """
+    Reduced basis (2 x 2) [bohr^-1] of the reciprocal lattice points that lie
+    in the k-plane, i.e. the integer combinations of b1, b2, b3 (|n_i| <= shells)
+    with no component along the plane normal. Fewer rows are returned when
+    the plane is not a reciprocal lattice plane.
+    """
+    i, j = PLANE_AXES[plane]
+    normal = 3 - i - j
+    reciprocal = reciprocal_lattice(lattice)
+    indices = np.array(list(itertools.product(range(-shells, shells + 1), repeat=3)))
+    points = indices @ reciprocal
+    scale = np.max(np.linalg.norm(reciprocal, axis=1))
+    in_plane = points[(np.abs(points[:, normal]) < tol * scale) & np.any(indices != 0, axis=1)][:, [i, j]]
+    if len(in_plane) == 0:
+        return np.empty((0, 2))
+    lengths = np.linalg.norm(in_plane, axis=1)
+    order = np.argsort(lengths, kind="stable")
+    in_plane, lengths = in_plane[order], lengths[order]
+    # In 2D the shortest vector and the shortest one not parallel to it form a basis
+    first = in_plane[0]
+    cross = np.abs(first[0] * in_plane[:, 1] - first[1] * in_plane[:, 0])
+    independent = cross > tol * lengths[0] * lengths
+    if not np.any(independent):
+        return first[None, :]
+    return reduce_basis(first, in_plane[np.argmax(independent)])
+
+##----------------------------------------------------
+def wigner_seitz_cell(vectors, shells=2):
+    """
+    Vertices (n, d) of the Wigner-Seitz cell of the lattice spanned by the
+    rows of vectors, i.e. the first Brillouin zone for reciprocal vectors.
+    In 2D the vertices are ordered counter-clockwise.
+    """
+    vectors = np.asarray(vectors, dtype=float)
+    dim = len(vectors)
+    indices = np.array(list(itertools.product(range(-shells, shells + 1), repeat=dim)))
+    points = indices @ vectors
+    try:
+        voronoi = Voronoi(points)
+    except RuntimeError as e:
+        # QhullError: degenerate (e.g. collinear) vectors
+        raise ValueError(f"The zone vectors {np.round(vectors, 6).tolist()} do not span a {dim}D cell.") from e
+    origin = int(np.argmin(np.linalg.norm(points, axis=1)))
+    region = voronoi.regions[voronoi.point_region[origin]]
+    vertices = voronoi.vertices[region]
+    if dim == 2:
+        vertices = vertices[np.argsort(np.arctan2(vertices[:, 1], vertices[:, 0]))]
+    return vertices
+
+def fold_to_first_bz(k, vectors):
+    """
+    Folds k-points (N, d) into the first Brillouin zone: k + G with the
+    shortest length, over the reciprocal vectors G next to the reduced cell.
+    """
+    k = np.atleast_2d(np.asarray(k, dtype=float))
+    vectors = np.asarray(vectors, dtype=float)
+    fractional = k @ np.linalg.inv(vectors)
+    reduced = (fractional - np.round(fractional)) @ vectors
+    shifts = np.array(list(itertools.product((-1, 0, 1), repeat=len(vectors)))) @ vectors
+    candidates = reduced[:, None, :] + shifts[None, :, :]
+    best = np.argmin(np.einsum('nsd,nsd->ns', candidates, candidates), axis=1)
+    return candidates[np.arange(len(k)), best]
+
+def periodic_images(k, values, vectors, lower, upper):
+    """
+    Images k + G of the points (N, 2) for the eight neighbouring reciprocal
+    vectors that fall inside the box [lower, upper]; values follow.
+    """
+    shifts = np.array([m * vectors[0] + n * vectors[1] for m in (-1, 0, 1) for n in (-1, 0, 1) if (m, n) != (0, 0)])
+    shifted = (k[None, :, :] + shifts[:, None, :]).reshape(-1, 2)
+    inside = np.all((shifted >= lower) & (shifted <= upper), axis=1)
+    return shifted[inside], np.tile(values, len(shifts))[inside]
+
+def zone_mask(x_grid, y_grid, zone):
+    # Grid points inside (or on the edge of) the zone polygon
+    path = Path(zone)
+    scale = np.max(np.abs(zone))
+    points = np.column_stack((x_grid.ravel(), y_grid.ravel()))
+    return path.contains_points(points, radius=1e-9 * scale).reshape(x_grid.shape) | \
+        path.contains_points(points, radius=-1e-9 * scale).reshape(x_grid.shape)
+
+def zone_grid(zone, A):
+    """
+    A x A grid over the bounding box of the zone polygon and the mask of the
+    points inside it.
+    """
+    x = np.linspace(np.min(zone[:, 0]), np.max(zone[:, 0]), A)
+    y = np.linspace(np.min(zone[:, 1]), np.max(zone[:, 1]), A)
+    x_grid, y_grid = np.meshgrid(x, y)
+    return x_grid, y_grid, zone_mask(x_grid, y_grid, zone)
+
+def zone_points(ki, kj, values, vectors, zone):
+    """
+    k-resolved data folded into the first BZ plus the periodic images that lie
+    in the zone's bounding box padded by one k-spacing, so an interpolation
+    over the zone has neighbours across its edges.
+    Returns ki, kj, values.
+    """
+    k = fold_to_first_bz(np.column_stack((ki, kj)), vectors)
+    spacing = np.median(cKDTree(k).query(k, k=2)[0][:, 1])
+    images, image_values = periodic_images(k, values, vectors, zone.min(axis=0) - 2 * spacing,
+                                           zone.max(axis=0) + 2 * spacing)
+    k = np.concatenate((k, images))
+    values = np.concatenate((values, image_values))
+    # Points on the zone edge appear twice; keep the first copy
+    pairs = cKDTree(k).query_pairs(1e-3 * spacing, output_type='ndarray')
+    keep = np.ones(len(k), dtype=bool)
+    keep[pairs.max(axis=1)] = False
+    return k[keep, 0], k[keep, 1], values[keep]
+
+def plane_zone(lattice, plane):
+    # Reciprocal vectors and first-BZ polygon of one k-plane
+    vectors = plane_reciprocal_vectors(lattice, plane)
+    if len(vectors) != 2:
+        raise ValueError(f"The lattice has no two-dimensional reciprocal cell in {plane}.")
+    return vectors, wigner_seitz_cell(vectors)
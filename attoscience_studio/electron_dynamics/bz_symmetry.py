@@ -0,0 +1,175 @@
+# electron_dynamics/bz_symmetry.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import re
+import itertools
+import numpy as np
+from scipy.spatial import cKDTree
+#--------------------------------
+from attoscience_studio.parser.parserlog_parser import CrystalStructureParser
+from attoscience_studio.electron_dynamics.bz_geometry import (PLANE_AXES, lattice_matrix, plane_reciprocal_vectors,
+                                                              periodic_images)
+##----------------------------------------------------
+# Unfolding of k-resolved data written on a reduced k-point set. The point
+# group of the crystal is built from the lattice and atoms of parser.log; all
+# images of the k-points are generated with one matrix product per operation,
+# duplicates are removed with a KD-tree and the periodic images of the zone
+# are added so that the interpolation covers the plotted rectangle.
+# k-points are cartesian [bohr^-1], as written by Octopus with the lattice of
+# parser.log in bohr. Unfolding is only valid for data with the symmetry of
+# the crystal (ground-state-like quantities); a laser field breaks it, so the
+# values of symmetry-equivalent computed k-points are compared first.
+##----------------------------------------------------
+# Largest relative difference between symmetry-equivalent k-points accepted
+SYMMETRY_TOLERANCE = 0.05
+##----------------------------------------------------
+def point_group(lattice, reduced_coords=None, tol=1e-4):
+    """
+    Cartesian rotations (n_ops, 3, 3) of the point group.
+
+    The candidates are all integer matrices with entries -1, 0, 1 acting on
+    the fractional coordinates; an operation is kept if it is orthogonal in
+    cartesian coordinates and, when reduced_coords (["Mo", x, y, z], ...) are
+    given, maps the atoms onto atoms of the same species up to a translation.
+    """
+    A_T = lattice.T
+    candidates = np.array(list(itertools.product((-1, 0, 1), repeat=9)), dtype=float).reshape(-1, 3, 3)
+    R = A_T @ candidates @ np.linalg.inv(A_T)
+    orthogonal = np.all(np.abs(R @ R.transpose(0, 2, 1) - np.eye(3)) < tol, axis=(1, 2))
+    M, R = candidates[orthogonal], R[orthogonal]
+
+    if reduced_coords:
+        species = np.array([row[0] for row in reduced_coords])
+        x = np.array([row[1:4] for row in reduced_coords], dtype=float)
+        keep = np.array([_maps_basis(m, x, species, tol * 100) for m in M], dtype=bool)
+        M, R = M[keep], R[keep]
+    return R
+
+def _maps_basis(m, x, species, tol):
+    # Some translation tau with m x_a + tau = x_b (mod 1) for every atom a
+    image = x @ m.T
+    for b in np.flatnonzero(species == species[0]):
+        tau = x[b] - image[0]
+        diff = (image + tau)[:, None, :] - x[None, :, :]
+        diff -= np.round(diff)
+        match = np.all(np.abs(diff) < tol, axis=2) & (species[:, None] == species[None, :])
+        if np.all(match.any(axis=1)):
+            return True
+    return False
+
+def plane_operations(rotations, plane, time_reversal=False, tol=1e-4):
+    """
+    2x2 blocks of the rotations that map the k-plane onto itself (unique),
+    plus their negatives with time reversal (k -> -k).
+    """
+    i, j = PLANE_AXES[plane]
+    out_of_plane = 3 - i - j
+    in_plane = (np.abs(rotations[:, out_of_plane, i]) < tol) & (np.abs(rotations[:, out_of_plane, j]) < tol)
+    blocks = rotations[in_plane][:, [i, j]][:, :, [i, j]]
+    if time_reversal:
+        blocks = np.concatenate((blocks, -blocks))
+    _, unique = np.unique(np.round(blocks / tol).astype(np.int64).reshape(len(blocks), -1), axis=0, return_index=True)
+    return blocks[np.sort(unique)]
+
+def deduplicate(points, values, tol):
+    # First occurrence of every cluster of points closer than tol
+    pairs = cKDTree(points).query_pairs(tol, output_type='ndarray')
+    keep = np.ones(len(points), dtype=bool)
+    keep[pairs.max(axis=1)] = False
+    return points[keep], values[keep]
+
+def unfold_kpoints(ki, kj, values, operations, reciprocal=None, tol=1e-6):
+    """
+    All symmetry images of the k-points.
+
+    Parameters:
+    - ki, kj, values: k-resolved data of one plane.
+    - operations: 2x2 operations (n_ops, 2, 2) from plane_operations().
+    - reciprocal: In-plane reciprocal vectors (2, 2); the images shifted by
+      the eight neighbouring G vectors that fall inside the bounding box of
+      the unfolded zone (padded by one k-spacing) are added.
+    - tol: Distance below which two images are the same k-point.
+
+    Returns ki, kj and values of the unfolded set.
+    """
+    k = np.column_stack((ki, kj))
+    # The computed points come first so they win over their images
+    images = np.concatenate((k, np.einsum('oab,nb->ona', operations, k).reshape(-1, 2)))
+    image_values = np.tile(values, len(operations) + 1)
+    images, image_values = deduplicate(images, image_values, tol)
+
+    if reciprocal is not None and len(reciprocal) == 2:
+        spacing = np.median(cKDTree(images).query(images, k=2)[0][:, 1])
+        shifted, shifted_values = periodic_images(images, image_values, reciprocal,
+                                                  images.min(axis=0) - spacing, images.max(axis=0) + spacing)
+        images = np.concatenate((images, shifted))
+        image_values = np.concatenate((image_values, shifted_values))
+        images, image_values = deduplicate(images, image_values, tol)
+    return images[:, 0], images[:, 1], image_values
+
+def symmetry_mismatch(ki, kj, values, operations, tol):
+    """
+    Largest difference, relative to max |values|, between a computed k-point
+    and the image of another computed k-point landing on it (within tol).
+    NaN when no image lands on a computed k-point (nothing to compare).
+    """
+    k = np.column_stack((ki, kj))
+    tree = cKDTree(k)
+    scale = np.max(np.abs(values)) or 1.0
+    mismatch = np.nan
+    for operation in operations:
+        distance, index = tree.query(k @ operation.T)
+        hit = distance < tol
+        if np.any(hit):
+            mismatch = np.fmax(mismatch, np.max(np.abs(values[index[hit]] - values[hit])) / scale)
+    return float(mismatch)
+
+def symmetry_warning(mismatch):
+    # Console line for unfold_from_parser_log(); empty when the data is symmetric
+    if np.isnan(mismatch):
+        return (">>> Warning: the symmetry of the data could not be checked; unfolding is only valid for\n"
+                ">>>          data with the crystal symmetry (ground-state-like, not laser-driven)\n")
+    if mismatch > SYMMETRY_TOLERANCE:
+        return (f">>> Warning: symmetry-equivalent k-points differ by {mismatch:.1%} of the maximum; the data\n"
+                ">>>          breaks the crystal symmetry (e.g. laser-driven) and the unfolded zone is not reliable\n")
+    return ""
+
+def time_reversal_enabled(file_path):
+    with open(file_path, 'r') as f:
+        match = re.search(r'^\s*KPointsUseTimeReversal\s*=\s*(\S+)', f.read(), re.MULTILINE)
+    return bool(match) and match.group(1).lower() in ("1", "yes", "true")
+
+def unfold_from_parser_log(file_path, ki, kj, values, plane, time_reversal=None):
+    """
+    Unfolds one k-plane with the point group of the crystal in parser.log.
+    time_reversal defaults to KPointsUseTimeReversal of the run.
+    Returns ki, kj, values, the number of plane operations and the
+    symmetry_mismatch() of the input data.
+    """
+    parser = CrystalStructureParser(file_path)
+    parser.parse()
+    lattice = lattice_matrix(parser)
+    if time_reversal is None:
+        time_reversal = time_reversal_enabled(file_path)
+    operations = plane_operations(point_group(lattice, parser.reduced_coords), plane, time_reversal)
+    spacing = np.median(cKDTree(np.column_stack((ki, kj))).query(np.column_stack((ki, kj)), k=2)[0][:, 1])
+    mismatch = symmetry_mismatch(ki, kj, values, operations, tol=1e-3 * spacing)
+    unfolded = unfold_kpoints(ki, kj, values, operations, plane_reciprocal_vectors(lattice, plane),
+                              tol=1e-3 * spacing)
+    return unfolded + (len(operations), mismatch)
@@ -0,0 +1,131 @@
+# electron_dynamics/grid_backends.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+from scipy.interpolate import griddata
+from scipy.spatial import cKDTree
+##----------------------------------------------------
+# Scatter-to-grid backends for the k-plane views. griddata (Delaunay) keeps
+# the original quality for moderate meshes; for dense meshes a KD-tree
+# (nearest neighbour or inverse-distance weighting, multithreaded queries) or
+# plain binning of the samples into the grid cells is much cheaper.
+##----------------------------------------------------
+GRIDDATA_METHODS = ("cubic", "linear", "nearest")
+INTERP_METHODS = GRIDDATA_METHODS + ("auto", "kdtree", "idw", "binning")
+# Largest mesh interpolated with a Delaunay triangulation in 'auto' mode
+AUTO_GRIDDATA_POINTS = 20000
+##----------------------------------------------------
+def choose_backend(n_points, n_targets):
+    """
+    Backend for 'auto': cubic griddata for moderate meshes; for dense meshes
+    binning when there are several samples per grid cell, otherwise
+    inverse-distance weighting. Binning is only kept if it leaves no target
+    cell empty (see grid_cells()); scattered meshes fall back to 'idw'.
+    """
+    if n_points <= AUTO_GRIDDATA_POINTS:
+        return "cubic"
+    if n_points >= 4 * n_targets:
+        return "binning"
+    return "idw"
+
+def kdtree_nearest(points, values, xi, workers=-1):
+    _, index = cKDTree(points).query(xi, workers=workers)
+    return values[index]
+
+def inverse_distance(points, values, xi, k=8, power=2.0, workers=-1):
+    """
+    Inverse-distance weighting over the k nearest samples; a target that
+    coincides with a sample takes its value.
+    """
+    k = min(k, len(points))
+    distance, index = cKDTree(points).query(xi, k=k, workers=workers)
+    if k == 1:
+        return values[index]
+    exact = distance[:, 0] == 0
+    weights = 1.0 / np.where(exact[:, None], 1.0, distance)**power
+    result = np.sum(weights * values[index], axis=1) / np.sum(weights, axis=1)
+    result[exact] = values[index[exact, 0]]
+    return result
+
+def grid_cells(points, x, y):
+    """
+    Cell index (iy * Nx + ix) of every sample in the regular grid with centres
+    x (Nx,), y (Ny,), and the mask of the samples inside the grid (more than
+    half a cell outside is dropped, not piled into the border cells).
+    """
+    dx = (x[-1] - x[0]) / max(len(x) - 1, 1)
+    dy = (y[-1] - y[0]) / max(len(y) - 1, 1)
+    ix = np.round((points[:, 0] - x[0]) / dx).astype(np.int64)
+    iy = np.round((points[:, 1] - y[0]) / dy).astype(np.int64)
+    inside = (ix >= 0) & (ix < len(x)) & (iy >= 0) & (iy < len(y))
+    return iy[inside] * len(x) + ix[inside], inside
+
+def bin_to_grid(points, values, x, y):
+    """
+    Mean of the samples falling in each cell of the regular grid with centres
+    x (Nx,), y (Ny,); returns (Ny, Nx) with NaN in empty cells. Samples more
+    than half a cell outside the grid are ignored. Suited to meshes that are
+    already regular (or hexagonal) and at least as dense as the grid.
+    """
+    cell, inside = grid_cells(points, x, y)
+    values = values[inside]
+    n_cells = len(x) * len(y)
+    total = np.bincount(cell, weights=values, minlength=n_cells)
+    count = np.bincount(cell, minlength=n_cells)
+    with np.errstate(invalid='ignore', divide='ignore'):
+        mean = total / count
+    return mean.reshape(len(y), len(x))
+
+def interpolate_to_grid(ki, kj, values, x_grid, y_grid, method="cubic", mask=None, workers=-1):
+    """
+    Scattered k-point values on a meshgrid (x_grid, y_grid).
+
+    Parameters:
+    - ki, kj, values: Samples (N,).
+    - method: One of INTERP_METHODS; 'auto' picks from the mesh and grid sizes.
+    - mask: Boolean grid of the points to evaluate (others are NaN).
+
+    Returns the interpolated grid and the backend used.
+    """
+    if method not in INTERP_METHODS:
+        raise ValueError(f"Unknown interpolation method '{method}'.")
+    points = np.column_stack((ki, kj))
+    values = np.asarray(values, dtype=float)
+    inside = np.ones(x_grid.shape, dtype=bool) if mask is None else mask
+    auto = method == "auto"
+    if auto:
+        method = choose_backend(len(points), int(np.count_nonzero(inside)))
+
+    result = np.full(x_grid.shape, np.nan)
+    if method == "binning":
+        binned = bin_to_grid(points, values, x_grid[0, :], y_grid[:, 0])[inside]
+        if not (auto and np.any(np.isnan(binned))):
+            result[inside] = binned
+            return result, method
+        # Scattered mesh: binning would leave empty cells as holes
+        method = "idw"
+
+    xi = np.column_stack((x_grid[inside], y_grid[inside]))
+    if method in GRIDDATA_METHODS:
+        result[inside] = griddata(points, values, xi, method=method)
+    elif method == "kdtree":
+        result[inside] = kdtree_nearest(points, values, xi, workers)
+    else:
+        result[inside] = inverse_distance(points, values, xi, workers=workers)
+    return result, method
@@ -0,0 +1,329 @@
+# electron_dynamics/k_batch.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import numpy as np
+import matplotlib.pyplot as plt
+from concurrent.futures import ThreadPoolExecutor
+from scipy import sparse
+from scipy.spatial import Delaunay, cKDTree
+from scipy.interpolate import CloughTocher2DInterpolator
+#--------------------------------
+from attoscience_studio.electron_dynamics.td_watcher import list_td_dirs
+from attoscience_studio.electron_dynamics.k_spectra import PLANE_COMPONENTS, DEFAULT_CHUNK_BYTES
+from attoscience_studio.electron_dynamics.grid_backends import INTERP_METHODS, choose_backend, grid_cells
+##----------------------------------------------------
+# Batch processing of the k-plane outputs (*.kx=0, *.ky=0, *.kz=0) of a run.
+# All files of a plane share the k-points, so the interpolation onto the grid
+# is set up once per plane (a cached triangulation for 'cubic', a sparse
+# weight matrix for the other methods) and applied to all quantities and
+# td.* outputs of a block in one call. Files are read by a thread pool and
+# the planes are processed concurrently.
+##----------------------------------------------------
+PLANE_OF_SUFFIX = {suffix: plane for plane, (_, _, suffix) in PLANE_COMPONENTS.items()}
+# Derived quantity: in-plane current magnitude, as in the BZ current view
+CURRENT_MAGNITUDE = "current_kpt-mag"
+##----------------------------------------------------
+def discover_kplane_files(run_dir):
+    """
+    k-plane outputs of a run directory and of its td.* outputs.
+
+    Returns the steps that have any ('.' for the run directory itself, then
+    the td.* names in order) and {plane: {step: {quantity: path}}}, where the
+    quantity is the file name without the plane suffix.
+    """
+    steps, files = [], {}
+    for step in ['.'] + list_td_dirs(run_dir):
+        found = False
+        with os.scandir(os.path.join(run_dir, step)) as entries:
+            for entry in entries:
+                quantity, _, suffix = entry.name.rpartition('.')
+                if quantity and suffix in PLANE_OF_SUFFIX and entry.is_file():
+                    files.setdefault(PLANE_OF_SUFFIX[suffix], {}).setdefault(step, {})[quantity] = entry.path
+                    found = True
+        if found:
+            steps.append(step)
+    if not files:
+        raise ValueError(f"No *.kx=0, *.ky=0 or *.kz=0 files found in {run_dir} or its td.* outputs.")
+    return steps, files
+
+def plane_quantities(plane_files):
+    # Quantities written at every step of one plane
+    return sorted(set.intersection(*(set(found) for found in plane_files.values())))
+
+def current_pair(plane, quantities):
+    first, second, _ = PLANE_COMPONENTS[plane]
+    pair = (f"current_kpt-{first}", f"current_kpt-{second}")
+    return pair if all(name in quantities for name in pair) else None
+
+class PlaneInterpolator:
+    """
+    Interpolation of values on a fixed set of k-points onto an A x A grid
+    over their bounding box, for many value columns at once.
+
+    'cubic' reuses one Delaunay triangulation (Clough-Tocher, as griddata);
+    'linear', 'nearest'/'kdtree', 'idw' and 'binning' are precomputed as a
+    sparse (A*A, N) weight matrix, so every further column costs one sparse
+    product. Grid points without data (outside the hull for 'cubic' and
+    'linear', empty cells for an explicit 'binning') are NaN; 'auto' only
+    keeps binning when every cell has samples and uses 'idw' otherwise.
+    """
+    def __init__(self, ki, kj, A, method="cubic", workers=-1):
+        if method not in INTERP_METHODS:
+            raise ValueError(f"Unknown interpolation method '{method}'.")
+        self.points = np.column_stack((ki, kj))
+        if len(self.points) < 3 or np.linalg.matrix_rank(self.points - self.points.mean(axis=0)) < 2:
+            raise ValueError("the k-points lie on a line (e.g. the out-of-plane direction of a 2D system)")
+        self.x = np.linspace(np.min(ki), np.max(ki), A)
+        self.y = np.linspace(np.min(kj), np.max(kj), A)
+        x_grid, y_grid = np.meshgrid(self.x, self.y)
+        xi = np.column_stack((x_grid.ravel(), y_grid.ravel()))
+        self.shape = x_grid.shape
+        self.method = choose_backend(len(self.points), xi.shape[0]) if method == "auto" else method
+        n_grid, n_points = xi.shape[0], len(self.points)
+        self.empty = np.zeros(n_grid, dtype=bool)
+
+        if self.method == "binning":
+            cell, kept = grid_cells(self.points, self.x, self.y)
+            count = np.bincount(cell, minlength=n_grid)
+            if method != "auto" or np.all(count > 0):
+                self.empty = count == 0
+                self.weights = sparse.csr_matrix((1.0 / count[cell], (cell, np.flatnonzero(kept))),
+                                                 shape=(n_grid, n_points))
+                return
+            # Scattered mesh: binning would leave empty cells as holes
+            self.method = "idw"
+
+        if self.method in ("cubic", "linear"):
+            self.triangulation = Delaunay(self.points)
+        if self.method == "cubic":
+            self.xi = xi
+            return
+        if self.method == "linear":
+            simplex = self.triangulation.find_simplex(xi)
+            self.empty = simplex < 0
+            transform = self.triangulation.transform[simplex]
+            b = np.einsum('pij,pj->pi', transform[:, :2], xi - transform[:, 2])
+            weights = np.column_stack((b, 1 - b.sum(axis=1)))
+            columns = self.triangulation.simplices[simplex]
+        elif self.method in ("nearest", "kdtree"):
+            _, columns = cKDTree(self.points).query(xi, workers=workers)
+            weights = np.ones(n_grid)
+        elif self.method == "idw":
+            k = min(8, n_points)
+            distance, columns = cKDTree(self.points).query(xi, k=k, workers=workers)
+            distance, columns = distance.reshape(n_grid, k), columns.reshape(n_grid, k)
+            exact = distance[:, 0] == 0
+            weights = 1.0 / np.where(exact[:, None], 1.0, distance)**2
+            weights[exact] = 0.0
+            weights[exact, 0] = 1.0
+            weights /= weights.sum(axis=1, keepdims=True)
+        weights, columns = np.atleast_2d(weights.T).T, np.atleast_2d(columns.T).T
+        weights[self.empty] = 0.0
+        rows = np.repeat(np.arange(n_grid), weights.shape[1])
+        self.weights = sparse.csr_matrix((weights.ravel(), (rows, columns.ravel())), shape=(n_grid, n_points))
+
+    def matches(self, ki, kj):
+        return len(ki) == len(self.points) and np.allclose(np.column_stack((ki, kj)), self.points)
+
+    def __call__(self, values):
+        """
+        values (N,) or (N, M) -> grids (A, A) or (M, A, A).
+        """
+        values = np.asarray(values, dtype=float)
+        columns = values.reshape(len(self.points), -1)
+        if self.method == "cubic":
+            grid = CloughTocher2DInterpolator(self.triangulation, columns, fill_value=np.nan)(self.xi)
+        else:
+            grid = self.weights @ columns
+            grid[self.empty] = np.nan
+        grids = np.moveaxis(grid.reshape(self.shape + (columns.shape[1],)), -1, 0)
+        return grids[0] if values.ndim == 1 else grids
+
+##----------------------------------------------------
+def _read_kplane(path):
+    data = np.loadtxt(path, ndmin=2)
+    if data.shape[1] < 3:
+        raise ValueError(f"{path} does not have the kx, ky, value columns.")
+    return data[:, 0], data[:, 1], data[:, 2]
+
+def _interpolate_group(interpolator, names, pair, plane_files, steps, grids, reader, max_bytes):
+    # Quantities on one k-mesh, interpolated in blocks of steps with one call per block
+    A = len(interpolator.x)
+    n_points = len(interpolator.points)
+    outputs = names + [CURRENT_MAGNITUDE] if pair else names
+    # Raw columns plus grids of every quantity of a block of steps in flight
+    block = max(1, int(max_bytes // (8 * len(outputs) * (n_points + 2 * A * A))))
+    for first in range(0, len(steps), block):
+        block_steps = steps[first:first + block]
+        paths = [plane_files[step][name] for step in block_steps for name in names]
+        columns = []
+        for path, (k_i, k_j, values) in zip(paths, reader.map(_read_kplane, paths)):
+            if not interpolator.matches(k_i, k_j):
+                raise ValueError(f"{path} does not use the k-points of its first output")
+            columns.append(values)
+        values = np.array(columns).reshape(len(block_steps), len(names), n_points)
+        if pair:
+            magnitude = np.hypot(values[:, names.index(pair[0])], values[:, names.index(pair[1])])
+            values = np.concatenate((values, magnitude[:, None]), axis=1)
+        interpolated = interpolator(values.reshape(-1, n_points).T).reshape(len(block_steps), len(outputs), A, A)
+        for n, name in enumerate(outputs):
+            grids[name][first:first + len(block_steps)] = interpolated[:, n]
+    return outputs
+
+def process_plane(plane, plane_files, steps, A, method, reader, output_dir=None, max_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Interpolated grids of every quantity of one plane at the given steps.
+    Quantities on the same k-mesh share one PlaneInterpolator.
+
+    Parameters:
+    - plane_files: {step: {quantity: path}} from discover_kplane_files().
+    - reader: Executor whose map() reads the files.
+    - output_dir: If given, every quantity is written to
+      '<quantity>.<suffix>.npy' (steps, A, A) as a memory map; otherwise the
+      grids are kept in memory.
+
+    Returns a dict: steps, methods (backend used), grids {quantity: array}
+    and axes {quantity: (x, y)}.
+    """
+    suffix = PLANE_COMPONENTS[plane][2]
+    steps = [step for step in steps if step in plane_files]
+    if not steps:
+        raise ValueError(f"no {plane} outputs at the selected steps")
+    quantities = plane_quantities({step: plane_files[step] for step in steps})
+    if not quantities:
+        raise ValueError(f"no quantity is written at every step of {plane}")
+
+    # One interpolator per distinct k-mesh (e.g. ground-state vs td.* meshes)
+    groups = []
+    first_paths = [plane_files[steps[0]][name] for name in quantities]
+    for name, (k_i, k_j, _) in zip(quantities, reader.map(_read_kplane, first_paths)):
+        for interpolator, names in groups:
+            if interpolator.matches(k_i, k_j):
+                names.append(name)
+                break
+        else:
+            groups.append((PlaneInterpolator(k_i, k_j, A, method), [name]))
+
+    result = {"steps": steps, "methods": set(), "grids": {}, "axes": {}}
+    shape = (len(steps), A, A)
+    for interpolator, names in groups:
+        pair = current_pair(plane, names)
+        outputs = names + [CURRENT_MAGNITUDE] if pair else names
+        if output_dir is None:
+            grids = {name: np.empty(shape) for name in outputs}
+        else:
+            grids = {name: np.lib.format.open_memmap(os.path.join(output_dir, f"{name}.{suffix}.npy"), mode="w+",
+                                                     dtype=np.float64, shape=shape) for name in outputs}
+        _interpolate_group(interpolator, names, pair, plane_files, steps, grids, reader, max_bytes // len(groups))
+        for name, grid in grids.items():
+            if isinstance(grid, np.memmap):
+                grid.flush()
+            result["grids"][name] = grid
+            result["axes"][name] = (interpolator.x, interpolator.y)
+        result["methods"].add(interpolator.method)
+    return result
+
+def batch_kplanes(run_dir, A, method="cubic", steps=None, output_dir=None, last_only=False,
+                  max_bytes=DEFAULT_CHUNK_BYTES, max_workers=None):
+    """
+    Discovers and interpolates the k-plane outputs of all planes of a run.
+
+    Parameters:
+    - run_dir: Directory with k-plane files and/or td.* outputs.
+    - A: Grid resolution.
+    - method: One of INTERP_METHODS.
+    - steps: Steps to process (default: all discovered).
+    - output_dir: Directory for the binary arrays (see process_plane()); the
+      grid axes and steps are saved to 'k_batch_axes.npz'.
+    - last_only: Only the last of the steps written for each plane.
+
+    Returns {plane: result of process_plane()} and {plane: reason} for the
+    planes that could not be interpolated.
+    """
+    found_steps, files = discover_kplane_files(run_dir)
+    steps = found_steps if steps is None else steps
+    if output_dir is not None:
+        os.makedirs(output_dir, exist_ok=True)
+    max_workers = max_workers or min(32, (os.cpu_count() or 1) + 4)
+    planes = sorted(files)
+    with ThreadPoolExecutor(max_workers=max_workers) as reader, ThreadPoolExecutor(max_workers=len(planes)) as pool:
+        futures = {}
+        for plane in planes:
+            plane_steps = [step for step in steps if step in files[plane]]
+            futures[plane] = pool.submit(process_plane, plane, files[plane], plane_steps[-1:] if last_only else plane_steps,
+                                         A, method, reader, output_dir, max_bytes // len(planes))
+        results, skipped = {}, {}
+        for plane, future in futures.items():
+            try:
+                results[plane] = future.result()
+            except ValueError as e:
+                skipped[plane] = str(e)
+    if not results:
+        raise ValueError("No k-plane could be interpolated: " + "; ".join(f"{p}: {r}" for p, r in skipped.items()))
+
+    if output_dir is not None:
+        axes = {}
+        for plane, result in results.items():
+            suffix = PLANE_COMPONENTS[plane][2]
+            axes[f"steps.{suffix}"] = np.array(result["steps"])
+            for name, (x, y) in result["axes"].items():
+                axes.update({f"{name}.{suffix}.x": x, f"{name}.{suffix}.y": y})
+        np.savez(os.path.join(output_dir, "k_batch_axes.npz"), **axes)
+    return results, skipped
+
+##----------------------------------------------------
+def format_batch(results, skipped=None):
+    lines = []
+    for plane, result in results.items():
+        lines.append(f">>> {plane}: {len(result['steps'])} step(s), {', '.join(result['grids'])} ({', '.join(sorted(result['methods']))})")
+    for plane, reason in (skipped or {}).items():
+        lines.append(f">>> {plane}: skipped, {reason}")
+    return "\n".join(lines) + "\n"
+
+def plot_batch(results, step_index=-1, plot_settings=None):
+    """
+    Tiled figure: one row per plane, one panel per quantity, at one step.
+    """
+    plot_settings = plot_settings or {}
+    planes = list(results)
+    n_cols = max(len(results[plane]["grids"]) for plane in planes)
+    fig, axes = plt.subplots(len(planes), n_cols, figsize=(4.5 * n_cols, 4 * len(planes)), squeeze=False)
+    for row, plane in zip(axes, planes):
+        result = results[plane]
+        for ax, (name, grids) in zip(row, result["grids"].items()):
+            x, y = result["axes"][name]
+            extent = (x[0], x[-1], y[0], y[-1])
+            img = ax.imshow(grids[step_index], extent=extent,
+                            aspect=plot_settings.get("aspect", 'auto'),
+                            origin=plot_settings.get("origin", 'lower'),
+                            cmap=plot_settings.get("cmap", 'jet'),
+                            interpolation=plot_settings.get("interpolation", 'nearest'),
+                            vmin=plot_settings.get("vmin", None),
+                            vmax=plot_settings.get("vmax", None))
+            fig.colorbar(img, ax=ax)
+            ax.set_title(f"{name} ({plane}, {result['steps'][step_index]})", fontsize=10)
+            ax.set_xlabel(plot_settings.get("x_label", "") or f"k ({PLANE_COMPONENTS[plane][0]})")
+            ax.set_ylabel(plot_settings.get("y_label", "") or f"k ({PLANE_COMPONENTS[plane][1]})")
+        for ax in row[len(result["grids"]):]:
+            ax.set_visible(False)
+    fig.suptitle(plot_settings.get("graph_title", "") or "k-resolved outputs")
+    plt.tight_layout()
+    plt.show()
+    return fig
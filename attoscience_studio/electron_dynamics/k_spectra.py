@@ -0,0 +1,178 @@
+# electron_dynamics/k_spectra.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import numpy as np
+import matplotlib.pyplot as plt
+import scipy.fft
+#--------------------------------
+from attoscience_studio.electron_dynamics.td_watcher import list_td_dirs, td_iteration
+##----------------------------------------------------
+# k-resolved harmonic spectra. The in-plane current of every k-point over all
+# td.* outputs is stacked into one (Nk, Nt) cube per component (memory-mapped
+# when it does not fit in max_bytes) and transformed with one real FFT along
+# time per block of k-points.
+##----------------------------------------------------
+DEFAULT_CHUNK_BYTES = 64 * 1024**2
+# In-plane current components of the Octopus k-plane outputs
+PLANE_COMPONENTS = {"plane_x": ("y", "z", "kx=0"), "plane_y": ("x", "z", "ky=0"), "plane_z": ("x", "y", "kz=0")}
+##----------------------------------------------------
+def plane_files(base_dir_iter, time_dir, plane):
+    first, second, suffix = PLANE_COMPONENTS[plane]
+    return (os.path.join(base_dir_iter, time_dir, f"current_kpt-{first}.{suffix}"),
+            os.path.join(base_dir_iter, time_dir, f"current_kpt-{second}.{suffix}"))
+
+def load_current_cube(base_dir_iter, plane="plane_z", scratch_dir=None, max_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Stacks the in-plane currents of all td.* outputs.
+
+    Parameters:
+    - base_dir_iter: Directory with the td.* outputs.
+    - plane: 'plane_x', 'plane_y' or 'plane_z'.
+    - scratch_dir: Where the cubes are memory-mapped if 2 Nk Nt doubles exceed
+      max_bytes (required then; the caller removes it).
+
+    Returns iterations (Nt,), ki, kj (Nk,) and the two current cubes (Nk, Nt).
+    """
+    time_dirs = [name for name in list_td_dirs(base_dir_iter)
+                 if all(os.path.exists(path) for path in plane_files(base_dir_iter, name, plane))]
+    if len(time_dirs) < 2:
+        raise ValueError("At least two td.* outputs with k-resolved currents are needed.")
+
+    first = np.loadtxt(plane_files(base_dir_iter, time_dirs[0], plane)[0], skiprows=1, ndmin=2)
+    ki, kj = first[:, 0], first[:, 1]
+    shape = (len(ki), len(time_dirs))
+    if 2 * shape[0] * shape[1] * 8 > max_bytes:
+        if scratch_dir is None:
+            # The caller owns (and removes) the directory, e.g. a tempfile.TemporaryDirectory
+            raise ValueError(f"The current cubes ({2 * shape[0] * shape[1] * 8 / 1024**2:.1f} MB) exceed "
+                             f"max_bytes; pass a scratch_dir to memory-map them.")
+        cubes = [np.lib.format.open_memmap(os.path.join(scratch_dir, f"current_{name}.npy"), mode="w+",
+                                           dtype=np.float64, shape=shape) for name in ("i", "j")]
+    else:
+        cubes = [np.empty(shape) for _ in range(2)]
+
+    for n, time_dir in enumerate(time_dirs):
+        for cube, path in zip(cubes, plane_files(base_dir_iter, time_dir, plane)):
+            data = np.loadtxt(path, skiprows=1, ndmin=2)
+            if len(data) != shape[0]:
+                raise ValueError(f"{path} has {len(data)} k-points instead of {shape[0]}.")
+            cube[:, n] = data[:, 2]
+    iterations = np.array([td_iteration(name) for name in time_dirs], dtype=float)
+    steps = np.diff(iterations)
+    if not np.allclose(steps, steps[0]):
+        raise ValueError("The td.* outputs are not equally spaced in iterations.")
+    return iterations, ki, kj, cubes[0], cubes[1]
+
+def harmonic_bands(w, w0, orders, half_width):
+    """
+    Boolean masks (Nq, Nw) of the frequency bins within half_width harmonic
+    orders of every order; a band narrower than the bin spacing keeps the
+    nearest bin.
+    """
+    bands = np.abs(w[None, :] / w0 - np.asarray(orders, dtype=float)[:, None]) <= half_width
+    for q, order in enumerate(orders):
+        if not bands[q].any():
+            bands[q, np.argmin(np.abs(w - order * w0))] = True
+    return bands
+
+def k_harmonic_spectra(t, J_i, J_j, w0, orders, half_width=0.25, window=None, time_derivative='False',
+                       workers=-1, max_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Harmonic intensity of every k-point at the selected orders.
+
+    Every row is shifted to start at zero (as calculate_spectrum()), multiplied
+    by the time window and zero-padded so the frequency step is at most w0/20.
+
+    Parameters:
+    - t: Uniform time axis of the td.* outputs [a.u.] (Nt,).
+    - J_i, J_j: In-plane current cubes (Nk, Nt), arrays or memory maps.
+    - w0: Driver frequency [a.u.].
+    - orders: Harmonic orders.
+    - half_width: Half width of the band integrated around each order [orders].
+    - window: Time window (Nt,) or None.
+    - time_derivative: 'True' to transform dJ/dt.
+
+    Returns a dict: orders, intensity (Nq, Nk) = sum over the band of
+    w^2 (|J_i(w)|^2 + |J_j(w)|^2) dw, and the k-summed spectrum w, S (Nw,).
+    """
+    orders = np.atleast_1d(np.asarray(orders, dtype=float))
+    dt = t[1] - t[0]
+    if np.max(orders) * w0 >= np.pi / dt:
+        raise ValueError(f"Order {np.max(orders):g} is above the Nyquist frequency of the td.* output step "
+                         f"({np.pi / dt / w0:.1f} orders).")
+    n_k, n_t = J_i.shape
+    n_fft = scipy.fft.next_fast_len(max(n_t, int(np.ceil(2 * np.pi / (dt * w0 / 20)))), real=True)
+    w = 2 * np.pi * scipy.fft.rfftfreq(n_fft, dt)
+    bands = harmonic_bands(w, w0, orders, half_width).astype(np.float64)
+    dw = w[1] - w[0]
+    window = np.ones(n_t) if window is None else np.asarray(window)
+
+    intensity = np.empty((len(orders), n_k))
+    S = np.zeros(len(w))
+    # ~3 complex rows of n_fft per k-point in flight
+    block = max(1, int(max_bytes // (3 * 16 * n_fft)))
+    for first in range(0, n_k, block):
+        sl = slice(first, min(first + block, n_k))
+        power = np.zeros((sl.stop - sl.start, len(w)))
+        for cube in (J_i, J_j):
+            rows = np.asarray(cube[sl], dtype=np.float64)
+            rows = (rows - rows[:, :1]) * window
+            if time_derivative == 'True':
+                rows = np.gradient(rows, t, axis=1)
+            spectrum = scipy.fft.rfft(rows, n=n_fft, axis=1, workers=workers)
+            power += np.abs(spectrum * dt)**2
+        power *= w**2
+        intensity[:, sl] = (bands @ power.T) * dw
+        S += power.sum(axis=0)
+    return {"orders": orders, "intensity": intensity, "w": w, "S": S}
+
+##----------------------------------------------------
+def save_k_spectra(result, ki, kj, file_path="k_harmonic_spectra.npz", **metadata):
+    np.savez_compressed(file_path, ki=ki, kj=kj, **result, **metadata)
+
+def format_k_spectra(result, ki, kj):
+    lines = []
+    for order, intensity in zip(result["orders"], result["intensity"]):
+        brightest = int(np.argmax(intensity))
+        lines.append(f">>> H{order:g}: total {intensity.sum():.6e}, brightest k = ({ki[brightest]:.4f}, {kj[brightest]:.4f})")
+    return "\n".join(lines) + "\n"
+
+def plot_k_spectra(result, ki, kj, plot_settings=None):
+    plot_settings = plot_settings or {}
+    orders = result["orders"]
+    n_cols = min(len(orders), 3)
+    n_rows = int(np.ceil(len(orders) / n_cols))
+    fig, axes = plt.subplots(n_rows, n_cols, figsize=(4.5 * n_cols, 4 * n_rows), squeeze=False)
+    fig.patch.set_facecolor(plot_settings.get("background_color", "white"))
+    for ax, order, intensity in zip(axes.flat, orders, result["intensity"]):
+        log_intensity = np.log10(np.maximum(intensity, 1e-300))
+        mesh = ax.tripcolor(ki, kj, log_intensity, shading="gouraud", cmap=plot_settings.get("cmap", "jet"),
+                            vmin=plot_settings.get("vmin", None), vmax=plot_settings.get("vmax", None))
+        fig.colorbar(mesh, ax=ax, label=plot_settings.get("colorbar_label", r"$\log_{10}$ Intensity [arb. u.]"))
+        ax.set_title(f"H{order:g}")
+        ax.set_aspect("equal")
+        ax.set_xlabel(plot_settings.get("x_label", r'$\mathregular{K_x\ [2\pi/a]}$'))
+        ax.set_ylabel(plot_settings.get("y_label", r'$\mathregular{K_y\ [2\pi/a]}$'))
+    for ax in list(axes.flat)[len(orders):]:
+        ax.set_visible(False)
+    fig.suptitle(plot_settings.get("graph_title", "k-resolved harmonic emission"))
+    plt.tight_layout()
+    plt.show()
+    return fig
@@ -37,6 +37,7 @@ from PyQt5.QtCore import Qt, QSize, QTimer, QEvent, QCoreApplication, QPropertyA
 from datetime import datetime
 from qtconsole.rich_jupyter_widget import RichJupyterWidget
 from attoscience_studio.resources_rc import *
+from attoscience_studio.utils.profiler import profile_stage
 ##----------------------------------------------------
 def read_nex(file_path):
     try:
@@ -85,13 +86,15 @@ def nex_connector(lambda0_nm, x_axis_unit, plot_settings, ipy_console=None):
         return        
     if file_path:
         try:
-            t, nex = read_nex(file_path)
+            with profile_stage("Excited electrons", "load"):
+                t, nex = read_nex(file_path)
 
             w0 = 45.5633 / lambda0_nm
             T = 2 * np.pi / w0
             Time_OC = t/T
 
-            nex_and_plotnex(t, nex, Time_OC, x_axis_unit, plot_settings)
+            with profile_stage("Excited electrons", "plot"):
+                nex_and_plotnex(t, nex, Time_OC, x_axis_unit, plot_settings)
 
             max_Time_OC = np.max(Time_OC)
             T_SI = T*2.418884326509*1e-17
@@ -20,7 +20,6 @@
 import os, sys
 import numpy as np
 import matplotlib.pyplot as plt
-from scipy.interpolate import griddata
 import scipy.io as sio
 from matplotlib.animation import FuncAnimation
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
@@ -34,6 +33,8 @@ from PyQt5.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QFormLayout, QCo
 from PyQt5.QtCore import Qt, QThread, pyqtSignal, QTimer
 from PyQt5.QtGui import QIcon, QFont
 from attoscience_studio.resources_rc import *
+from attoscience_studio.utils.profiler import profile_stage
+from attoscience_studio.electron_dynamics.td_watcher import KGridInterpolator, FrameStore, LaserTail, settled_dirs
 ##----------------------------------------------------
 previous_input_current_nex = {}
 class CurrentNexAnalysisThread(QThread):
@@ -45,6 +46,8 @@ class CurrentNexAnalysisThread(QThread):
     def __init__(self, params):
         super().__init__()
         self.params = params
+        # One triangulation of the k-points for every td.* frame
+        self.interpolator = KGridInterpolator()
         
     def run(self):
         try:
@@ -63,6 +66,7 @@ class CurrentNexAnalysisThread(QThread):
             save_animation = self.params['save_animation']
             save_format = self.params['format']
             save_dir = self.params['save_dir']
+            watch = self.params.get('watch', False)
             
             # Load laser data ---------------------------
             w0 = 45.5633 / lambda0_nm
@@ -72,12 +76,20 @@ class CurrentNexAnalysisThread(QThread):
             if not os.path.exists(file_path):
                 raise FileNotFoundError(f"Laser file not found: {file_path}")
                 
-            laser_data = np.loadtxt(file_path)
-            Time = laser_data[:, 1] 
-            Ax1, Ay1 = laser_data[:, 2], laser_data[:, 3]
-            Ax2, Ay2 = laser_data[:, 5], laser_data[:, 6]
-            AX = Ax1 + Ax2
-            AY = Ay1 + Ay2
+            laser_tail = None
+            with profile_stage("Current/Nex animation", "load"):
+                if watch:
+                    # The watcher keeps reading the laser file from where this stops
+                    laser_tail = LaserTail(base_dir_laser)
+                    laser_iter, Time, AX, AY = laser_tail.read()
+                else:
+                    laser_data = np.loadtxt(file_path)
+                    laser_iter = laser_data[:, 0]
+                    Time = laser_data[:, 1] 
+                    Ax1, Ay1 = laser_data[:, 2], laser_data[:, 3]
+                    Ax2, Ay2 = laser_data[:, 5], laser_data[:, 6]
+                    AX = Ax1 + Ax2
+                    AY = Ay1 + Ay2
             
             self.status_updated.emit("Processing k-point directories...")
             self.progress_updated.emit(20)
@@ -107,58 +119,92 @@ class CurrentNexAnalysisThread(QThread):
             self.status_updated.emit("Loading and interpolating current data...")
             self.progress_updated.emit(30)
             
-            # Process data ---------------------------
-            interpolated_data_currents = {}
-            interpolated_data_nex = {}
+            frame_store = None
+            if watch:
+                # Frames go through a FrameStore so a watcher can extend them later
+                frame_store = FrameStore(x_grid, y_grid, num_interpolated_frames, self.interpolator)
+                with profile_stage("Current/Nex animation", "transform"):
+                    # Outputs still being written are left to the watcher
+                    ready_dirs = settled_dirs(base_dir_iter, time_dirs)
+                    total_dirs = len(ready_dirs)
+                    for i, time_dir in enumerate(ready_dirs):
+                        frame_store.ingest(base_dir_iter, [time_dir])
+                        progress = 30 + int((i / total_dirs) * 40)
+                        self.progress_updated.emit(progress)
+
+                if not frame_store.names:
+                    raise ValueError("No complete td.* output found in the iteration directory")
+
+                self.status_updated.emit("Creating interpolated frames...")
+                self.progress_updated.emit(70)
+                with profile_stage("Current/Nex animation", "post-process"):
+                    # Copies: the animation extends its own lists when frames arrive
+                    smooth_frames_curr = list(frame_store.smooth_frames_curr)
+                    smooth_frames_nex = list(frame_store.smooth_frames_nex)
+                    # Frames are placed at the time of their iteration, not spread over the whole laser
+                    interpolated_Time, interpolated_AX, interpolated_AY = frame_store.timeline(
+                        np.array(frame_store.smooth_iterations), (laser_iter, Time, AX, AY), T)
+            else:
+                # Process data ---------------------------
+                with profile_stage("Current/Nex animation", "transform"):
+                    interpolated_data_currents = {}
+                    interpolated_data_nex = {}
             
-            total_dirs = len(time_dirs)
-            for i, time_dir in enumerate(time_dirs):
-                # Current data ====================
-                file_path_X = os.path.join(base_dir_iter, time_dir, file_name_X)
-                file_path_Y = os.path.join(base_dir_iter, time_dir, file_name_Y)
+                    total_dirs = len(time_dirs)
+                    for i, time_dir in enumerate(time_dirs):
+                        # Current data ====================
+                        file_path_X = os.path.join(base_dir_iter, time_dir, file_name_X)
+                        file_path_Y = os.path.join(base_dir_iter, time_dir, file_name_Y)
                 
-                if os.path.exists(file_path_X) and os.path.exists(file_path_Y):
-                    interpolated_currents = self.load_and_interpolate_data_curr(
-                        file_path_X, file_path_Y, x_grid, y_grid)
-                    interpolated_data_currents[time_dir] = interpolated_currents
+                        if os.path.exists(file_path_X) and os.path.exists(file_path_Y):
+                            interpolated_currents = self.load_and_interpolate_data_curr(
+                                file_path_X, file_path_Y, x_grid, y_grid)
+                            interpolated_data_currents[time_dir] = interpolated_currents
                 
-                # Nex data ========================
-                file_path_nex = os.path.join(base_dir_iter, time_dir, file_name_nex)
-                if os.path.exists(file_path_nex):
-                    interpolated_nex = self.load_and_interpolate_data_nex(
-                        file_path_nex, x_grid, y_grid)
-                    interpolated_data_nex[time_dir] = interpolated_nex
+                        # Nex data ========================
+                        file_path_nex = os.path.join(base_dir_iter, time_dir, file_name_nex)
+                        if os.path.exists(file_path_nex):
+                            interpolated_nex = self.load_and_interpolate_data_nex(
+                                file_path_nex, x_grid, y_grid)
+                            interpolated_data_nex[time_dir] = interpolated_nex
                 
-                progress = 30 + int((i / total_dirs) * 40)
-                self.progress_updated.emit(progress)
+                        progress = 30 + int((i / total_dirs) * 40)
+                        self.progress_updated.emit(progress)
             
-            self.status_updated.emit("Creating interpolated frames...")
-            self.progress_updated.emit(70)
+                self.status_updated.emit("Creating interpolated frames...")
+                self.progress_updated.emit(70)
             
-            # Create arrays and interpolated frames ----------------
-            arrays_curr = [interpolated_data_currents[time_dir] for time_dir in time_dirs 
-                          if time_dir in interpolated_data_currents]
-            arrays_nex = [interpolated_data_nex[time_dir] for time_dir in time_dirs 
-                         if time_dir in interpolated_data_nex]
+                # Create arrays and interpolated frames ----------------
+                with profile_stage("Current/Nex animation", "post-process"):
+                    arrays_curr = [interpolated_data_currents[time_dir] for time_dir in time_dirs 
+                                  if time_dir in interpolated_data_currents]
+                    arrays_nex = [interpolated_data_nex[time_dir] for time_dir in time_dirs 
+                                 if time_dir in interpolated_data_nex]
             
-            smooth_frames_curr = self.interpolate_frames(arrays_curr, num_interpolated_frames)
-            smooth_frames_nex = self.interpolate_frames(arrays_nex, num_interpolated_frames)
+                    smooth_frames_curr = self.interpolate_frames(arrays_curr, num_interpolated_frames)
+                    smooth_frames_nex = self.interpolate_frames(arrays_nex, num_interpolated_frames)
             
-            # Interpolate time and vector potential ----------------
-            target_length = len(smooth_frames_curr)
-            interpolated_Time, interpolated_AX, interpolated_AY = self.interpolate_TIME_and_AX_and_AY(Time, AX, AY, target_length)
-            interpolated_Time = interpolated_Time / T
+                    # Interpolate time and vector potential ----------------
+                    target_length = len(smooth_frames_curr)
+                    interpolated_Time, interpolated_AX, interpolated_AY = self.interpolate_TIME_and_AX_and_AY(Time, AX, AY, target_length)
+                    interpolated_Time = interpolated_Time / T
             
             self.status_updated.emit("Creating visualization...")
             self.progress_updated.emit(90)
             
             #-------------------------------------------------------
             # Create the figure
-            fig = self.create_figure(k_x, k_y, interpolated_Time, interpolated_AX, interpolated_AY, smooth_frames_curr, smooth_frames_nex) ###>>>>>>>>>>>>>>>>>>
+            with profile_stage("Current/Nex animation", "plot"):
+                fig = self.create_figure(k_x, k_y, interpolated_Time, interpolated_AX, interpolated_AY, smooth_frames_curr, smooth_frames_nex) ###>>>>>>>>>>>>>>>>>>
 
             fig.animation_data['save_animation'] = save_animation
             fig.animation_data['format'] = save_format
             fig.animation_data['save_dir'] = save_dir
+            if frame_store is not None:
+                # Kept off animation_data, which the saver thread deep-copies
+                fig.frame_store = frame_store
+                fig.watch_params = {'base_dir_iter': base_dir_iter, 'base_dir_laser': base_dir_laser, 'T': T,
+                                     'laser_tail': laser_tail}
 
             #-------------------------------------------------------
 
@@ -178,30 +224,13 @@ class CurrentNexAnalysisThread(QThread):
         currents_Y = raw_data_Y[:, 2]
         currents = np.sqrt(currents_X**2 + currents_Y**2)
 
-        interpolated_currents = griddata(
-            points=(kx, ky),
-            values=currents,
-            xi=(x_grid, y_grid),
-            method='cubic'
-        )
-        if np.isnan(interpolated_currents).any():
-            interpolated_currents = np.nan_to_num(interpolated_currents, nan=0.0)
-        return interpolated_currents
+        return self.interpolator(kx, ky, currents, x_grid, y_grid)
     
     def load_and_interpolate_data_nex(self, file_path_nex, x_grid, y_grid):
         raw_data_nex = np.loadtxt(file_path_nex, skiprows=1)
         kx, ky, nex = raw_data_nex[:, 0], raw_data_nex[:, 1], raw_data_nex[:, 2]
 
-        interpolated_nex = griddata(
-            points=(kx, ky),
-            values=nex,
-            xi=(x_grid, y_grid),
-            method='cubic'
-        )
-
-        if np.isnan(interpolated_nex).any():
-            interpolated_nex = np.nan_to_num(interpolated_nex, nan=0.0)
-        return interpolated_nex
+        return self.interpolator(kx, ky, nex, x_grid, y_grid)
     
     def interpolate_frames(self, arrays, num_interpolated_frames):
         num_arrays = len(arrays)
@@ -236,7 +265,7 @@ class CurrentNexAnalysisThread(QThread):
 
         # Upper subplot (3D)
         ax1 = fig.add_axes([0.05, 0.55, 0.9, 0.45], projection='3d') # [left, bottom, width, height]
-        ax1.plot(interpolated_Time, interpolated_AX, interpolated_AY, 'k', linewidth=3.5)
+        trajectory, = ax1.plot(interpolated_Time, interpolated_AX, interpolated_AY, 'k', linewidth=3.5)
 
         ax1.set_xlabel('Time [o.c.]')
         ax1.set_ylabel(r'$\mathregular{A_x\ [a.u.]}$')
@@ -275,6 +304,7 @@ class CurrentNexAnalysisThread(QThread):
             'smooth_frames_nex': smooth_frames_nex,
             'k_x': k_x,
             'k_y': k_y,
+            'trajectory': trajectory,
             'marker': marker,
             'coordinate_text': coordinate_text,
             'img1': img1,
@@ -621,6 +651,12 @@ class CurrentNexDialog(QDialog):
         options_layout.addWidget(QLabel("Save Directory"))
         options_layout.addWidget(save_dir_container)
 
+        # Follow a running simulation
+        self.watch_checkbox = QCheckBox("Watch for new td.* outputs")
+        self.watch_checkbox.setToolTip("Keep polling the iteration directory and append new frames to the animation")
+        self.watch_checkbox.setChecked(previous_input_current_nex.get("watch", False))
+        options_layout.addWidget(self.watch_checkbox)
+
         ###------------------------------------
         options_group.setLayout(options_layout)
         layout.addWidget(options_group)
@@ -722,6 +758,7 @@ class CurrentNexDialog(QDialog):
                 'A': self.grid_spinbox.value(),
                 
                 'num_interpolated_frames': self.interp_spinbox.value(),
+                'watch': self.watch_checkbox.isChecked(),
             }
             
             save_animation = self.save_animation_checkbox.isChecked()
@@ -0,0 +1,288 @@
+# electron_dynamics/td_watcher.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import io
+import os
+import time
+import numpy as np
+from scipy.spatial import Delaunay
+from scipy.interpolate import CloughTocher2DInterpolator
+from PyQt5.QtCore import QObject, QThread, QTimer, pyqtSignal
+##----------------------------------------------------
+# k-space frames of a running Octopus simulation. Every td.* output uses the
+# same k-points, so the Delaunay triangulation behind the cubic interpolation
+# is built once and reused; a watcher polls the iteration directory and
+# ingests only td.* folders it has not seen yet.
+##----------------------------------------------------
+FILE_NAME_X = 'current_kpt-x.kz=0'
+FILE_NAME_Y = 'current_kpt-y.kz=0'
+FILE_NAME_NEX = 'n_excited_el_kpt.kz=0'
+# Pause between the two size checks of the first ingest [s]
+SETTLE_SECONDS = 1.0
+##----------------------------------------------------
+class KGridInterpolator:
+    """
+    Cubic (Clough-Tocher) interpolation of scattered k-point values onto a
+    regular grid, as griddata(..., method='cubic') with NaN -> 0, but with
+    the triangulation cached for a fixed set of k-points.
+    """
+    def __init__(self):
+        self.points = None
+        self.triangulation = None
+
+    def __call__(self, kx, ky, values, x_grid, y_grid):
+        points = np.column_stack((kx, ky))
+        if self.points is None or self.points.shape != points.shape or not np.array_equal(self.points, points):
+            self.points = points
+            self.triangulation = Delaunay(points)
+        interpolated = CloughTocher2DInterpolator(self.triangulation, values, fill_value=np.nan)(x_grid, y_grid)
+        if np.isnan(interpolated).any():
+            interpolated = np.nan_to_num(interpolated, nan=0.0)
+        return interpolated
+
+def list_td_dirs(base_dir_iter):
+    # td.* directories in iteration order (Octopus pads the iteration number)
+    with os.scandir(base_dir_iter) as entries:
+        return sorted(entry.name for entry in entries if entry.name.startswith('td.') and entry.is_dir())
+
+def frame_files(base_dir_iter, time_dir):
+    return tuple(os.path.join(base_dir_iter, time_dir, name) for name in (FILE_NAME_X, FILE_NAME_Y, FILE_NAME_NEX))
+
+##----------------------------------------------------
+def td_iteration(time_dir):
+    # td.0000100 -> 100
+    return int(time_dir.split('.', 1)[1])
+
+def frame_sizes(base_dir_iter, time_dir):
+    # Sizes of the three k-point files, None while one of them is missing
+    paths = frame_files(base_dir_iter, time_dir)
+    if not all(os.path.exists(path) for path in paths):
+        return None
+    return tuple(os.path.getsize(path) for path in paths)
+
+def stable_dirs(base_dir_iter, time_dirs, pending):
+    """
+    The leading td.* directories whose k-point files exist and kept the sizes
+    recorded in pending (name -> sizes) at the previous check; pending is
+    updated for the others. Frames must stay in order, so a directory that is
+    still being written holds back the later ones.
+    """
+    ready, in_order = [], True
+    for name in time_dirs:
+        sizes = frame_sizes(base_dir_iter, name)
+        if sizes is not None and pending.get(name) == sizes and in_order:
+            ready.append(name)
+            del pending[name]
+        else:
+            pending[name] = sizes
+            in_order = False
+    return ready
+
+def settled_dirs(base_dir_iter, time_dirs, pause=SETTLE_SECONDS):
+    # stable_dirs() over two size checks pause seconds apart (first ingest)
+    pending = {}
+    stable_dirs(base_dir_iter, time_dirs, pending)
+    time.sleep(pause)
+    return stable_dirs(base_dir_iter, time_dirs, pending)
+
+class LaserTail:
+    """
+    Follows the growing Octopus laser file (columns: iter, t, Ax1, Ay1, _,
+    Ax2, Ay2). read() parses only the complete rows appended since the
+    previous call and returns iteration, time and total vector potential
+    (AX, AY) of all rows read so far.
+    """
+    def __init__(self, base_dir_laser):
+        self.file_path = os.path.join(base_dir_laser, 'laser')
+        self.offset = 0
+        self.rows = None
+
+    def read(self):
+        size = os.path.getsize(self.file_path)
+        if size < self.offset:
+            raise ValueError("The laser file shrank; the run was restarted.")
+        if size > self.offset:
+            with open(self.file_path, "rb") as f:
+                f.seek(self.offset)
+                chunk = f.read(size - self.offset)
+            end = chunk.rfind(b"\n")
+            if end >= 0:
+                self.offset += end + 1
+                new_rows = np.loadtxt(io.BytesIO(chunk[:end + 1]), comments="#", ndmin=2)
+                if new_rows.size:
+                    self.rows = new_rows if self.rows is None else np.vstack((self.rows, new_rows))
+        if self.rows is None:
+            raise ValueError(f"The laser file has no complete rows yet: {self.file_path}")
+        rows = self.rows
+        return rows[:, 0], rows[:, 1], rows[:, 2] + rows[:, 5], rows[:, 3] + rows[:, 6]
+
+class FrameStore:
+    """
+    Interpolated current and Nex frames of the td.* outputs ingested so far,
+    plus the smooth (time-interpolated) frames shown by the animation.
+    A new td.* output only adds the smooth frames between the previous last
+    frame and itself, so earlier frames are never recomputed; the smooth
+    frames equal interpolate_frames() over all outputs.
+    """
+    def __init__(self, x_grid, y_grid, num_interpolated_frames, interpolator=None):
+        self.x_grid = x_grid
+        self.y_grid = y_grid
+        self.num_interpolated_frames = num_interpolated_frames
+        self.interpolator = interpolator or KGridInterpolator()
+        self.names = []
+        self.last_curr = None
+        self.last_nex = None
+        self.smooth_frames_curr = []
+        self.smooth_frames_nex = []
+        self.smooth_iterations = []
+
+    def load_frame(self, base_dir_iter, time_dir):
+        path_x, path_y, path_nex = frame_files(base_dir_iter, time_dir)
+        raw_x = np.loadtxt(path_x, skiprows=1)
+        raw_y = np.loadtxt(path_y, skiprows=1)
+        raw_nex = np.loadtxt(path_nex, skiprows=1)
+        currents = np.sqrt(raw_x[:, 2]**2 + raw_y[:, 2]**2)
+        curr = self.interpolator(raw_x[:, 0], raw_y[:, 1], currents, self.x_grid, self.y_grid)
+        nex = self.interpolator(raw_nex[:, 0], raw_nex[:, 1], raw_nex[:, 2], self.x_grid, self.y_grid)
+        return curr, nex
+
+    def ingest(self, base_dir_iter, time_dirs):
+        """
+        Loads the given td.* directories (in order) and returns the smooth
+        frames (current, Nex) and their iteration numbers that extend the
+        animation.
+        """
+        added_curr, added_nex, added_iterations = [], [], []
+        for time_dir in time_dirs:
+            curr, nex = self.load_frame(base_dir_iter, time_dir)
+            iteration = td_iteration(time_dir)
+            if self.names:
+                # The s = 0 end of the segment is the previous frame, already stored
+                previous = td_iteration(self.names[-1])
+                for s in np.linspace(0, 1, self.num_interpolated_frames, endpoint=False)[1:]:
+                    added_curr.append(self.last_curr * (1 - s) + curr * s)
+                    added_nex.append(self.last_nex * (1 - s) + nex * s)
+                    added_iterations.append(previous * (1 - s) + iteration * s)
+            added_curr.append(curr)
+            added_nex.append(nex)
+            added_iterations.append(float(iteration))
+            self.names.append(time_dir)
+            self.last_curr, self.last_nex = curr, nex
+        self.smooth_frames_curr.extend(added_curr)
+        self.smooth_frames_nex.extend(added_nex)
+        self.smooth_iterations.extend(added_iterations)
+        return added_curr, added_nex, np.array(added_iterations)
+
+    @staticmethod
+    def timeline(iterations, laser, T):
+        """
+        Time [o.c.], AX and AY of the laser at the (fractional) iterations of
+        the smooth frames; laser = LaserTail(...).read().
+        """
+        laser_iter, Time, AX, AY = laser
+        return (np.interp(iterations, laser_iter, Time) / T,
+                np.interp(iterations, laser_iter, AX), np.interp(iterations, laser_iter, AY))
+
+##----------------------------------------------------
+class FrameIngestThread(QThread):
+    """
+    Loads and interpolates the given td.* directories into the FrameStore and
+    reads the new laser rows off the GUI thread; emits frames_ready with the
+    arguments of TdDirectoryWatcher.frames_added.
+    """
+    frames_ready = pyqtSignal(object, object, object, object, object)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, frame_store, base_dir_iter, time_dirs, laser_tail, T, parent=None):
+        super().__init__(parent)
+        self.store = frame_store
+        self.base_dir_iter = base_dir_iter
+        self.time_dirs = time_dirs
+        self.laser = laser_tail
+        self.T = T
+
+    def run(self):
+        try:
+            frames_curr, frames_nex, iterations = self.store.ingest(self.base_dir_iter, self.time_dirs)
+            Time, AX, AY = self.store.timeline(iterations, self.laser.read(), self.T)
+            self.frames_ready.emit(frames_curr, frames_nex, Time, AX, AY)
+        except (OSError, ValueError) as e:
+            self.error_occurred.emit(str(e))
+
+class TdDirectoryWatcher(QObject):
+    """
+    Polls the iteration directory every interval_ms. A new td.* directory is
+    ingested once its three k-point files exist and their sizes did not change
+    between two polls (Octopus may still be writing them). The timer only
+    looks for new directories; loading, interpolation and the laser rows
+    appended since the last frames are handled by a FrameIngestThread, one at
+    a time. Emits frames_added(smooth current frames, smooth Nex frames,
+    Time [o.c.], AX, AY) for the new frames only.
+    """
+    frames_added = pyqtSignal(object, object, object, object, object)
+    error_occurred = pyqtSignal(str)
+
+    def __init__(self, base_dir_iter, base_dir_laser, frame_store, T, interval_ms=2000, laser_tail=None, parent=None):
+        super().__init__(parent)
+        self.base_dir_iter = base_dir_iter
+        self.base_dir_laser = base_dir_laser
+        # Continues from the rows read for the first frames
+        self.laser = laser_tail or LaserTail(base_dir_laser)
+        self.store = frame_store
+        self.T = T
+        self._pending = {}          # name -> file sizes seen at the previous poll
+        self.worker = None
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.poll)
+        self.interval_ms = interval_ms
+
+    def start(self):
+        self.timer.start(self.interval_ms)
+
+    def stop(self):
+        self.timer.stop()
+        if self.worker is not None:
+            # The store must not be torn down under a running ingest
+            self.worker.wait()
+
+    def ready_dirs(self):
+        known = set(self.store.names)
+        last = self.store.names[-1] if self.store.names else ''
+        names = [name for name in list_td_dirs(self.base_dir_iter) if name not in known and name >= last]
+        return stable_dirs(self.base_dir_iter, names, self._pending)
+
+    def poll(self):
+        if self.worker is not None and self.worker.isRunning():
+            # The store only knows the frames being ingested once the worker is done
+            return
+        try:
+            ready = self.ready_dirs()
+        except OSError as e:
+            self._fail(str(e))
+            return
+        if not ready:
+            return
+        self.worker = FrameIngestThread(self.store, self.base_dir_iter, ready, self.laser, self.T, self)
+        self.worker.frames_ready.connect(self.frames_added.emit)
+        self.worker.error_occurred.connect(self._fail)
+        self.worker.start()
+
+    def _fail(self, message):
+        self.timer.stop()
+        self.error_occurred.emit(message)
@@ -0,0 +1,157 @@
+# gs/band_analysis.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+#--------------------------------
+from attoscience_studio.helper_functions.constants import PhysicalConstants
+##----------------------------------------------------
+# Band-structure analysis on the (Nk, Nbands) eigenvalue array along a k-path:
+# band edges and gaps, effective masses from the finite-difference curvature
+# and reordering of the bands by connectivity. Energies are in eV as returned
+# by read_band_structure(). Octopus normalises the path coordinate to 0..1, so
+# the masses need the cartesian path length [bohr^-1], rebuilt by
+# path_length() from the reduced k-points and the reciprocal lattice; without
+# it no masses are reported.
+##----------------------------------------------------
+def band_edges(kpoints, bands, fermi_energy_ev):
+    """
+    Valence band maximum and conduction band minimum around the Fermi energy.
+
+    Returns a dict: vbm, cbm [eV], their k indices and band indices, the
+    (fundamental) band_gap, gap_type ('Direct' when the VBM and CBM are at the
+    same k-point) and the smallest direct gap with its k index.
+    """
+    bands = np.asarray(bands, dtype=float)
+    below = np.where(bands < fermi_energy_ev, bands, -np.inf)
+    above = np.where(bands > fermi_energy_ev, bands, np.inf)
+    vb_at_k = below.max(axis=1)
+    cb_at_k = above.min(axis=1)
+    if not np.isfinite(vb_at_k).any() or not np.isfinite(cb_at_k).any():
+        raise ValueError("Band data does not span the Fermi energy.")
+
+    vbm_k = int(np.argmax(vb_at_k))
+    cbm_k = int(np.argmin(cb_at_k))
+    direct_gaps = cb_at_k - vb_at_k
+    direct_k = int(np.argmin(direct_gaps))
+    return {
+        "vbm": vb_at_k[vbm_k], "cbm": cb_at_k[cbm_k],
+        "vbm_k": vbm_k, "cbm_k": cbm_k,
+        "vbm_band": int(np.argmax(below[vbm_k])), "cbm_band": int(np.argmin(above[cbm_k])),
+        "vbm_kpoint": kpoints[vbm_k], "cbm_kpoint": kpoints[cbm_k],
+        "band_gap": cb_at_k[cbm_k] - vb_at_k[vbm_k],
+        "gap_type": 'Direct' if kpoints[vbm_k] == kpoints[cbm_k] else 'Indirect',
+        "direct_gap": direct_gaps[direct_k], "direct_gap_k": direct_k,
+    }
+
+def band_curvature(kpoints, bands):
+    """
+    Second derivative d2E/dk2 (Nk, Nbands) with the three-point formula on the
+    (possibly non-uniform) path. At the ends of the path the band is taken as
+    symmetric, E(k0 - h) = E(k0 + h), as at a high-symmetry point; points next
+    to a path discontinuity (repeated coordinate) are NaN.
+    """
+    k = np.asarray(kpoints, dtype=float)
+    E = np.asarray(bands, dtype=float)
+    h = np.diff(k)
+    h0 = np.concatenate(([h[0]], h))[:, None]
+    h1 = np.concatenate((h, [h[-1]]))[:, None]
+    previous = np.concatenate((E[1:2], E[:-1]))
+    following = np.concatenate((E[1:], E[-2:-1]))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        curvature = 2 * (h0 * following - (h0 + h1) * E + h1 * previous) / (h0 * h1 * (h0 + h1))
+    curvature[(h0[:, 0] == 0) | (h1[:, 0] == 0)] = np.nan
+    return curvature
+
+def path_length(reduced_kpoints, reciprocal):
+    """
+    Cumulative cartesian length [bohr^-1] along the k-path from the reduced
+    k-points (Nk, 3) and the reciprocal lattice vectors (rows, bohr^-1).
+    """
+    k = np.asarray(reduced_kpoints, dtype=float) @ np.asarray(reciprocal, dtype=float)
+    return np.concatenate(([0.0], np.cumsum(np.linalg.norm(np.diff(k, axis=0), axis=1))))
+
+def effective_masses(path, bands, k_index, band_index, energy_unit=PhysicalConstants.Ip_HeV):
+    """
+    Effective mass m*/m_e = 1 / (d2E/dk2 [Ha bohr^2]) of the given bands at
+    the given k indices (arrays of equal length or scalars); path is the
+    cartesian path length [bohr^-1] from path_length().
+    """
+    curvature = band_curvature(path, bands)[k_index, band_index] / energy_unit
+    with np.errstate(divide='ignore'):
+        return 1.0 / curvature
+
+def edge_mass(path, bands, k_index, band_index, carrier):
+    # Mass of a hole (band maximum) or electron (band minimum), reported
+    # positive; NaN when the curvature has the wrong sign for that band edge
+    sign = -1.0 if carrier == "hole" else 1.0
+    mass = sign * effective_masses(path, bands, k_index, band_index)
+    return float(mass) if mass > 0 else np.nan
+
+def connect_bands(bands):
+    """
+    Reorders the bands at every k-point so that each column follows one band
+    through crossings: the energies at k + 1 are matched to the linear
+    extrapolation from k - 1 and k with a minimum-cost assignment.
+    Returns the reordered bands and the permutation (Nk, Nbands) with
+    connected[k] = bands[k, order[k]].
+    """
+    bands = np.asarray(bands, dtype=float)
+    n_k, n_bands = bands.shape
+    order = np.empty((n_k, n_bands), dtype=np.int64)
+    order[0] = np.arange(n_bands)
+    connected = np.empty_like(bands)
+    connected[0] = bands[0]
+    for k in range(1, n_k):
+        predicted = 2 * connected[k - 1] - connected[k - 2] if k > 1 else connected[k - 1]
+        _, columns = linear_sum_assignment(np.abs(predicted[:, None] - bands[k][None, :]))
+        order[k] = columns
+        connected[k] = bands[k, columns]
+    return connected, order
+
+##----------------------------------------------------
+def analyze_bands(kpoints, bands, fermi_energy_ev, path=None):
+    """
+    Band edges, gaps and the effective masses of the band edges: holes at the
+    VBM and electrons at the CBM. The masses need the cartesian path length
+    (path_length()); they are NaN when path is None.
+    """
+    result = band_edges(kpoints, bands, fermi_energy_ev)
+    result["masses_computed"] = path is not None
+    if path is None:
+        result["hole_mass"] = result["electron_mass"] = np.nan
+    else:
+        result["hole_mass"] = edge_mass(path, bands, result["vbm_k"], result["vbm_band"], "hole")
+        result["electron_mass"] = edge_mass(path, bands, result["cbm_k"], result["cbm_band"], "electron")
+    return result
+
+def format_mass(mass):
+    return f"{mass:.4f}" if not np.isnan(mass) else "undefined (wrong-sign curvature at the band edge)"
+
+def format_band_analysis(result):
+    return (
+        f">>> Band gap [eV]: {result['band_gap']:.4f} ({result['gap_type']})\n"
+        f">>> VBM: {result['vbm']:.4f} eV at k-point {result['vbm_kpoint']} (band {result['vbm_band'] + 1})\n"
+        f">>> CBM: {result['cbm']:.4f} eV at k-point {result['cbm_kpoint']} (band {result['cbm_band'] + 1})\n"
+        f">>> Smallest direct gap [eV]: {result['direct_gap']:.4f} at k index {result['direct_gap_k']}\n"
+        + (f">>> Effective masses [m_e]: hole {format_mass(result['hole_mass'])}, "
+           f"electron {format_mass(result['electron_mass'])}\n"
+           if result["masses_computed"] else
+           ">>> Effective masses: not computed (the reciprocal lattice of parser.log is needed)\n")
+    )
@@ -0,0 +1,125 @@
+# gs/band_dos.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import scipy.fft
+##----------------------------------------------------
+# Density of states from band eigenvalues. All eigenvalues are deposited on a
+# fine energy grid (linear weighting between the two nearest grid points,
+# one bincount pass per chunk), the histogram is transformed once and every
+# broadening is applied as the analytic Fourier transform of its kernel
+# (Gaussian exp(-s^2 w^2 / 2), Lorentzian exp(-g |w|)) before one inverse FFT.
+##----------------------------------------------------
+BROADENINGS = ("gaussian", "lorentzian")
+# Padding of the energy grid in units of the broadening, so the periodic
+# convolution does not wrap around
+PAD_WIDTHS = {"gaussian": 8, "lorentzian": 50}
+DEFAULT_CHUNK_SIZE = 2**22
+##----------------------------------------------------
+def eigenvalue_histogram(eigenvalues, e_min, de, n_energies, weights=None, chunk_size=DEFAULT_CHUNK_SIZE):
+    """
+    Eigenvalues deposited on the grid e_min + n de (n < n_energies); every
+    eigenvalue splits its weight linearly between its two grid points so
+    the first moment is preserved. Returns the weights per grid point.
+    """
+    eigenvalues = np.asarray(eigenvalues, dtype=float)
+    if weights is not None:
+        weights = np.broadcast_to(np.asarray(weights, dtype=float), eigenvalues.shape).ravel()
+    eigenvalues = eigenvalues.ravel()
+    histogram = np.zeros(n_energies)
+    for first in range(0, eigenvalues.size, chunk_size):
+        position = (eigenvalues[first:first + chunk_size] - e_min) / de
+        lower = np.floor(position).astype(np.int64)
+        upper_weight = position - lower
+        weight = 1.0 if weights is None else weights[first:first + chunk_size]
+        inside = (lower >= 0) & (lower < n_energies - 1)
+        histogram += np.bincount(lower[inside], weights=((1 - upper_weight) * weight)[inside], minlength=n_energies)
+        histogram += np.bincount(lower[inside] + 1, weights=(upper_weight * weight)[inside], minlength=n_energies)
+    return histogram
+
+def broaden(histogram, de, widths, kind="gaussian", workers=-1):
+    """
+    Convolves the histogram with normalised kernels of the given widths
+    (Gaussian standard deviation or Lorentzian half width, in the energy
+    unit) by FFT; one forward transform for all widths.
+    Returns (n_widths, n_energies) in states per energy unit.
+    """
+    if kind not in BROADENINGS:
+        raise ValueError(f"Unknown broadening '{kind}'; use one of {', '.join(BROADENINGS)}.")
+    n = len(histogram)
+    n_fft = scipy.fft.next_fast_len(n, real=True)
+    spectrum = scipy.fft.rfft(histogram, n=n_fft, workers=workers)
+    w = 2 * np.pi * scipy.fft.rfftfreq(n_fft, de)
+    widths = np.atleast_1d(np.asarray(widths, dtype=float))
+    if kind == "gaussian":
+        transfer = np.exp(-0.5 * (widths[:, None] * w[None, :])**2)
+    else:
+        transfer = np.exp(-widths[:, None] * w[None, :])
+    return scipy.fft.irfft(spectrum[None, :] * transfer, n=n_fft, axis=1, workers=workers)[:, :n] / de
+
+def dos_from_bands(bands, widths, kind="gaussian", de=None, band_range=None, energy_range=None, weights=None):
+    """
+    DOS of the eigenvalues bands (Nk, Nbands) for several broadenings.
+
+    Parameters:
+    - widths: Broadening(s) in the energy unit of bands.
+    - kind: 'gaussian' (widths = standard deviations) or 'lorentzian' (half widths).
+    - de: Grid step (default: a tenth of the smallest width).
+    - band_range: (first, last) band indices (inclusive) to include.
+    - energy_range: (e_min, e_max) of the returned grid (default: all
+      eigenvalues plus the padding).
+    - weights: k-point weights (Nk,), normalised to one (default: uniform).
+
+    Returns a dict: energy (n_energies,), dos (n_widths, n_energies) in
+    states per energy unit per cell, integrating to the number of bands,
+    widths and kind.
+    """
+    bands = np.asarray(bands, dtype=float)
+    if band_range is not None:
+        bands = bands[:, band_range[0]:band_range[1] + 1]
+    if bands.size == 0:
+        raise ValueError("No eigenvalues in the selected band range.")
+    widths = np.atleast_1d(np.asarray(widths, dtype=float))
+    if np.any(widths <= 0):
+        raise ValueError("Broadening widths must be positive.")
+    n_k = bands.shape[0]
+    de = np.min(widths) / 10 if de is None else de
+
+    pad = PAD_WIDTHS[kind] * np.max(widths)
+    e_min, e_max = np.min(bands) - pad, np.max(bands) + pad
+    n_energies = int(np.ceil((e_max - e_min) / de)) + 1
+    if weights is None:
+        histogram = eigenvalue_histogram(bands, e_min, de, n_energies) / n_k
+    else:
+        weights = np.asarray(weights, dtype=float)
+        histogram = eigenvalue_histogram(bands, e_min, de, n_energies, (weights / np.sum(weights))[:, None])
+    dos = broaden(histogram, de, widths, kind)
+    energy = e_min + de * np.arange(n_energies)
+
+    if energy_range is not None:
+        keep = (energy >= energy_range[0]) & (energy <= energy_range[1])
+        energy, dos = energy[keep], dos[:, keep]
+    return {"energy": energy, "dos": dos, "widths": widths, "kind": kind}
+
+def format_band_dos(result, n_kpoints, n_bands):
+    lines = [f">>> {result['kind'].capitalize()} broadening of {n_bands} bands x {n_kpoints} k-points "
+             f"({n_bands * n_kpoints} eigenvalues)"]
+    for width, dos in zip(result["widths"], result["dos"]):
+        lines.append(f">>> width {width:g}: max DOS {np.max(dos):.4f}, integral {np.trapz(dos, result['energy']):.4f}")
+    return "\n".join(lines) + "\n"
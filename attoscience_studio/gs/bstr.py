@@ -37,9 +37,15 @@ from scipy.integrate import trapezoid, quad
 from datetime import datetime
 from qtconsole.rich_jupyter_widget import RichJupyterWidget
 from attoscience_studio.resources_rc import *
+from attoscience_studio.utils.profiler import profile_stage
 #--------------------------------
 from attoscience_studio.helper_functions.constants import PhysicalConstants
+from attoscience_studio.gs.band_analysis import analyze_bands, connect_bands, format_band_analysis, format_mass, path_length
+from attoscience_studio.electron_dynamics.bz_geometry import lattice_from_parser_log, reciprocal_lattice
+from attoscience_studio.gs.energy_lines import EnergyLines, add_reference_slider
 Ip_HeV = PhysicalConstants.Ip_HeV
+# Range of the interactive Fermi-level shift [eV]
+FERMI_SHIFT_EV = 2.0
 ##----------------------------------------------------
 def read_band_structure(file_path):
     try:
@@ -54,73 +60,60 @@ def read_band_structure(file_path):
         return kpoints, bands
     except Exception as e:
         raise ValueError(f"Failed to read band structure: {e}")
+
+def read_reduced_kpoints(file_path):
+    # Columns 1-3 of the bandstructure file: kx, ky, kz in reduced coordinates
+    try:
+        return np.loadtxt(file_path, usecols=(1, 2, 3), ndmin=2)
+    except Exception as e:
+        raise ValueError(f"Failed to read the reduced k-points: {e}")
 ##----------------------------------------------------
-def detect_band_gap(kpoints, bands, fermi_energy_ev):
+def detect_band_gap(kpoints, bands, fermi_energy_ev, path=None):
     try:
-        valence_band_max = None
-        conduction_band_min = None
-        vbm_kpoint = None
-        cbm_kpoint = None
-
-        for idx, band_energies in enumerate(bands):
-            below_fermi = band_energies[band_energies < fermi_energy_ev]
-            above_fermi = band_energies[band_energies > fermi_energy_ev]
-
-            if below_fermi.size > 0:
-                vb_at_k = np.max(below_fermi)
-                if valence_band_max is None or vb_at_k > valence_band_max:
-                    valence_band_max = vb_at_k
-                    vbm_kpoint = kpoints[idx]
-
-            if above_fermi.size > 0:
-                cb_at_k = np.min(above_fermi)
-                if conduction_band_min is None or cb_at_k < conduction_band_min:
-                    conduction_band_min = cb_at_k
-                    cbm_kpoint = kpoints[idx]
-
-        if valence_band_max is None or conduction_band_min is None:
-            raise ValueError("Band data does not span the Fermi energy.")
-
-        band_gap = conduction_band_min - valence_band_max
-        gap_type = 'Direct' if vbm_kpoint == cbm_kpoint else 'Indirect'
-
-        result_dialog = QDialog()
-        result_dialog.setWindowTitle("Band Gap Information")
-        layout = QVBoxLayout()
-        layout.addWidget(QLabel(f"Band Gap: {band_gap:.2f} eV"))
-        layout.addWidget(QLabel(f"Gap Type: {gap_type}"))
-        layout.addWidget(QLabel(f"VBM at K-point {vbm_kpoint}, Energy: {valence_band_max:.2f} eV"))
-        layout.addWidget(QLabel(f"CBM at K-point {cbm_kpoint}, Energy: {conduction_band_min:.2f} eV"))
-        ok_button = QPushButton("OK")
-        ok_button.clicked.connect(result_dialog.accept)
-        layout.addWidget(ok_button)
-        result_dialog.setLayout(layout)
-        result_dialog.exec_()
-
+        return analyze_bands(kpoints, bands, fermi_energy_ev, path)
     except Exception as e:
-        print(f"Exception: {e}")
         raise ValueError(f"Failed to detect band gap: {e}")
+
+def show_band_gap(result):
+    result_dialog = QDialog()
+    result_dialog.setWindowTitle("Band Gap Information")
+    layout = QVBoxLayout()
+    layout.addWidget(QLabel(f"Band Gap: {result['band_gap']:.2f} eV"))
+    layout.addWidget(QLabel(f"Gap Type: {result['gap_type']}"))
+    layout.addWidget(QLabel(f"VBM at K-point {result['vbm_kpoint']}, Energy: {result['vbm']:.2f} eV"))
+    layout.addWidget(QLabel(f"CBM at K-point {result['cbm_kpoint']}, Energy: {result['cbm']:.2f} eV"))
+    layout.addWidget(QLabel(f"Smallest Direct Gap: {result['direct_gap']:.2f} eV"))
+    if result["masses_computed"]:
+        layout.addWidget(QLabel(f"Effective Masses [m_e]: hole {format_mass(result['hole_mass'])}, "
+                                f"electron {format_mass(result['electron_mass'])}"))
+    ok_button = QPushButton("OK")
+    ok_button.clicked.connect(result_dialog.accept)
+    layout.addWidget(ok_button)
+    result_dialog.setLayout(layout)
+    result_dialog.exec_()
 ##---------------------------------------------------- 
 def plot_band_structure(kpoints, bands, fermi_energy_ev, num_bands, Ip_HeV, plot_settings):
-    plt.figure()
-    for i in range(min(num_bands, bands.shape[1])):
-        band = bands[:, i]
-        plt.plot(kpoints, (band) - fermi_energy_ev, linewidth=plot_settings.get("line_thickness", 1.2),
-                 color=plot_settings.get("line_color", "black"))
-    plt.xlabel(plot_settings.get("x_label", "Wave vector"))
-    plt.ylabel(plot_settings.get("y_label", "Energy [eV]"))
-    plt.title(plot_settings.get("graph_title", "Band Structure"))
-    plt.grid(True)
-    plt.xlim(left=plot_settings.get("x_min", np.min(kpoints)), right=plot_settings.get("x_max", np.max(kpoints)))
-    plt.ylim(bottom=plot_settings.get("y_min", None), top=plot_settings.get("y_max", None))
+    fig, ax = plt.subplots()
+    # All bands as one artist; the slider shifts the Fermi level through its transform
+    lines = EnergyLines(ax, kpoints, bands[:, :num_bands].T - fermi_energy_ev,
+                        colors=plot_settings.get("line_color", "black"),
+                        linewidth=plot_settings.get("line_thickness", 1.2))
+    ax.set_xlabel(plot_settings.get("x_label", "Wave vector"))
+    ax.set_ylabel(plot_settings.get("y_label", "Energy [eV]"))
+    ax.set_title(plot_settings.get("graph_title", "Band Structure"))
+    ax.grid(True)
+    ax.set_xlim(left=plot_settings.get("x_min", np.min(kpoints)), right=plot_settings.get("x_max", np.max(kpoints)))
+    ax.set_ylim(bottom=plot_settings.get("y_min", None), top=plot_settings.get("y_max", None))
+    fig.fermi_slider = add_reference_slider(fig, lines, -FERMI_SHIFT_EV, FERMI_SHIFT_EV)
     plt.show()
+    return fig
 
 ##----------------------------------------------------
 def print_to_console(console: RichJupyterWidget, msg: str):
     if hasattr(console, "_kernel_client"):
         console._kernel_client.execute(f"print('''{msg}''')")
 
-def band_structure(fermi_energy_H, num_bands, plot_settings,ipy_console=None):
+def band_structure(fermi_energy_H, num_bands, plot_settings,ipy_console=None, connect_option=False, mass_option=False):
     try:
         fermi_energy_ev = fermi_energy_H * PhysicalConstants.Ip_HeV
     except Exception as e:
@@ -131,12 +124,31 @@ def band_structure(fermi_energy_H, num_bands, plot_settings,ipy_console=None):
         QMessageBox.warning(None, "File Error", "Please upload the 'bandstructure' file.")
         return
 
+    parser_log = None
+    if mass_option:
+        # The path coordinate of 'bandstructure' is normalised; the lattice gives its length
+        parser_log, _ = QFileDialog.getOpenFileName(None, "Select the 'parser.log' file of the run")
+        if "parser.log" not in parser_log.lower():
+            QMessageBox.warning(None, "File Error", "Please upload the 'parser.log' file.")
+            return
+
     if file_path:
         try:
-            kpoints, bands = read_band_structure(file_path)
+            with profile_stage("Band structure", "load"):
+                kpoints, bands = read_band_structure(file_path)
+                path = None
+                if parser_log:
+                    path = path_length(read_reduced_kpoints(file_path),
+                                       reciprocal_lattice(lattice_from_parser_log(parser_log)))
             num_rows, num_cols = np.shape(bands)
-            detect_band_gap(kpoints, bands, fermi_energy_ev)
-            plot_band_structure(kpoints, bands, fermi_energy_ev, num_bands, Ip_HeV, plot_settings)
+            with profile_stage("Band structure", "post-process"):
+                gap_result = detect_band_gap(kpoints, bands, fermi_energy_ev, path)
+                if connect_option:
+                    # Follow each band through crossings instead of sorting by energy
+                    bands, _ = connect_bands(bands)
+            show_band_gap(gap_result)
+            with profile_stage("Band structure", "plot"):
+                plot_band_structure(kpoints, bands, fermi_energy_ev, num_bands, Ip_HeV, plot_settings)
             timestamp = datetime.now().strftime("[%H:%M:%S]")
             msg = (
                 f">>> Time                          {timestamp}\n"
@@ -148,6 +160,8 @@ def band_structure(fermi_energy_H, num_bands, plot_settings,ipy_console=None):
                 f">>> num_rows: {num_rows}\n"
                 f">>> num_cols: {num_cols}\n"
                 f">>> fermi_energy [ev]: {fermi_energy_ev}\n"
+                + format_band_analysis(gap_result)
+                + (">>> Bands reordered by connectivity\n" if connect_option else "")
                 + "-" * 75
             )
             print_to_console(ipy_console, msg)
@@ -371,6 +385,17 @@ class ModernDialog(QDialog):
         self.num_bands_spinbox.setSuffix(" bands")
         
         required_layout.addRow("Bands to Plot:", self.num_bands_spinbox)
+
+        self.connect_bands_checkbox = QCheckBox("Connect bands through crossings")
+        self.connect_bands_checkbox.setToolTip("Reorder the bands at each k-point so every line follows one band")
+        self.connect_bands_checkbox.setChecked(previous_fermi_energy_H.get("connect_bands", False))
+        required_layout.addRow("", self.connect_bands_checkbox)
+
+        self.masses_checkbox = QCheckBox("Effective masses (needs parser.log)")
+        self.masses_checkbox.setToolTip("Rebuild the k-path length from the reciprocal lattice of parser.log;\n"
+                                        "the path coordinate of 'bandstructure' is normalised")
+        self.masses_checkbox.setChecked(previous_fermi_energy_H.get("masses", False))
+        required_layout.addRow("", self.masses_checkbox)
         
         layout.addWidget(required_group)
     
@@ -615,6 +640,10 @@ class ModernDialog(QDialog):
             global previous_fermi_energy_H
             previous_fermi_energy_H["fermi_energy_H"] = float(self.fermi_energy_H_entry.text())
             num_bands = self.num_bands_spinbox.value()
+            connect_option = self.connect_bands_checkbox.isChecked()
+            previous_fermi_energy_H["connect_bands"] = connect_option
+            mass_option = self.masses_checkbox.isChecked()
+            previous_fermi_energy_H["masses"] = mass_option
 
             plot_settings = {}
             if self.plot_options_checkbox.isChecked():
@@ -639,7 +668,8 @@ class ModernDialog(QDialog):
             self.accept()
             
             # CALL
-            band_structure(previous_fermi_energy_H["fermi_energy_H"], num_bands, plot_settings, self.parent().ipy_console)
+            band_structure(previous_fermi_energy_H["fermi_energy_H"], num_bands, plot_settings, self.parent().ipy_console,
+                           connect_option, mass_option)
             
         except ValueError as e:
             QMessageBox.warning(self, "Invalid Input", f"Error: {e}")
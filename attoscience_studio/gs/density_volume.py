@@ -0,0 +1,201 @@
+# gs/density_volume.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import numpy as np
+from scipy.ndimage import map_coordinates
+#--------------------------------
+from attoscience_studio.helper_functions.constants import AtomicUnits
+BOHR_PER_ANGSTROM = AtomicUnits.BOHR_PER_ANGSTROM
+##----------------------------------------------------
+# Volumetric densities (Octopus OutputFormat = cube, or NumPy .npy) accessed
+# through a memory map. A cube file is converted once, streaming its values
+# into a '.npy' cache next to it (reused while it is newer than the cube);
+# planes, lines, oblique cuts and block-averaged volumes then only read the
+# voxels they need. Lengths are in bohr.
+##----------------------------------------------------
+AXES = {"x": 0, "y": 1, "z": 2}
+# Cube lines converted per chunk (6 values per line)
+DEFAULT_CHUNK_LINES = 2**18
+##----------------------------------------------------
+def read_cube_header(f):
+    """
+    Header of a Gaussian cube file opened in text mode; leaves f at the first
+    data line. Returns shape (3,), origin (3,), voxel vectors (3, 3) and
+    atoms [(Z, x, y, z), ...] in bohr. A negative voxel count marks lengths in
+    Angstrom: the vectors of that axis and, following the first axis, the
+    origin and atom positions are converted.
+    """
+    f.readline()
+    f.readline()
+    fields = f.readline().split()
+    n_atoms, origin = int(fields[0]), np.array(fields[1:4], dtype=float)
+    shape, voxel, scales = [], [], []
+    for _ in range(3):
+        fields = f.readline().split()
+        shape.append(abs(int(fields[0])))
+        scales.append(BOHR_PER_ANGSTROM if int(fields[0]) < 0 else 1.0)
+        voxel.append(np.array(fields[1:4], dtype=float) * scales[-1])
+    origin = origin * scales[0]
+    atoms = []
+    for _ in range(abs(n_atoms)):
+        fields = f.readline().split()
+        atoms.append((int(float(fields[0])), *(float(x) * scales[0] for x in fields[2:5])))
+    if n_atoms < 0:
+        # Orbital (MO) line of cube files with several data sets
+        f.readline()
+    return np.array(shape), origin, np.array(voxel), atoms
+
+def cube_to_npy(cube_path, npy_path, chunk_lines=DEFAULT_CHUNK_LINES):
+    """
+    Streams the values of a cube file into a (nx, ny, nz) float64 .npy file
+    with bounded memory. Returns shape, origin, voxel and atoms.
+    """
+    with open(cube_path, "r") as f:
+        shape, origin, voxel, atoms = read_cube_header(f)
+        volume = np.lib.format.open_memmap(npy_path, mode="w+", dtype=np.float64, shape=tuple(shape))
+        flat = volume.reshape(-1)
+        filled = 0
+        while filled < flat.size:
+            lines = f.readlines(chunk_lines * 80)
+            if not lines:
+                break
+            values = np.array(" ".join(lines).split(), dtype=np.float64)
+            count = min(len(values), flat.size - filled)
+            flat[filled:filled + count] = values[:count]
+            filled += count
+        volume.flush()
+        del volume, flat
+    if filled != np.prod(shape):
+        os.remove(npy_path)
+        raise ValueError(f"{cube_path} has {filled} values instead of {int(np.prod(shape))}.")
+    np.savez(npy_path[:-len(".npy")] + ".grid.npz", shape=shape, origin=origin, voxel=voxel,
+             atoms=np.array(atoms, dtype=float).reshape(-1, 4))
+    return shape, origin, voxel, atoms
+
+class DensityVolume:
+    """
+    Memory-mapped density grid.
+
+    Parameters:
+    - data: (nx, ny, nz) array or memory map.
+    - origin: Cartesian position of voxel (0, 0, 0) [bohr].
+    - voxel: Rows are the grid step vectors [bohr].
+    - atoms: [(Z, x, y, z), ...].
+    """
+    def __init__(self, data, origin=None, voxel=None, atoms=None):
+        self.data = data
+        self.origin = np.zeros(3) if origin is None else np.asarray(origin, dtype=float)
+        self.voxel = np.eye(3) if voxel is None else np.asarray(voxel, dtype=float)
+        self.atoms = atoms or []
+
+    @property
+    def shape(self):
+        return self.data.shape
+
+    def axis_coordinates(self, axis):
+        # Positions along one grid axis [bohr] (length of the step vector)
+        axis = AXES.get(axis, axis)
+        return self.origin[axis] + np.linalg.norm(self.voxel[axis]) * np.arange(self.shape[axis])
+
+    def index_of(self, axis, position):
+        # Nearest grid index of a position [bohr] along an axis
+        axis = AXES.get(axis, axis)
+        step = np.linalg.norm(self.voxel[axis])
+        return int(np.clip(np.round((position - self.origin[axis]) / step), 0, self.shape[axis] - 1))
+
+    def plane(self, axis, index):
+        """
+        Grid plane normal to axis ('x', 'y', 'z' or 0-2) at index; reads only
+        that plane. Returns the 2D array (first remaining axis first).
+        """
+        axis = AXES.get(axis, axis)
+        return np.array(np.take(self.data, index, axis=axis))
+
+    def line(self, axis, i, j):
+        """
+        Grid line along axis through the indices (i, j) of the two other axes.
+        """
+        axis = AXES.get(axis, axis)
+        index = [i, j]
+        index.insert(axis, slice(None))
+        return np.array(self.data[tuple(index)])
+
+    def oblique_plane(self, center, u, v, n_u, n_v, spacing, order=1):
+        """
+        Samples the plane center + a u + b v (u, v orthonormalised, a and b on
+        n_u x n_v points spaced by spacing [bohr]) by interpolation of the
+        surrounding voxels. Returns the (n_v, n_u) array (NaN outside the grid).
+        """
+        u = np.asarray(u, dtype=float)
+        u = u / np.linalg.norm(u)
+        v = np.asarray(v, dtype=float) - np.dot(v, u) * u
+        v = v / np.linalg.norm(v)
+        a = spacing * (np.arange(n_u) - (n_u - 1) / 2)
+        b = spacing * (np.arange(n_v) - (n_v - 1) / 2)
+        points = np.asarray(center, dtype=float) + a[None, :, None] * u + b[:, None, None] * v
+        indices = np.linalg.solve(self.voxel.T, (points.reshape(-1, 3) - self.origin).T)
+        values = map_coordinates(self.data, indices, order=order, mode="constant", cval=np.nan)
+        return values.reshape(n_v, n_u)
+
+    def downsample(self, factor, region=None, slab_bytes=64 * 1024**2):
+        """
+        Block average over factor^3 voxels of the whole grid or of a region
+        (tuple of three slices), computed slab by slab along x. Returns the
+        reduced array, its origin and voxel vectors, e.g. for an isosurface.
+        """
+        region = region or (slice(None),) * 3
+        starts = [s.indices(n)[0] for s, n in zip(region, self.shape)]
+        block = self.data[region]
+        reduced_shape = tuple(n // factor for n in block.shape)
+        if min(reduced_shape) == 0:
+            raise ValueError(f"The region is smaller than the downsampling factor {factor}.")
+        reduced = np.empty(reduced_shape)
+        slab = max(1, int(slab_bytes // (8 * factor * block.shape[1] * block.shape[2])))
+        for first in range(0, reduced_shape[0], slab):
+            last = min(first + slab, reduced_shape[0])
+            part = np.asarray(block[first * factor:last * factor, :reduced_shape[1] * factor, :reduced_shape[2] * factor])
+            reduced[first:last] = part.reshape(last - first, factor, reduced_shape[1], factor,
+                                               reduced_shape[2], factor).mean(axis=(1, 3, 5))
+        origin = self.origin + np.asarray(starts) @ self.voxel + (factor - 1) / 2 * self.voxel.sum(axis=0)
+        return reduced, origin, self.voxel * factor
+
+def open_density_volume(file_path, cache_dir=None):
+    """
+    Opens a cube (converted once to a cached .npy) or .npy density as a
+    DensityVolume backed by a read-only memory map. cache_dir defaults to the
+    directory of the cube file.
+    """
+    if file_path.lower().endswith(".npy"):
+        data = np.load(file_path, mmap_mode="r")
+        if data.ndim != 3:
+            raise ValueError(f"{file_path} is not a 3D array.")
+        grid_path = file_path[:-len(".npy")] + ".grid.npz"
+        if os.path.exists(grid_path):
+            grid = np.load(grid_path)
+            return DensityVolume(data, grid["origin"], grid["voxel"], [(int(atom[0]), *atom[1:]) for atom in grid["atoms"]])
+        return DensityVolume(data)
+
+    cache_dir = cache_dir or os.path.dirname(os.path.abspath(file_path))
+    npy_path = os.path.join(cache_dir, os.path.basename(file_path) + ".npy")
+    grid_path = npy_path[:-len(".npy")] + ".grid.npz"
+    if not (os.path.exists(npy_path) and os.path.exists(grid_path)
+            and os.path.getmtime(npy_path) >= os.path.getmtime(file_path)):
+        cube_to_npy(file_path, npy_path)
+    return open_density_volume(npy_path)
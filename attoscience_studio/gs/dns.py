@@ -24,6 +24,7 @@ import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
 from matplotlib import gridspec
+from matplotlib.widgets import Slider
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QFileDialog, QDialog, QFormLayout, QProgressBar, QStyle,
                              QRadioButton, QButtonGroup, QScrollArea, QColorDialog, QLineEdit, QMessageBox,
                              QPushButton, QVBoxLayout, QHBoxLayout, QGroupBox, QGridLayout, QSplashScreen, QDoubleSpinBox,
@@ -37,6 +38,8 @@ from scipy.integrate import trapezoid, quad
 from datetime import datetime
 from qtconsole.rich_jupyter_widget import RichJupyterWidget
 from attoscience_studio.resources_rc import *
+from attoscience_studio.utils.profiler import profile_stage
+from attoscience_studio.gs.density_volume import AXES, open_density_volume
 ##----------------------------------------------------
 def read_DENSITY(file_path, selected_formats):
     try:
@@ -73,8 +76,10 @@ def density_connector(selected_formats, plot_settings, ipy_console):
         return
     if file_path:
         try:
-            i,j,k = read_DENSITY(file_path,selected_formats)
-            plot_Density(i,j,k,selected_formats, plot_settings)
+            with profile_stage("Density", "load"):
+                i,j,k = read_DENSITY(file_path,selected_formats)
+            with profile_stage("Density", "plot"):
+                plot_Density(i,j,k,selected_formats, plot_settings)
             
             num_rows = len(i)
            
@@ -95,6 +100,86 @@ def density_connector(selected_formats, plot_settings, ipy_console):
             print(f"Error parsing Density file: {e}")
             QMessageBox.critical(None, "Error", f"Failed to parse Density file:\n{e}")
 
+def density_volume_connector(axis, position, downsample_factor, plot_settings, ipy_console):
+    file_path, _ = QFileDialog.getOpenFileName(None, "Select volumetric density file", "",
+                                               "Cube or NumPy (*.cube *.npy);;All files (*)")
+    if not file_path:
+        return
+    if not file_path.lower().endswith((".cube", ".npy")):
+        QMessageBox.warning(None, "File Error", "Please upload a density '.cube' (OutputFormat = cube) or '.npy' file.")
+        return
+
+    try:
+        with profile_stage("Density volume", "load"):
+            volume = open_density_volume(file_path)
+        index = int(round(position * (volume.shape[AXES[axis]] - 1)))
+        with profile_stage("Density volume", "plot"):
+            fig = plot_Density_volume(volume, axis, index, plot_settings)
+
+        downsample_msg = ""
+        if downsample_factor > 1:
+            with profile_stage("Density volume", "post-process"):
+                reduced, origin, voxel = volume.downsample(downsample_factor)
+                output_path = os.path.splitext(file_path)[0] + f".ds{downsample_factor}.npz"
+                np.savez(output_path, density=reduced, origin=origin, voxel=voxel)
+            downsample_msg = (f">>> Downsampled x{downsample_factor} to {reduced.shape} "
+                              f"(isosurface-ready): {output_path}\n")
+
+        timestamp = datetime.now().strftime("[%H:%M:%S]")
+        msg = (
+            f">>> Time                          {timestamp}\n"
+            + "-" * 75 + "\n"
+            + "--                      Electron Density (3D) log!                       --\n"
+            + "-" * 75 + "\n"
+            f">>> File loaded from: {file_path}\n"
+            f">>> Grid: {volume.shape} (memory-mapped)\n"
+            f">>> Slice normal to {axis} at index {index}\n"
+            + downsample_msg
+            + "-" * 75
+        )
+        print_to_console(ipy_console, msg)
+        return fig
+
+    except (ValueError, OSError) as e:
+        QMessageBox.warning(None, "Error", str(e))
+        return
+
+##----------------------------------------------------
+def plot_Density_volume(volume, axis, index, plot_settings):
+    """
+    Plane of a DensityVolume normal to axis with a slider over the grid
+    index; every slider move reads only the new plane from the memory map.
+    Returns the figure (its slider is kept as fig.plane_slider).
+    """
+    n = AXES[axis]
+    first, second = [name for name in AXES if name != axis]
+    u, v = (volume.axis_coordinates(name) for name in (first, second))
+    fig, ax = plt.subplots()
+    fig.subplots_adjust(bottom=0.2)
+    image = ax.imshow(volume.plane(axis, index).T, extent=(u[0], u[-1], v[0], v[-1]),
+                      origin='lower', cmap='viridis', aspect='auto')
+    fig.colorbar(image, ax=ax, label='Density')
+    ax.set_xlabel(plot_settings.get("x_label") or f"{first} [bohr]")
+    ax.set_ylabel(plot_settings.get("y_label") or f"{second} [bohr]")
+    ax.set_title(plot_settings.get("graph_title") or f"Density in plane_{axis}")
+
+    coordinates = volume.axis_coordinates(axis)
+    slider = Slider(fig.add_axes([0.2, 0.05, 0.6, 0.03]), f"{axis} index", 0, volume.shape[n] - 1,
+                    valinit=index, valstep=1)
+
+    def update(value):
+        plane = volume.plane(axis, int(value)).T
+        image.set_data(plane)
+        image.set_clim(np.nanmin(plane), np.nanmax(plane))
+        slider.valtext.set_text(f"{int(value)} ({coordinates[int(value)]:.2f})")
+        fig.canvas.draw_idle()
+
+    slider.on_changed(update)
+    update(index)
+    fig.plane_slider = slider
+    plt.show()
+    return fig
+
 ##----------------------------------------------------
 def plot_Density(i,j,k,selected_formats, plot_settings):   
     if 'axis_x' in selected_formats:
@@ -174,6 +259,7 @@ def plot_Density(i,j,k,selected_formats, plot_settings):
 
 ##----------------------------------------------------
 previous_fermi_energy_H = {}
+previous_values_density = {}
 class ModernDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -380,6 +466,37 @@ class ModernDialog(QDialog):
         required_group.setLayout(required_layout)
 
         layout.addWidget(required_group)
+
+        self.volume_checkbox = QCheckBox("3D volume (cube / .npy)")
+        self.volume_checkbox.setStyleSheet("font-size: 14px; font-weight: 600; color: #1976d2;")
+        self.volume_checkbox.setToolTip("Memory-map a volumetric density and slice it interactively")
+        layout.addWidget(self.volume_checkbox)
+
+        self.volume_group = QGroupBox("Volume Settings")
+        self.volume_group.setVisible(previous_values_density.get("volume", False))
+        volume_layout = QFormLayout(self.volume_group)
+
+        self.slice_axis_combo = QComboBox()
+        self.slice_axis_combo.addItems(list(AXES))
+        self.slice_axis_combo.setCurrentText(previous_values_density.get("axis", "z"))
+        volume_layout.addRow("Slice normal to:", self.slice_axis_combo)
+
+        self.slice_position_spinbox = QDoubleSpinBox()
+        self.slice_position_spinbox.setRange(0.0, 1.0)
+        self.slice_position_spinbox.setSingleStep(0.05)
+        self.slice_position_spinbox.setValue(previous_values_density.get("position", 0.5))
+        volume_layout.addRow("Initial position (fraction):", self.slice_position_spinbox)
+
+        self.downsample_spinbox = QSpinBox()
+        self.downsample_spinbox.setRange(1, 16)
+        self.downsample_spinbox.setSpecialValueText("off")
+        self.downsample_spinbox.setValue(previous_values_density.get("downsample", 1))
+        self.downsample_spinbox.setToolTip("Save a block-averaged copy of the volume for isosurfaces")
+        volume_layout.addRow("Downsample factor:", self.downsample_spinbox)
+
+        layout.addWidget(self.volume_group)
+        self.volume_checkbox.stateChanged.connect(lambda state: self.volume_group.setVisible(state == Qt.Checked))
+        self.volume_checkbox.setChecked(previous_values_density.get("volume", False))
     
     def create_optional_section(self, layout):
         self.plot_options_checkbox = QCheckBox("Advanced Plot Customization") 
@@ -633,7 +750,7 @@ class ModernDialog(QDialog):
             if self.plane_z_checkbox.isChecked():
                 selected_formats.append('plane_z')
 
-            if len(selected_formats) != 1:
+            if len(selected_formats) != 1 and not self.volume_checkbox.isChecked():
                 QMessageBox.warning(self, "Invalid Input", "Please select exactly one format option.")
                 return None, None
             
@@ -656,8 +773,25 @@ class ModernDialog(QDialog):
                     "line_thickness": self.line_thickness_spinbox.value(),
                     "background_color": self.background_color_entry.text(),
                 }
-            
+
+            if self.volume_checkbox.isChecked():
+                axis = self.slice_axis_combo.currentText()
+                position = self.slice_position_spinbox.value()
+                downsample_factor = self.downsample_spinbox.value()
+
+                self.accept()
+
+                # Update
+                previous_values_density.update({"volume": True, "axis": axis, "position": position,
+                                                "downsample": downsample_factor})
+
+                # CALL
+                density_volume_connector(axis, position, downsample_factor, plot_settings,
+                                         self.parent().ipy_console)
+                return
+
             self.accept()
+            previous_values_density["volume"] = False
             
             # CALL
             density_connector(selected_formats, plot_settings, self.parent().ipy_console)
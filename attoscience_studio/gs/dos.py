@@ -23,6 +23,7 @@ import time
 import numpy as np
 import matplotlib.pyplot as plt
 import matplotlib.colors as mcolors
+from matplotlib.lines import Line2D
 from matplotlib import gridspec
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QFileDialog, QDialog, QFormLayout, QProgressBar, QStyle,
                              QRadioButton, QButtonGroup, QScrollArea, QColorDialog, QLineEdit, QMessageBox,
@@ -37,6 +38,10 @@ from scipy.integrate import trapezoid, quad
 from datetime import datetime
 from qtconsole.rich_jupyter_widget import RichJupyterWidget
 from attoscience_studio.resources_rc import *
+from attoscience_studio.utils.profiler import profile_stage
+from attoscience_studio.gs.energy_lines import EnergyLines
+from attoscience_studio.gs.band_dos import BROADENINGS, dos_from_bands, format_band_dos
+from attoscience_studio.gs.bstr import read_band_structure
 ##----------------------------------------------------
 def read_DOS(file_path):
     try:
@@ -64,8 +69,10 @@ def DOS(plot_settings, ipy_console=None):
     
     if file_path:
         try:
-            energy, dos = read_DOS(file_path)
-            plot_DOS(energy, dos, plot_settings)
+            with profile_stage("DOS", "load"):
+                energy, dos = read_DOS(file_path)
+            with profile_stage("DOS", "plot"):
+                plot_DOS(energy, dos, plot_settings)
             
             num_rows = len(energy)
             num_cols = len(energy)
@@ -88,18 +95,61 @@ def DOS(plot_settings, ipy_console=None):
             print(f"Error parsing DOS file: {e}")
             QMessageBox.critical(None, "Error", f"Failed to parse DOS file:\n{e}")
 ##----------------------------------------------------
-def plot_DOS(energy, dos, plot_settings):
-    plt.figure()
-    plt.plot(dos,  energy, linewidth=plot_settings.get("line_thickness", 1.2),
-             color=plot_settings.get("line_color", "black"))
-    plt.xlabel(plot_settings.get("x_label", "Total density of state"))
-    plt.ylabel(plot_settings.get("y_label", "Energy [a.u.]"))
-    plt.title(plot_settings.get("graph_title", "Density of state"))
-    plt.grid(False)
-    plt.xlim(left=plot_settings.get("x_min", np.min(dos)), right=plot_settings.get("x_max", np.max(dos)))
-    plt.ylim(bottom=plot_settings.get("y_min", None), top=plot_settings.get("y_max", None))
+def band_dos_connector(widths, kind, band_range, plot_settings, ipy_console=None):
+    file_path, _ = QFileDialog.getOpenFileName(None, "Select band structure file")
+    if "bandstructure" not in file_path.lower():
+        QMessageBox.warning(None, "File Error", "Please upload the 'bandstructure' file.")
+        return
+
+    try:
+        with profile_stage("DOS from bands", "load"):
+            kpoints, bands = read_band_structure(file_path)
+        with profile_stage("DOS from bands", "transform"):
+            result = dos_from_bands(bands, widths, kind, band_range=band_range)
+        with profile_stage("DOS from bands", "plot"):
+            plot_DOS(result["energy"], result["dos"], {"y_label": "Energy [eV]", **plot_settings},
+                     labels=[f"{kind} {width:g} eV" for width in result["widths"]])
+
+        n_bands = bands.shape[1] if band_range is None else bands[:, band_range[0]:band_range[1] + 1].shape[1]
+        timestamp = datetime.now().strftime("[%H:%M:%S]")
+        msg = (
+            f">>> Time                          {timestamp}\n"
+            + "-" * 75 + "\n"
+            + "--                     Density of state (bands) log!                     --\n"
+            + "-" * 75 + "\n"
+            f">>> File loaded from: {file_path}\n"
+            + format_band_dos(result, len(kpoints), n_bands)
+            + "-" * 75
+        )
+        print_to_console(ipy_console, msg)
+
+    except ValueError as e:
+        QMessageBox.warning(None, "Error", str(e))
+        return
+
+##----------------------------------------------------
+def plot_DOS(energy, dos, plot_settings, labels=None):
+    """
+    DOS curves (n_curves, n_energies) or (n_energies,) against the energy
+    (vertical), drawn as one artist per curve colour.
+    """
+    dos = np.atleast_2d(dos)
+    fig, ax = plt.subplots()
+    colors = [plot_settings.get("line_color", "black")] if len(dos) == 1 else list(plt.cm.viridis(np.linspace(0, 0.9, len(dos))))
+    lines = EnergyLines(ax, dos, energy, colors=colors, linewidth=plot_settings.get("line_thickness", 1.2))
+    if labels is not None:
+        ax.legend(handles=[Line2D([], [], color=color, label=label) for color, label in zip(colors, labels)])
+    ax.set_xlabel(plot_settings.get("x_label", "Total density of state"))
+    ax.set_ylabel(plot_settings.get("y_label", "Energy [a.u.]"))
+    ax.set_title(plot_settings.get("graph_title", "Density of state"))
+    ax.grid(False)
+    ax.set_xlim(left=plot_settings.get("x_min", np.min(dos)), right=plot_settings.get("x_max", np.max(dos)))
+    ax.set_ylim(bottom=plot_settings.get("y_min", None), top=plot_settings.get("y_max", None))
+    fig.dos_lines = lines
     plt.show()
+    return fig
 ##----------------------------------------------------
+previous_values_dos = {}
 class ModernDialog(QDialog):
     def __init__(self, parent=None):
         super().__init__(parent)
@@ -272,7 +322,38 @@ class ModernDialog(QDialog):
         layout.addWidget(line)
     
     def create_required_section(self, layout):
-        return
+        self.band_dos_checkbox = QCheckBox("Compute from 'bandstructure' eigenvalues")
+        self.band_dos_checkbox.setStyleSheet("font-size: 14px; font-weight: 600; color: #1976d2;")
+        self.band_dos_checkbox.setToolTip("Histogram all eigenvalues and broaden them instead of reading 'total-dos.dat'")
+        layout.addWidget(self.band_dos_checkbox)
+
+        self.band_dos_group = QGroupBox("Broadening Settings")
+        self.band_dos_group.setVisible(previous_values_dos.get("band_dos", False))
+        band_dos_layout = QFormLayout(self.band_dos_group)
+
+        self.broadening_combo = QComboBox()
+        self.broadening_combo.addItems(list(BROADENINGS))
+        self.broadening_combo.setCurrentText(previous_values_dos.get("kind", "gaussian"))
+        band_dos_layout.addRow("Broadening:", self.broadening_combo)
+
+        self.widths_entry = QLineEdit(previous_values_dos.get("widths", "0.05, 0.1, 0.2"))
+        self.widths_entry.setPlaceholderText("e.g. 0.05, 0.1, 0.2")
+        band_dos_layout.addRow("Widths [eV]:", self.widths_entry)
+
+        self.first_band_spinbox = QSpinBox()
+        self.first_band_spinbox.setRange(1, 9999)
+        self.first_band_spinbox.setValue(previous_values_dos.get("first_band", 1))
+        band_dos_layout.addRow("First band:", self.first_band_spinbox)
+
+        self.last_band_spinbox = QSpinBox()
+        self.last_band_spinbox.setRange(0, 9999)
+        self.last_band_spinbox.setSpecialValueText("all")
+        self.last_band_spinbox.setValue(previous_values_dos.get("last_band", 0))
+        band_dos_layout.addRow("Last band:", self.last_band_spinbox)
+
+        layout.addWidget(self.band_dos_group)
+        self.band_dos_checkbox.stateChanged.connect(lambda state: self.band_dos_group.setVisible(state == Qt.Checked))
+        self.band_dos_checkbox.setChecked(previous_values_dos.get("band_dos", False))
 
     def create_optional_section(self, layout):
         self.plot_options_checkbox = QCheckBox("Advanced Plot Customization") 
@@ -535,7 +616,28 @@ class ModernDialog(QDialog):
                     "background_color": self.background_color_entry.text(),
                 }
             
+            if self.band_dos_checkbox.isChecked():
+                widths = [float(value) for value in self.widths_entry.text().split(",") if value.strip()]
+                if not widths:
+                    raise ValueError("Please enter at least one broadening width.")
+                kind = self.broadening_combo.currentText()
+                first_band, last_band = self.first_band_spinbox.value(), self.last_band_spinbox.value()
+                if last_band and last_band < first_band:
+                    raise ValueError("The last band must not be below the first band.")
+                band_range = None if first_band == 1 and last_band == 0 else (first_band - 1, (last_band or 9999) - 1)
+
+                self.accept()
+
+                # Update
+                previous_values_dos.update({"band_dos": True, "kind": kind, "widths": self.widths_entry.text(),
+                                            "first_band": first_band, "last_band": last_band})
+
+                # CALL
+                band_dos_connector(widths, kind, band_range, plot_settings, self.parent().ipy_console)
+                return
+
             self.accept()
+            previous_values_dos["band_dos"] = False
             
             # CALL
             DOS(plot_settings, self.parent().ipy_console) 
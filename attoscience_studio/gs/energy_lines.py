@@ -0,0 +1,80 @@
+# gs/energy_lines.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+from matplotlib.lines import Line2D
+from matplotlib.transforms import Affine2D
+from matplotlib.widgets import Slider
+##----------------------------------------------------
+# Many curves sharing an energy axis (bands, DOS for several broadenings) as
+# one artist per colour: the curves are joined into a single NaN-separated
+# Line2D, which keeps matplotlib's path simplification (a LineCollection
+# draws every vertex). Shifting the energy reference (e.g. the Fermi level)
+# only changes the translation of the artists' transform, so the data are
+# never rebuilt; zooming just redraws the same artists.
+##----------------------------------------------------
+def joined_curves(x, y):
+    # (n_curves, n_points) -> flat arrays with a NaN after every curve
+    pad = np.full((x.shape[0], 1), np.nan)
+    return np.hstack((x, pad)).ravel(), np.hstack((y, pad)).ravel()
+
+class EnergyLines:
+    """
+    Curves (n_curves, n_points) drawn as one Line2D per colour.
+
+    Parameters:
+    - ax: Matplotlib axes.
+    - x, y: Coordinates, broadcast to (n_curves, n_points); e.g. the k-path
+      (n_points,) and the bands (n_curves, n_points), or DOS curves and the
+      energy grid.
+    - energy_axis: 'y' or 'x', the axis that holds the energy.
+    - colors: One colour for all curves or one per curve.
+    """
+    def __init__(self, ax, x, y, energy_axis='y', colors="black", linewidth=1.2, **line_kwargs):
+        self.ax = ax
+        self.energy_axis = energy_axis
+        x, y = np.broadcast_arrays(np.atleast_2d(np.asarray(x, dtype=float)), np.atleast_2d(np.asarray(y, dtype=float)))
+        self.shift = Affine2D()
+        groups = [(colors, slice(None))] if isinstance(colors, str) or len(colors) != len(x) else \
+            [(color, slice(n, n + 1)) for n, color in enumerate(colors)]
+        self.artists = []
+        for color, curves in groups:
+            line = Line2D(*joined_curves(x[curves], y[curves]), color=color, linewidth=linewidth, **line_kwargs)
+            line.set_transform(self.shift + ax.transData)
+            ax.add_line(line)
+            self.artists.append(line)
+        ax.set_xlim(np.nanmin(x), np.nanmax(x))
+        ax.set_ylim(np.nanmin(y), np.nanmax(y))
+
+    def set_reference(self, energy):
+        # Energies drawn relative to `energy` (transform update only)
+        offset = (0.0, -energy) if self.energy_axis == 'y' else (-energy, 0.0)
+        self.shift.clear().translate(*offset)
+        self.ax.figure.canvas.draw_idle()
+
+def add_reference_slider(fig, lines, valmin, valmax, valinit=0.0, label="E_F shift [eV]"):
+    """
+    Slider under the axes that moves the energy reference of one or more
+    EnergyLines; returns the Slider (keep a reference to it).
+    """
+    lines = lines if isinstance(lines, (list, tuple)) else [lines]
+    fig.subplots_adjust(bottom=0.2)
+    slider = Slider(fig.add_axes([0.2, 0.05, 0.6, 0.03]), label, valmin, valmax, valinit=valinit)
+    slider.on_changed(lambda value: [line.set_reference(value) for line in lines])
+    return slider
@@ -44,4 +44,5 @@ class AtomicUnits:
     EFIELDau = PhysicalConstants.hbar**2 / (PhysicalConstants.elmass * r_Bohr**3 * PhysicalConstants.elcharge)
     
     LENGTHau = r_Bohr
+    BOHR_PER_ANGSTROM = 1e-10 / r_Bohr
     ENERGYau = PhysicalConstants.hbar**2 / (PhysicalConstants.elmass * r_Bohr**2)
@@ -40,6 +40,7 @@ from qtconsole.rich_jupyter_widget import RichJupyterWidget
 from attoscience_studio.resources_rc import *
 #--------------------------------
 from attoscience_studio.high_harmonic.hhg_spectrum import calculate_spectrum
+from attoscience_studio.utils.profiler import profile_stage
 ##----------------------------------------------------
 def calcu_ellips(w, w0, Dx, Dy):       
     ww = w/w0
@@ -95,9 +96,11 @@ def ellips_connector(lambda0_nm, q_value, filtering, time_derivative, window_fun
     
     if file_path:
         try:
-            w, Sx, Sy, SS, w0, Dx, Dy, t, T, Time_OC = calculate_spectrum(lambda0_nm, q_value, filtering, window_func, time_derivative, file_path)
-            epsilon = calcu_ellips(w, w0, Dx, Dy)
-            plot_HO_ellips(w, w0, SS, epsilon, lambda0_nm, q_value, T, extract_data_option, plot_settings)
+            w, Sx, Sy, SS, w0, Dx, Dy, t, T, Time_OC = calculate_spectrum(lambda0_nm, q_value, filtering, window_func, time_derivative, file_path, pipeline="HHG ellipticity")
+            with profile_stage("HHG ellipticity", "post-process"):
+                epsilon = calcu_ellips(w, w0, Dx, Dy)
+            with profile_stage("HHG ellipticity", "plot"):
+                plot_HO_ellips(w, w0, SS, epsilon, lambda0_nm, q_value, T, extract_data_option, plot_settings)
 
             max_Time_OC = np.max(Time_OC)
             T_SI = T*2.418884326509*1e-17
@@ -40,6 +40,7 @@ from qtconsole.rich_jupyter_widget import RichJupyterWidget
 from attoscience_studio.resources_rc import *
 #--------------------------------
 from attoscience_studio.high_harmonic.hhg_spectrum import calculate_spectrum
+from attoscience_studio.utils.profiler import profile_stage
 ##----------------------------------------------------
 def calcu_PHASE(Dx, Dy):
     INT = np.abs(Dx + Dy)
@@ -98,11 +99,13 @@ def phase_connector(lambda0_nm, q_value, filtering, time_derivative, selected_co
     
     if file_path:
         try:
-            w, Sx, Sy, SS, w0, Dx, Dy, t, T, Time_OC = calculate_spectrum(lambda0_nm, q_value, filtering, window_func, time_derivative, file_path)
-            phase_Dx, phase_Dy, phase_tot, phase_Dx_deg, phase_Dy_deg,phase_tot_deg,INT = calcu_PHASE(Dx, Dy)
+            w, Sx, Sy, SS, w0, Dx, Dy, t, T, Time_OC = calculate_spectrum(lambda0_nm, q_value, filtering, window_func, time_derivative, file_path, pipeline="HHG phase")
+            with profile_stage("HHG phase", "post-process"):
+                phase_Dx, phase_Dy, phase_tot, phase_Dx_deg, phase_Dy_deg,phase_tot_deg,INT = calcu_PHASE(Dx, Dy)
             
             ww = w/w0
-            plot_HO_PHASE(ww, phase_Dx, phase_Dy, phase_tot, phase_Dx_deg, phase_Dy_deg, phase_tot_deg, INT, lambda0_nm, q_value, w0, T, extract_data_option, selected_components, plot_settings)
+            with profile_stage("HHG phase", "plot"):
+                plot_HO_PHASE(ww, phase_Dx, phase_Dy, phase_tot, phase_Dx_deg, phase_Dy_deg, phase_tot_deg, INT, lambda0_nm, q_value, w0, T, extract_data_option, selected_components, plot_settings)
 
             max_Time_OC = np.max(Time_OC)
             T_SI = T*2.418884326509*1e-17
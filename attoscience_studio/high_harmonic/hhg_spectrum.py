@@ -45,9 +45,12 @@ Ip_HeV = PhysicalConstants.Ip_HeV
 from attoscience_studio.utils.window_func import TotalCurrentFilter
 #--------------------------------
 from attoscience_studio.utils.status_symbols import Symbols
+from attoscience_studio.utils.profiler import profile_stage
+from attoscience_studio.high_harmonic.live_spectrum import LiveSpectrumWindow
 ##----------------------------------------------------
-def calculate_spectrum(lambda0_nm, q_value, filtering, window_func, time_derivative, file_path):
-    data = np.loadtxt(file_path)
+def calculate_spectrum(lambda0_nm, q_value, filtering, window_func, time_derivative, file_path, pipeline="HHG spectrum"):
+    with profile_stage(pipeline, "load"):
+        data = np.loadtxt(file_path)
     w0 = 45.5633 / lambda0_nm
     T = 2 * np.pi / w0 
     q = q_value
@@ -72,8 +75,9 @@ def calculate_spectrum(lambda0_nm, q_value, filtering, window_func, time_derivat
         decay_rate = WF_param
     
     #---------------CALL--------------------
-    filter_obj = TotalCurrentFilter(method=filter_method, EoP=EoP, exponent=exponent, sigma=sigma, decay_rate=decay_rate)
-    hx, hy = filter_obj.apply_filter(t, jx, jy)
+    with profile_stage(pipeline, "filter"):
+        filter_obj = TotalCurrentFilter(method=filter_method, EoP=EoP, exponent=exponent, sigma=sigma, decay_rate=decay_rate)
+        hx, hy = filter_obj.apply_filter(t, jx, jy)
     #---------------------------------------
     Time_OC = t/T
     if time_derivative == 'True':
@@ -87,27 +91,29 @@ def calculate_spectrum(lambda0_nm, q_value, filtering, window_func, time_derivat
     dw = 0.001
     w = np.arange(0, wmax + dw, dw)
     #----
-    Nomeg = len(w)
-    Dx = np.zeros(Nomeg, dtype=np.complex128)
-    Dy = np.zeros(Nomeg, dtype=np.complex128)
-    Ttot = 1
-    for m in range(Nomeg):
-        integrand_x = np.exp(1j * w[m] * t) * dhx
-        Dx[m] = np.trapz(integrand_x, t) / Ttot
-        integrand_y = np.exp(1j * w[m] * t) * dhy
-        Dy[m] = np.trapz(integrand_y, t) / Ttot
+    with profile_stage(pipeline, "transform"):
+        Nomeg = len(w)
+        Dx = np.zeros(Nomeg, dtype=np.complex128)
+        Dy = np.zeros(Nomeg, dtype=np.complex128)
+        Ttot = 1
+        for m in range(Nomeg):
+            integrand_x = np.exp(1j * w[m] * t) * dhx
+            Dx[m] = np.trapz(integrand_x, t) / Ttot
+            integrand_y = np.exp(1j * w[m] * t) * dhy
+            Dy[m] = np.trapz(integrand_y, t) / Ttot
     #----
-    Sx = w**2 * np.abs(Dx)**2
-    Sx[Sx <= 0] = 1e-16
-    Sx = np.log10(Sx)
-    #----
-    Sy = w**2 * np.abs(Dy)**2
-    Sy[Sy <= 0] = 1e-16
-    Sy = np.log10(Sy)
-    #----
-    S = w**2 * np.abs(Dx + Dy)**2
-    S[S <= 0] = 1e-16
-    SS = np.log10(S)   
+    with profile_stage(pipeline, "post-process"):
+        Sx = w**2 * np.abs(Dx)**2
+        Sx[Sx <= 0] = 1e-16
+        Sx = np.log10(Sx)
+        #----
+        Sy = w**2 * np.abs(Dy)**2
+        Sy[Sy <= 0] = 1e-16
+        Sy = np.log10(Sy)
+        #----
+        S = w**2 * np.abs(Dx + Dy)**2
+        S[S <= 0] = 1e-16
+        SS = np.log10(S)   
     return w, Sx, Sy, SS, w0, Dx, Dy, t, T, Time_OC
 ##----------------------------------------------------
 def plot_spectrum_harmonic_order(w, Sx, Sy, SS, w0, q_value, lambda0_nm, T, selected_spectrums, extract_data_option, plot_settings):
@@ -259,7 +265,8 @@ def HHG_connector(lambda0_nm, filtering, q_value, time_derivative, selected_spec
     if file_path:
         try:
             w, Sx, Sy, SS, w0, Dx, Dy, t, T, Time_OC = calculate_spectrum(lambda0_nm, q_value, filtering, window_func, time_derivative, file_path)
-            plot_spectrum_harmonic_order(w, Sx, Sy, SS, w0, q_value, lambda0_nm, T, selected_spectrums, extract_data_option, plot_settings)
+            with profile_stage("HHG spectrum", "plot"):
+                plot_spectrum_harmonic_order(w, Sx, Sy, SS, w0, q_value, lambda0_nm, T, selected_spectrums, extract_data_option, plot_settings)
 
             max_Time_OC = np.max(Time_OC)
             T_SI = T*2.418884326509*1e-17
@@ -292,7 +299,8 @@ def EHHG_connector(lambda0_nm, q_value, filtering, time_derivative, selected_spe
     if file_path:
         try:
             w, Sx, Sy, SS, w0, Dx, Dy, t, T, Time_OC = calculate_spectrum(lambda0_nm, q_value, filtering, window_func, time_derivative, file_path)
-            plot_spectrum_energy(w, Sx, Sy, SS, w0, q_value, lambda0_nm, T, selected_spectrums, Ip_HeV, extract_data_option, plot_settings)
+            with profile_stage("HHG spectrum", "plot"):
+                plot_spectrum_energy(w, Sx, Sy, SS, w0, q_value, lambda0_nm, T, selected_spectrums, Ip_HeV, extract_data_option, plot_settings)
 
             max_Time_OC = np.max(Time_OC)
             T_SI = T*2.418884326509*1e-17
@@ -317,6 +325,38 @@ def EHHG_connector(lambda0_nm, q_value, filtering, time_derivative, selected_spe
             QMessageBox.warning(None, "Error", str(e))
             return
  
+def live_spectrum_connector(lambda0_nm, q_value, time_derivative, selected_spectrums, energy_axis, parent=None, ipy_console=None):
+    file_path, _ = QFileDialog.getOpenFileName(None, "Select total_current file (may still be running)")
+    if "total_current" not in file_path.lower():
+        QMessageBox.warning(None, "File Error", "Please upload the 'total_current' file.")
+        return
+    if file_path:
+        try:
+            window = LiveSpectrumWindow(file_path, lambda0_nm, q_value, time_derivative, selected_spectrums, energy_axis, parent=parent)
+            # Keep the window alive after the dialog closes, until it is closed itself
+            if parent is not None:
+                windows = parent.__dict__.setdefault("_live_spectrum_windows", [])
+                windows.append(window)
+                window.destroyed.connect(lambda _=None, window=window: windows.remove(window) if window in windows else None)
+            window.show()
+
+            timestamp = datetime.now().strftime("[%H:%M:%S]")
+            msg = (
+                f">>> Time                          {timestamp}\n"
+                + "-" * 75 + "\n"
+                + "--                          HHG log!                          --\n"
+                + "-" * 75 + "\n"
+                ">>> Live HHG spectrum started (no end-of-pulse window)\n"
+                f">>> Following: {file_path}\n"
+                f">>> Samples read: {window.spectrum.n_samples}, t = {window.spectrum.duration_oc:.3f} o.c.\n"
+                + "-" * 75
+            )
+            print_to_console(ipy_console, msg)
+
+        except (OSError, ValueError) as e:
+            QMessageBox.warning(None, "Error", str(e))
+            return
+
 ##----------------------------------------------------
 previous_input_spectrum = {}
 class ModernDialog(QDialog):
@@ -742,8 +782,11 @@ class ModernDialog(QDialog):
         options_layout.setContentsMargins(10, 10, 10, 10)
     
         self.extract_data_checkbox = QCheckBox("Extract Data")
+        self.live_checkbox = QCheckBox("Live (follow a running simulation)")
+        self.live_checkbox.setChecked(previous_input_spectrum.get("live", False))
     
         options_layout.addWidget(self.extract_data_checkbox)
+        options_layout.addWidget(self.live_checkbox)
         options_layout.addStretch()
     
         ##-------
@@ -1083,10 +1126,15 @@ class ModernDialog(QDialog):
 
             self.accept()
             # Update
-            previous_input_spectrum.update({"lambda0_nm": lambda0_nm, "filtering": filtering, "q_value": q_value})
+            previous_input_spectrum.update({"lambda0_nm": lambda0_nm, "filtering": filtering, "q_value": q_value,
+                                            "live": self.live_checkbox.isChecked()})
             
             # CALL
-            if x_axis_unit == "Harmonic order":
+            if self.live_checkbox.isChecked():
+                live_spectrum_connector(lambda0_nm, q_value, time_derivative, selected_spectrums,
+                                        x_axis_unit != "Harmonic order", self.parent(),
+                                        self.parent().ipy_console)
+            elif x_axis_unit == "Harmonic order":
                 HHG_connector(lambda0_nm, filtering, q_value, time_derivative, selected_spectrums, 
                               window_func, extract_data_option, plot_settings,
                               self.parent().ipy_console)
@@ -41,13 +41,15 @@ from qtconsole.rich_jupyter_widget import RichJupyterWidget
 from attoscience_studio.resources_rc import *
 #--------------------------------
 from attoscience_studio.utils.window_func import TotalCurrentFilter
+from attoscience_studio.utils.profiler import profile_stage
 #--------------------------------
 from attoscience_studio.helper_functions.constants import PhysicalConstants, AtomicUnits
 Ip_HeV = PhysicalConstants.Ip_HeV
 ##----------------------------------------------------
 def read_dtat_file(file_path):
     try:
-        data = np.loadtxt(file_path)
+        with profile_stage("HHG yield", "load"):
+            data = np.loadtxt(file_path)
         if data.size == 0:
             raise ValueError("The file is empty.")
         t  = data[:, 1]
@@ -79,8 +81,9 @@ def calcu_YIELD(t, jx, jy, lambda0_nm, filtering, qstart, qend, time_derivative,
         decay_rate = WF_param
     
     #---------------CALL--------------------
-    filter_obj = TotalCurrentFilter(method=filter_method, EoP=EoP, exponent=exponent, sigma=sigma, decay_rate=decay_rate)
-    hx, hy = filter_obj.apply_filter(t, jx, jy)
+    with profile_stage("HHG yield", "filter"):
+        filter_obj = TotalCurrentFilter(method=filter_method, EoP=EoP, exponent=exponent, sigma=sigma, decay_rate=decay_rate)
+        hx, hy = filter_obj.apply_filter(t, jx, jy)
     #---------------------------------------
 
     w0 = 45.5633 / lambda0_nm
@@ -97,48 +100,50 @@ def calcu_YIELD(t, jx, jy, lambda0_nm, filtering, qstart, qend, time_derivative,
         dhx = hx
         dhy = hy
     
-    Nomeg = len(w_HH)
-    Dx = np.zeros(Nomeg, dtype=complex)
-    Dy = np.zeros(Nomeg, dtype=complex)
-    Ttot = 1
-    for m in range(Nomeg):
-        yx = np.exp(1j * w_HH[m] * t) * dhx
-        Dx[m] = trapezoid(yx, t) / Ttot
-        yy = np.exp(1j * w_HH[m] * t) * dhy
-        Dy[m] = trapezoid(yy, t) / Ttot
-
-    Sx_r = w_HH**2 * np.abs(Dx)**2
-    Sx_r[Sx_r <= 0] = 1e-16
-    Sx = np.log10(Sx_r)
-
-    Sy_r = w_HH**2 * np.abs(Dy)**2
-    Sy_r[Sy_r <= 0] = 1e-16
-    Sy = np.log10(Sy_r)
+    with profile_stage("HHG yield", "transform"):
+        Nomeg = len(w_HH)
+        Dx = np.zeros(Nomeg, dtype=complex)
+        Dy = np.zeros(Nomeg, dtype=complex)
+        Ttot = 1
+        for m in range(Nomeg):
+            yx = np.exp(1j * w_HH[m] * t) * dhx
+            Dx[m] = trapezoid(yx, t) / Ttot
+            yy = np.exp(1j * w_HH[m] * t) * dhy
+            Dy[m] = trapezoid(yy, t) / Ttot
+
+    with profile_stage("HHG yield", "post-process"):
+        Sx_r = w_HH**2 * np.abs(Dx)**2
+        Sx_r[Sx_r <= 0] = 1e-16
+        Sx = np.log10(Sx_r)
+
+        Sy_r = w_HH**2 * np.abs(Dy)**2
+        Sy_r[Sy_r <= 0] = 1e-16
+        Sy = np.log10(Sy_r)
    
-    S_r = w_HH**2 * np.abs((Dx) + (Dy))**2
-    S_r[S_r <= 0] = 1e-16
-    S = np.log10(S_r) 
+        S_r = w_HH**2 * np.abs((Dx) + (Dy))**2
+        S_r[S_r <= 0] = 1e-16
+        S = np.log10(S_r) 
     
-    ww = (w_HH / w0)
-    #------------
-    messages = []
-    if 'total' in selected_yields:
-        tot_yield = np.zeros(Nomeg)
-        for i in range(Nomeg):
-            tot_yield[i] = trapezoid(S_r, ww)
-        messages.append(
-            f'total yield = {np.sum(tot_yield):.2e}')
-    if 'x' in selected_yields:        
-        x_yield = np.zeros(Nomeg)    
-        for j in range(Nomeg):
-            x_yield[j] = trapezoid(Sx_r, ww)
-        messages.append(f'x yield = {np.sum(x_yield):.2e}')
-
-    if 'y' in selected_yields:        
-        y_yield = np.zeros(Nomeg)    
-        for k in range(Nomeg):
-            y_yield[k] = trapezoid(Sy_r, ww)
-        messages.append(f'y yield = {np.sum(y_yield):.2e}')
+        ww = (w_HH / w0)
+        #------------
+        messages = []
+        if 'total' in selected_yields:
+            tot_yield = np.zeros(Nomeg)
+            for i in range(Nomeg):
+                tot_yield[i] = trapezoid(S_r, ww)
+            messages.append(
+                f'total yield = {np.sum(tot_yield):.2e}')
+        if 'x' in selected_yields:        
+            x_yield = np.zeros(Nomeg)    
+            for j in range(Nomeg):
+                x_yield[j] = trapezoid(Sx_r, ww)
+            messages.append(f'x yield = {np.sum(x_yield):.2e}')
+
+        if 'y' in selected_yields:        
+            y_yield = np.zeros(Nomeg)    
+            for k in range(Nomeg):
+                y_yield[k] = trapezoid(Sy_r, ww)
+            messages.append(f'y yield = {np.sum(y_yield):.2e}')
         
     return w0, T, Sx, Sy, S, ww, messages
 
@@ -0,0 +1,229 @@
+# high_harmonic/live_spectrum.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import io
+import os
+import numpy as np
+import pyqtgraph as pg
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QHBoxLayout, QLabel, QPushButton
+from PyQt5.QtCore import Qt, QTimer
+#--------------------------------
+from attoscience_studio.helper_functions.constants import PhysicalConstants
+Ip_HeV = PhysicalConstants.Ip_HeV
+##----------------------------------------------------
+# HHG spectrum of a total_current file that is still being written. The file
+# is followed by byte offset and only appended rows are parsed; the Fourier
+# integrals on the fixed harmonic grid are running sums, so every refresh
+# costs O(new samples x frequencies), independent of the run length.
+##----------------------------------------------------
+DEFAULT_CHUNK_BYTES = 64 * 1024**2
+COMPONENT_PENS = {"total": "k", "x": "b", "y": "r"}
+##----------------------------------------------------
+class TotalCurrentTail:
+    """
+    Follows a growing Octopus total_current file. read_new() returns the
+    complete rows appended since the previous call; a partly written last
+    line is kept back until its newline arrives.
+    """
+    def __init__(self, file_path):
+        self.file_path = file_path
+        self.offset = 0
+        self.n_columns = None
+
+    def reset(self):
+        self.offset = 0
+
+    def read_new(self):
+        size = os.path.getsize(self.file_path)
+        if size < self.offset:
+            # The file was truncated or restarted
+            raise ValueError("The total_current file shrank; the run was restarted.")
+        if size == self.offset:
+            return self._empty()
+        with open(self.file_path, "rb") as f:
+            f.seek(self.offset)
+            chunk = f.read(size - self.offset)
+        end = chunk.rfind(b"\n")
+        if end < 0:
+            return self._empty()
+        self.offset += end + 1
+        rows = np.loadtxt(io.BytesIO(chunk[:end + 1]), comments="#", ndmin=2)
+        if rows.size and self.n_columns is None:
+            self.n_columns = rows.shape[1]
+        return rows if rows.size else self._empty()
+
+    def _empty(self):
+        return np.empty((0, self.n_columns or 0))
+
+##----------------------------------------------------
+class LiveSpectrum:
+    """
+    Running Fourier integrals Dx(w), Dy(w) = int exp(i w t) j(t) dt on the
+    harmonic grid of calculate_spectrum() (w = 0 ... q w0, dw = 0.001).
+
+    New samples are added with the trapezoid rule, continuing from the last
+    sample of the previous block, so the sums equal np.trapz() over
+    everything read so far. The end-of-pulse window is not applied (it
+    depends on the final length of the run). The time-derivative spectrum
+    uses int exp(i w t) j' dt = exp(i w t_n) j(t_n) - i w D(w), with j(t_0) = 0.
+    """
+    def __init__(self, lambda0_nm, q_value, dw=0.001, max_bytes=DEFAULT_CHUNK_BYTES):
+        self.w0 = 45.5633 / lambda0_nm
+        self.T = 2 * np.pi / self.w0
+        self.w = np.arange(0, q_value * self.w0 + dw, dw)
+        self.max_bytes = max_bytes
+        self.Dx = np.zeros(len(self.w), dtype=np.complex128)
+        self.Dy = np.zeros(len(self.w), dtype=np.complex128)
+        self.j0 = None
+        self.last = None            # (t, jx, jy) of the newest sample
+        self.n_samples = 0
+
+    def update(self, rows):
+        """
+        Adds rows of total_current (columns: iter, t, jx, jy, ...). Returns
+        the number of new samples.
+        """
+        if len(rows) == 0:
+            return 0
+        t, jx, jy = rows[:, 1], rows[:, 2], rows[:, 3]
+        if self.j0 is None:
+            self.j0 = (jx[0], jy[0])
+        jx = jx - self.j0[0]
+        jy = jy - self.j0[1]
+        if self.last is not None:
+            t = np.concatenate(([self.last[0]], t))
+            jx = np.concatenate(([self.last[1]], jx))
+            jy = np.concatenate(([self.last[2]], jy))
+
+        # Blocks of samples bounded by max_bytes for the (samples, w) phasors
+        block = max(2, int(self.max_bytes // (4 * 16 * len(self.w))))
+        for first in range(0, len(t) - 1, block - 1):
+            sl = slice(first, min(first + block, len(t)))
+            phasor = np.exp(1j * np.outer(t[sl], self.w))
+            weights = np.zeros(sl.stop - sl.start)
+            step = np.diff(t[sl])
+            weights[:-1] += 0.5 * step
+            weights[1:] += 0.5 * step
+            self.Dx += (weights * jx[sl]) @ phasor
+            self.Dy += (weights * jy[sl]) @ phasor
+
+        self.last = (t[-1], jx[-1], jy[-1])
+        added = len(rows)
+        self.n_samples += added
+        return added
+
+    def spectra(self, time_derivative='False'):
+        # Same post-processing as calculate_spectrum(): log10 of w^2 |D|^2
+        Dx, Dy = self.Dx, self.Dy
+        if time_derivative == 'True' and self.last is not None:
+            boundary = np.exp(1j * self.w * self.last[0])
+            Dx = boundary * self.last[1] - 1j * self.w * Dx
+            Dy = boundary * self.last[2] - 1j * self.w * Dy
+        spectra = []
+        for D in (Dx, Dy, Dx + Dy):
+            S = self.w**2 * np.abs(D)**2
+            S[S <= 0] = 1e-16
+            spectra.append(np.log10(S))
+        Sx, Sy, SS = spectra
+        return self.w, Sx, Sy, SS
+
+    @property
+    def duration_oc(self):
+        return 0.0 if self.last is None else self.last[0] / self.T
+
+##----------------------------------------------------
+class LiveSpectrumWindow(QDialog):
+    """
+    Non-modal window that polls the file every interval_ms and redraws the
+    selected spectra against the harmonic order (or photon energy).
+    """
+    def __init__(self, file_path, lambda0_nm, q_value, time_derivative='False', selected_spectrums=("total",),
+                 energy_axis=False, interval_ms=1000, parent=None):
+        super().__init__(parent)
+        # Closing the window releases it (and its timer) instead of hiding it
+        self.setAttribute(Qt.WA_DeleteOnClose)
+        self.setWindowTitle(f"Live HHG spectrum - {os.path.basename(file_path)}")
+        self.resize(800, 500)
+        self.tail = TotalCurrentTail(file_path)
+        self.spectrum = LiveSpectrum(lambda0_nm, q_value)
+        self.time_derivative = time_derivative
+        self.selected_spectrums = [name for name in ("total", "x", "y") if name in selected_spectrums]
+        self.energy_axis = energy_axis
+
+        layout = QVBoxLayout(self)
+        self.plot_widget = pg.PlotWidget()
+        self.plot_widget.setBackground('w')
+        self.plot_widget.setLabel('bottom', "Energy [eV]" if energy_axis else "Harmonic order")
+        self.plot_widget.setLabel('left', "log10 Intensity [arb.u.]")
+        self.plot_widget.addLegend()
+        self.curves = {name: self.plot_widget.plot(pen=pg.mkPen(COMPONENT_PENS[name], width=1.2), name=name)
+                       for name in self.selected_spectrums}
+        layout.addWidget(self.plot_widget)
+
+        controls = QHBoxLayout()
+        self.status_label = QLabel("Waiting for data...")
+        self.pause_button = QPushButton("Pause")
+        self.pause_button.clicked.connect(self.toggle)
+        controls.addWidget(self.status_label)
+        controls.addStretch()
+        controls.addWidget(self.pause_button)
+        layout.addLayout(controls)
+
+        self.timer = QTimer(self)
+        self.timer.timeout.connect(self.refresh)
+        self.timer.start(interval_ms)
+        self.refresh()
+
+    def refresh(self):
+        try:
+            added = self.spectrum.update(self.tail.read_new())
+        except (OSError, ValueError) as e:
+            self.timer.stop()
+            self.pause_button.setEnabled(False)
+            self.status_label.setText(f"Stopped: {e}")
+            return
+        if added == 0 or self.spectrum.n_samples < 2:
+            return
+        w, Sx, Sy, SS = self.spectrum.spectra(self.time_derivative)
+        x = w * Ip_HeV if self.energy_axis else w / self.spectrum.w0
+        for name, S in (("total", SS), ("x", Sx), ("y", Sy)):
+            if name in self.curves:
+                self.curves[name].setData(x, S)
+        self.status_label.setText(f"{self.spectrum.n_samples} samples, t = {self.spectrum.duration_oc:.3f} o.c.")
+
+    def toggle(self):
+        if self.timer.isActive():
+            self.timer.stop()
+            self.pause_button.setText("Resume")
+        else:
+            self.timer.start()
+            self.pause_button.setText("Pause")
+            self.refresh()
+
+    def stop(self):
+        self.timer.stop()
+
+    def done(self, result):
+        # Esc/reject hides a QDialog without a close event
+        self.stop()
+        super().done(result)
+
+    def closeEvent(self, event):
+        self.stop()
+        super().closeEvent(event)
@@ -40,9 +40,11 @@ from qtconsole.rich_jupyter_widget import RichJupyterWidget
 from attoscience_studio.resources_rc import *
 #--------------------------------
 from attoscience_studio.utils.window_func import TotalCurrentFilter
+from attoscience_studio.utils.profiler import profile_stage
 ##----------------------------------------------------
 def tot_curr(lambda0_nm, filtering, window_func, file_path):
-    data = np.loadtxt(file_path)
+    with profile_stage("Total current", "load"):
+        data = np.loadtxt(file_path)
     nrm = 0.9500
     nn = filtering    
     w0 = 45.5633 / lambda0_nm
@@ -70,8 +72,9 @@ def tot_curr(lambda0_nm, filtering, window_func, file_path):
         decay_rate = WF_param
     
     #---------------CALL--------------------
-    filter_obj = TotalCurrentFilter(method=filter_method, EoP=EoP, exponent=exponent, sigma=sigma, decay_rate=decay_rate)
-    hx, hy = filter_obj.apply_filter(t, jx, jy)
+    with profile_stage("Total current", "filter"):
+        filter_obj = TotalCurrentFilter(method=filter_method, EoP=EoP, exponent=exponent, sigma=sigma, decay_rate=decay_rate)
+        hx, hy = filter_obj.apply_filter(t, jx, jy)
     #---------------------------------------
     return jx, jy, hx, hy, t, T
 
@@ -87,7 +90,8 @@ def tot_curr_connector(lambda0_nm, filtering, curr_components, plot_settings, wi
         return    
     if file_path:
         jx, jy, hx, hy, t, T = tot_curr(lambda0_nm, filtering, window_func, file_path)
-        plot_tot_curr(jx, jy, hx, hy, t, T, filtering, lambda0_nm, curr_components, plot_settings, extract_data_option)
+        with profile_stage("Total current", "plot"):
+            plot_tot_curr(jx, jy, hx, hy, t, T, filtering, lambda0_nm, curr_components, plot_settings, extract_data_option)
 
         timestamp = datetime.now().strftime("[%H:%M:%S]")
         msg = (
@@ -0,0 +1,125 @@
+# pg_analyzing/field_synthesis.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+#--------------------------------
+from attoscience_studio.helper_functions.constants import PhysicalConstants
+c_au = PhysicalConstants.c_au
+##----------------------------------------------------
+ENVELOPES = ("Sine_square", "Gaussian")
+##----------------------------------------------------
+def carrier_frequency(lambda_nm):
+    return 0.045563 / (lambda_nm * 1.0e-3)
+
+def vector_potential_amplitude(intensity, w0):
+    """
+    Peak vector potential [a.u.] for a peak intensity in TW/cm^2.
+    """
+    return np.sqrt(intensity * 1.0e12) / np.sqrt(3.509470 * 1.0e16) * c_au / w0
+
+def pulse_timing(lambda1_nm, lambda2_nm, cycles1, cycles2, delay):
+    """
+    Start, end and centre of both pulses. The first pulse starts at t = 0 and
+    the centre of the second one is delayed by `delay` optical cycles of the first.
+    """
+    w01 = carrier_frequency(lambda1_nm)
+    w02 = carrier_frequency(lambda2_nm)
+    T01 = 2 * np.pi / w01
+    T02 = 2 * np.pi / w02
+    Ttot1 = cycles1 * T01
+    Ttot2 = cycles2 * T02
+    Tst1 = 0 * T01
+    Tst2 = Tst1 + (Ttot1 / 2) + delay * T01 - (Ttot2 / 2)
+    return {
+        "w01": w01, "w02": w02, "T01": T01, "T02": T02,
+        "Ttot1": Ttot1, "Ttot2": Ttot2,
+        "Tst1": Tst1, "Tst2": Tst2,
+        "Tend1": Tst1 + Ttot1, "Tend2": Tst2 + Ttot2,
+        "tm1": Tst1 + Ttot1 / 2, "tm2": Tst2 + Ttot2 / 2,
+    }
+
+##----------------------------------------------------
+def envelope(t, A0, Tst, Ttot, envelope_name):
+    """
+    Pulse envelope on a whole time array (any shape; Tst/Ttot/A0 broadcast).
+
+    Parameters:
+    - t: Time [a.u.].
+    - A0: Peak amplitude.
+    - Tst, Ttot: Start time and total duration of the pulse [a.u.].
+    - envelope_name: 'Sine_square' (zero outside [Tst, Tst + Ttot]) or 'Gaussian' (FWHM = Ttot/2).
+    """
+    if envelope_name == 'Sine_square':
+        x = (t - Tst) / Ttot
+        return np.where((x >= 0) & (x <= 1), A0 * np.sin(np.pi * x)**2, 0.0)
+    elif envelope_name == 'Gaussian':
+        tm = Tst + Ttot / 2
+        return A0 * np.exp(-2 * np.log(2) * ((t - tm) / (Ttot / 2))**2)
+    raise ValueError(f"Unknown envelope '{envelope_name}'. Expected one of {ENVELOPES}.")
+
+def carrier(t, w0, Ttot, cep):
+    """
+    Real and imaginary parts of exp(1j*w0*(t - Ttot/2) + cep), shared by both
+    polarization components. As in the original model, cep enters the
+    exponent outside the 1j and therefore scales the amplitude by exp(cep).
+    """
+    phase = w0 * (t - Ttot / 2)
+    scale = np.exp(cep)
+    return scale * np.cos(phase), scale * np.sin(phase)
+
+def polarization_components(env, carrier_re, carrier_im, alpha_deg, eps):
+    """
+    x and y components of Re[(cos a + i eps sin a, sin a - i eps cos a) * carrier * env].
+    """
+    alpha = alpha_deg * np.pi / 180
+    re = carrier_re * env
+    im = carrier_im * env
+    Ax = np.cos(alpha) * re - eps * np.sin(alpha) * im
+    Ay = np.sin(alpha) * re + eps * np.cos(alpha) * im
+    return Ax, Ay
+
+##----------------------------------------------------
+def two_color_field(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2,
+                    alpha1, alpha2, cep1, cep2, delay, envelope_name, time_step):
+    """
+    Vectorized replacement for the per-sample field synthesis of polarization_gating().
+    Returns w01, w02, T01, T02, t, At_x, At_y, envelope1, envelope2.
+    """
+    p = pulse_timing(lambda1_nm, lambda2_nm, cycles1, cycles2, delay)
+    A01 = vector_potential_amplitude(intensity1, p["w01"])
+    A02 = vector_potential_amplitude(intensity2, p["w02"])
+
+    t = np.arange(0, p["Tend2"] + time_step, time_step)
+    envelope1 = envelope(t, A01, p["Tst1"], p["Ttot1"], envelope_name)
+    envelope2 = envelope(t, A02, p["Tst2"], p["Ttot2"], envelope_name)
+
+    At_x1, At_y1 = polarization_components(envelope1, *carrier(t, p["w01"], p["Ttot1"], cep1), alpha1, eps1)
+    At_x2, At_y2 = polarization_components(envelope2, *carrier(t, p["w02"], p["Ttot2"], cep2), alpha2, eps2)
+
+    return p["w01"], p["w02"], p["T01"], p["T02"], t, At_x1 + At_x2, At_y1 + At_y2, envelope1, envelope2
+
+def two_color_envelopes(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, delay, envelope_name, time_step):
+    """
+    Envelopes only (what gate_width() needs). Returns the timing dict, t, envelope1, envelope2.
+    """
+    p = pulse_timing(lambda1_nm, lambda2_nm, cycles1, cycles2, delay)
+    t = np.arange(0, p["Tend2"] + time_step, time_step)
+    envelope1 = envelope(t, vector_potential_amplitude(intensity1, p["w01"]), p["Tst1"], p["Ttot1"], envelope_name)
+    envelope2 = envelope(t, vector_potential_amplitude(intensity2, p["w02"]), p["Tst2"], p["Ttot2"], envelope_name)
+    return p, t, envelope1, envelope2
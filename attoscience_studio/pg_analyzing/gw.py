@@ -39,63 +39,25 @@ from attoscience_studio.helper_functions.constants import PhysicalConstants, Ato
 TIMEau = AtomicUnits.TIMEau
 CNST_1_TWcm2 = PhysicalConstants.CNST_1_TWcm2
 c_au = PhysicalConstants.c_au
+#--------------------------------
+from attoscience_studio.utils.profiler import profile_stage
+from attoscience_studio.pg_analyzing.field_synthesis import two_color_envelopes
+from attoscience_studio.pg_analyzing.gw_sweep import (time_dependent_ellipticity, gate_duration, default_sweep_axes,
+                                                      gate_width_sweep, save_sweep, plot_gw_sweep, COUNTER_ROTATING)
+from attoscience_studio.pg_analyzing.gw_design import design_gate, format_solutions, DEFAULT_CYCLE_RANGE
 ##----------------------------------------------------
 def gate_width(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2, delay, envelope_name, time_step):
-    lambda_um1 = lambda1_nm * 1.0e-3
-    lambda_um2 = lambda2_nm * 1.0e-3
-    
-    fiel_str1 = intensity1 * CNST_1_TWcm2
-    fiel_str2 = intensity2 * CNST_1_TWcm2
-    
-    w01 = 0.045563 / lambda_um1
-    w02 = 0.045563 / lambda_um2
-    
-    T01 = 2 * np.pi / w01
-    T02 = 2 * np.pi / w02
-        
-    Iau1 = np.sqrt(intensity1 * 1.0e12) / np.sqrt(3.509470 * 1.0e16)
-    Iau2 = np.sqrt(intensity2 * 1.0e12) / np.sqrt(3.509470 * 1.0e16)
-    
-    E0_laser1 = np.sqrt(intensity1 * 1e12) / np.sqrt(3.509470 * 1e16)
-    E0_laser2 = np.sqrt(intensity2 * 1e12) / np.sqrt(3.509470 * 1e16)
-    
-    A0_laser1 = Iau1 * c_au / w01
-    A0_laser2 = Iau2 * c_au / w02
-    
-    Ttot1 = cycles1 * T01
-    Ttot2 = cycles2 * T02
-    Tdelay = delay * T01
-    Tst1 = 0 * T01
-    
-    Tst2 = Tst1 + (Ttot1 / 2) + Tdelay - (Ttot2 / 2)
-    Tend1 = Tst1 + Ttot1
-    Tend2 = Tst2 + Ttot2
-    
-    tm1 = Tst1 + Ttot1 / 2
-    tm2 = Tst2 + Ttot2 / 2 
-    
-    dt = time_step
-    t = np.arange(0, Tend2 + dt, dt)
-    max_iter = int(Tend2 / dt) * 2
+    #---------------CALL--------------------
+    p, t, envelope1, envelope2 = two_color_envelopes(lambda1_nm, lambda2_nm, intensity1, intensity2,
+                                                      cycles1, cycles2, delay, envelope_name, time_step)
+    #---------------------------------------
+    w01, w02, T01, T02 = p["w01"], p["w02"], p["T01"], p["T02"]
     Time_OC = t / T01
-    
-    def heaviside(x):
-        return 1.0 * (x >= 0)
-    
-    if envelope_name == 'Sine_square':
-        envelope_func1 = lambda t: A0_laser1 * np.sin(np.pi * (t - Tst1) / Ttot1)**2 * heaviside(Tend1 - t) * heaviside(t - Tst1)
-        envelope_func2 = lambda t: A0_laser2 * np.sin(np.pi * (t - Tst2) / Ttot2)**2 * heaviside(Tend2 - t) * heaviside(t - Tst2)
-        
-        ellipt_func = lambda t: (envelope_func1(t) - envelope_func2(t)) / (envelope_func1(t) + envelope_func2(t))
 
-    elif envelope_name == 'Gaussian':
-        envelope_func1 = lambda t: A0_laser1 * np.exp(-2 * np.log(2) * ((t - tm1) / (Ttot1 / 2))**2)
-        envelope_func2 = lambda t: A0_laser2 * np.exp(-2 * np.log(2) * ((t - tm2) / (Ttot2 / 2))**2)
-        
-        ellipt_func = lambda t: (envelope_func1(t) - envelope_func2(t)) / (envelope_func1(t) + envelope_func2(t))   
-    
-    time_dep_ellipt = np.array([ellipt_func(ti) for ti in t])
-    
+    # (E1 - E2) / (E1 + E2), as for two counter-rotating circular pulses; eps1/eps2
+    # only enter the sweep. Outside both sin^2 pulses the ratio is 0/0 and left as NaN
+    time_dep_ellipt = time_dependent_ellipticity(envelope1, envelope2, *COUNTER_ROTATING)
+
     return w01, w02, T01, T02, t, Time_OC, time_dep_ellipt
 
 ##----------------------------------------------------
@@ -104,14 +66,36 @@ def print_to_console(console: RichJupyterWidget, msg: str):
         console._kernel_client.execute(f"print('''{msg}''')")
                         
 def gw_connector(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2, 
-                 ellipticity_threshold, delay, envelope_name, time_step, plot_settings, extract_data_option, ipy_console=None):
+                 ellipticity_threshold, delay, envelope_name, time_step, plot_settings, extract_data_option,
+                 ipy_console=None, sweep_option=False, target_gate_width=None, cycle_range=DEFAULT_CYCLE_RANGE):
     try:
                  
-        w01, w02, T01, T02, t, Time_OC, time_dep_ellipt = gate_width(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2, delay, envelope_name, time_step)
-        
-        plot_gw(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2, ellipticity_threshold, delay, 
-                envelope_name, time_step, w01, w02, T01, T02, t, Time_OC, time_dep_ellipt,
-                plot_settings, extract_data_option)
+        with profile_stage("Gate width", "transform"):
+            w01, w02, T01, T02, t, Time_OC, time_dep_ellipt = gate_width(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2, delay, envelope_name, time_step)
+            gate_width_oc = gate_duration(t, time_dep_ellipt, ellipticity_threshold) / T01
+
+        if sweep_option:
+            with profile_stage("Gate width sweep", "transform"):
+                axes = default_sweep_axes(delay, eps1, eps2, intensity1, intensity2)
+                sweep = gate_width_sweep(lambda1_nm, lambda2_nm, intensity1, cycles1, cycles2, envelope_name, time_step,
+                                         ellipticity_threshold, axes["delay"], axes["eps1"], axes["eps2"], axes["intensity_ratio"])
+            if 'extract_data' in extract_data_option:
+                save_sweep(sweep)
+
+        if target_gate_width is not None:
+            with profile_stage("Gate width design", "transform"):
+                solutions = design_gate(target_gate_width, ellipticity_threshold, lambda1_nm, lambda2_nm, intensity1, intensity2,
+                                        envelope_name=envelope_name, cycle_range=cycle_range)
+
+        with profile_stage("Gate width", "plot"):
+            plot_gw(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2, ellipticity_threshold, delay, 
+                    envelope_name, time_step, w01, w02, T01, T02, t, Time_OC, time_dep_ellipt,
+                    plot_settings, extract_data_option)
+            if sweep_option:
+                # Opens on the slice of the single-run gate (counter-rotating pulses)
+                plot_gw_sweep(sweep, initial={"delay": delay, "eps1": COUNTER_ROTATING[0], "eps2": COUNTER_ROTATING[1],
+                                              "intensity_ratio": intensity2 / intensity1},
+                              plot_settings=plot_settings)
  
         T01_SI = T01 * TIMEau
         T02_SI = T02 * TIMEau
@@ -133,6 +117,11 @@ def gw_connector(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles
             f">>> w2 [a.u.]: {w02:.12e}\n"
             f">>> Max Time_OC [o.c.]: {max_Time_OC:.12e}\n"
             f">>> Delay factor between two pulses: {delay:.12e}\n"
+            f">>> Gate width [o.c.]: {gate_width_oc:.12e}\n"
+            + (f">>> Gate width sweep: {sweep['gate_width'].size} parameter sets, max gate width [o.c.]: {np.max(sweep['gate_width_oc']):.12e}\n"
+               if sweep_option else "")
+            + (f">>> Delay/cycles ({cycle_range[0]}-{cycle_range[1]} o.c.) for a {target_gate_width} o.c. gate:\n" + format_solutions(solutions)
+               if target_gate_width is not None else "")
             + "-" * 75
         )
         print_to_console(ipy_console, msg)
@@ -432,6 +421,18 @@ class ModernDialog(QDialog):
             "ellipticity_threshold_entry", "ellipticity_threshold", "Enter the ellipticity threshold (e.g., 0.2)", ""
         )
         timing_layout.addRow("Ellipticity threshold:", ellipticity_threshold_container)
+
+        # target gate width (optional)
+        target_gate_width_container = self._create_parameter_container(
+            "target_gate_width_entry", "target_gate_width", "Optional: solve for delay/cycles (e.g., 0.5)", "[o.c.]"
+        )
+        timing_layout.addRow("Target gate width:", target_gate_width_container)
+
+        # pulse durations tried by the solver
+        cycle_range_container = self._create_parameter_container(
+            "cycle_range_entry", "cycle_range", "Cycles tried by the solver (e.g., 2-10)", "[o.c.]"
+        )
+        timing_layout.addRow("Solver cycle range:", cycle_range_container)
     
         # Envelope
         envelope_container = QWidget()
@@ -466,6 +467,10 @@ class ModernDialog(QDialog):
     
         self.extract_data_checkbox = QCheckBox("Extract Data")
         options_layout.addWidget(self.extract_data_checkbox)
+
+        self.sweep_checkbox = QCheckBox("Parameter Sweep (delay, ellipticity, intensity ratio)")
+        self.sweep_checkbox.setChecked(previous_input_gw.get("sweep", False))
+        options_layout.addWidget(self.sweep_checkbox)
         options_layout.addStretch()
     
         options_subgroup.setLayout(options_layout)
@@ -839,6 +844,23 @@ class ModernDialog(QDialog):
             delay = float(self.delay_entry.text())
             previous_input_gw["delay"] = delay
 
+            target_gate_width = None
+            if self.target_gate_width_entry.text().strip():
+                target_gate_width = float(self.target_gate_width_entry.text())
+                if target_gate_width <= 0:
+                    raise ValueError("Target gate width must be a positive number.")
+            previous_input_gw["target_gate_width"] = "" if target_gate_width is None else target_gate_width
+
+            cycle_range = DEFAULT_CYCLE_RANGE
+            if self.cycle_range_entry.text().strip():
+                try:
+                    cycle_range = tuple(int(value) for value in self.cycle_range_entry.text().split("-"))
+                except ValueError:
+                    raise ValueError("Solver cycle range must be two whole numbers, e.g. 2-10.")
+                if len(cycle_range) != 2 or not 0 < cycle_range[0] <= cycle_range[1]:
+                    raise ValueError("Solver cycle range must be min-max with 0 < min <= max, e.g. 2-10.")
+            previous_input_gw["cycle_range"] = self.cycle_range_entry.text().strip()
+
             time_step = float(self.time_step_spinbox.value())
             if time_step <= 0.00001:
                 raise ValueError("time_step cannot be less than 0.00001.")
@@ -887,14 +909,15 @@ class ModernDialog(QDialog):
                 "ellipticity_threshold": ellipticity_threshold, 
                 "delay": delay, 
                 "Envelope": envelope_name,  
-                "time_step": time_step
+                "time_step": time_step,
+                "sweep": self.sweep_checkbox.isChecked()
             })
 
             # Call
             gw_connector(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2,
                         eps1, eps2, ellipticity_threshold, delay, envelope_name, time_step, 
                         plot_settings, extract_data_option,
-                        self.parent().ipy_console)
+                        self.parent().ipy_console, self.sweep_checkbox.isChecked(), target_gate_width, cycle_range)
                  
         except ValueError as e:
             QMessageBox.warning(self, "Invalid Input", f"Error: {e}")
@@ -0,0 +1,172 @@
+# pg_analyzing/gw_design.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import itertools
+import numpy as np
+from scipy.optimize import brentq
+#--------------------------------
+from attoscience_studio.pg_analyzing.field_synthesis import pulse_timing, envelope, vector_potential_amplitude
+from attoscience_studio.pg_analyzing.gw_sweep import time_dependent_ellipticity, gate_bracket, gate_edges, COUNTER_ROTATING
+##----------------------------------------------------
+# Inverse design of the polarization gate: for each (cycles1, cycles2) pair the
+# gate width is a continuous function of the delay. It is evaluated for all
+# delays of a coarse scan at once, target widths are bracketed on that grid,
+# located by linear interpolation and polished with a few vectorized
+# regula falsi steps. Only the final solutions get exact gate edges (roots of
+# the closed-form envelopes, not grid samples).
+##----------------------------------------------------
+# Pulse durations [o.c.] tried by default, (min, max) inclusive
+DEFAULT_CYCLE_RANGE = (2, 10)
+
+def _refine_edge(margin, t, a, i_out, i_in, xtol):
+    # Gate open at the edge of the window or next to an undefined (0/0) sample
+    if i_out < 0 or i_out >= len(t) or not np.isfinite(a[i_out]):
+        return t[i_in]
+    return brentq(margin, t[i_out], t[i_in], xtol=xtol)
+
+def gate_window(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2, delay,
+                envelope_name, ellipticity_threshold, n_samples=2049, xtol=1e-10):
+    """
+    Gate start and end [a.u.] of one pulse pair, NaN if |xi| never drops below
+    the threshold. The crossings are bracketed on n_samples points spanning both
+    pulses and then solved exactly. Also returns the pulse timing dict.
+    """
+    p = pulse_timing(lambda1_nm, lambda2_nm, cycles1, cycles2, delay)
+    A01 = vector_potential_amplitude(intensity1, p["w01"])
+    A02 = vector_potential_amplitude(intensity2, p["w02"])
+
+    def envelopes(t):
+        return (envelope(t, A01, p["Tst1"], p["Ttot1"], envelope_name),
+                envelope(t, A02, p["Tst2"], p["Ttot2"], envelope_name))
+
+    def margin(t):
+        # <= 0 inside the gate
+        E1, E2 = envelopes(t)
+        return float(np.abs(eps1 * E1 + eps2 * E2) - ellipticity_threshold * (E1 + E2))
+
+    t = np.linspace(min(p["Tst1"], p["Tst2"]), max(p["Tend1"], p["Tend2"]), n_samples)
+    a, left, right, gated = gate_bracket(time_dependent_ellipticity(*envelopes(t), eps1, eps2), ellipticity_threshold)
+    if not gated:
+        return np.nan, np.nan, p
+    start = _refine_edge(margin, t, a, int(left), int(left) + 1, xtol)
+    end = _refine_edge(margin, t, a, int(right), int(right) - 1, xtol)
+    return start, end, p
+
+def gate_widths_oc(delays, lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2,
+                   envelope_name, ellipticity_threshold, n_samples=2049):
+    """
+    Gate width [o.c. of pulse 1] for an array of delays at once (0 where there
+    is no gate). Every delay gets its own n_samples grid spanning both pulses;
+    the threshold crossings are interpolated between samples.
+    """
+    delays = np.asarray(delays, dtype=float)
+    p = pulse_timing(lambda1_nm, lambda2_nm, cycles1, cycles2, delays)
+    t = np.linspace(np.minimum(p["Tst1"], p["Tst2"]), np.maximum(p["Tend1"], p["Tend2"]), n_samples, axis=-1)
+    E1 = envelope(t, vector_potential_amplitude(intensity1, p["w01"]), p["Tst1"], p["Ttot1"], envelope_name)
+    E2 = envelope(t, vector_potential_amplitude(intensity2, p["w02"]), p["Tst2"][..., None], p["Ttot2"], envelope_name)
+    start, end = gate_edges(t, time_dependent_ellipticity(E1, E2, eps1, eps2), ellipticity_threshold)
+    return np.nan_to_num(end - start, nan=0.0) / p["T01"]
+
+def gate_width_oc(delay, lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2,
+                  envelope_name, ellipticity_threshold):
+    # Gate width [o.c. of pulse 1] with exact edges; 0 where there is no gate
+    start, end, p = gate_window(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2,
+                                delay, envelope_name, ellipticity_threshold)
+    return 0.0 if np.isnan(start) else (end - start) / p["T01"]
+
+def _bracketed_roots(residual, lo, hi, f_lo, f_hi, n_iter=30, xtol=1e-10):
+    # Vectorized Illinois regula falsi on the brackets [lo, hi] (f_lo * f_hi < 0)
+    lo, hi, f_lo, f_hi = (np.array(x, dtype=float) for x in (lo, hi, f_lo, f_hi))
+    x = lo - f_lo * (hi - lo) / (f_hi - f_lo)
+    for _ in range(n_iter):
+        f_x = residual(x)
+        left = np.sign(f_x) == np.sign(f_lo)
+        # Halve the weight of the end that did not move (Illinois step)
+        f_hi = np.where(left, f_hi / 2, f_hi)
+        f_lo = np.where(left, f_x, f_lo / 2)
+        lo = np.where(left, x, lo)
+        f_hi = np.where(left, f_hi, f_x)
+        hi = np.where(left, hi, x)
+        x_new = lo - f_lo * (hi - lo) / (f_hi - f_lo)
+        done = np.all(np.abs(x_new - x) <= xtol)
+        x = x_new
+        if done:
+            break
+    return x
+
+##----------------------------------------------------
+def design_gate(target_width_oc, ellipticity_threshold, lambda1_nm, lambda2_nm, intensity1, intensity2,
+                eps1=COUNTER_ROTATING[0], eps2=COUNTER_ROTATING[1], envelope_name='Sine_square', cycle_range=DEFAULT_CYCLE_RANGE,
+                cycles1_values=None, cycles2_values=None, delay_range=None, n_scan=81, rtol=1e-4):
+    """
+    All (cycles1, cycles2, delay) combinations whose gate is target_width_oc wide.
+
+    Parameters:
+    - target_width_oc: Target gate width [o.c. of pulse 1].
+    - ellipticity_threshold: The gate is where |xi| <= threshold.
+    - cycle_range: (min, max) whole pulse durations [o.c.] tried when cycles1_values is None.
+    - cycles1_values, cycles2_values: Explicit candidate durations [o.c.]. With cycles2_values=None both pulses use the same.
+    - delay_range: (min, max) delay [o.c.]; default is 0 up to full separation, (cycles1 + cycles2) / 2.
+    - n_scan: Delays per pair used to bracket the solutions.
+    - rtol: Relative tolerance on the achieved width; rejects brackets that only straddle a jump (gate opening).
+
+    Returns a list of dicts (cycles1, cycles2, delay, gate_width_oc, gate_start, gate_end [a.u.]),
+    sorted by cycles and delay.
+    """
+    if target_width_oc <= 0:
+        raise ValueError("Target gate width must be positive.")
+    if cycles1_values is None:
+        if not 0 < cycle_range[0] <= cycle_range[1]:
+            raise ValueError("The cycle range must be positive and ordered (min <= max).")
+        cycles1_values = range(int(cycle_range[0]), int(cycle_range[1]) + 1)
+    if cycles2_values is None:
+        pairs = [(c, c) for c in cycles1_values]
+    else:
+        pairs = list(itertools.product(cycles1_values, cycles2_values))
+
+    solutions = []
+    for cycles1, cycles2 in pairs:
+        args = (lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2, envelope_name, ellipticity_threshold)
+        residual = lambda delay: gate_widths_oc(delay, *args) - target_width_oc
+
+        lo, hi = delay_range if delay_range is not None else (0.0, (cycles1 + cycles2) / 2)
+        delays = np.linspace(lo, hi, n_scan)
+        values = residual(delays)
+
+        k = np.nonzero(np.sign(values[:-1]) * np.sign(values[1:]) < 0)[0]
+        roots = np.concatenate((delays[values == 0],
+                                _bracketed_roots(residual, delays[k], delays[k + 1], values[k], values[k + 1])))
+
+        for delay in np.sort(roots):
+            start, end, p = gate_window(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2,
+                                        delay, envelope_name, ellipticity_threshold)
+            width = 0.0 if np.isnan(start) else (end - start) / p["T01"]
+            if abs(width - target_width_oc) > rtol * target_width_oc:
+                continue
+            solutions.append({"cycles1": cycles1, "cycles2": cycles2, "delay": float(delay),
+                              "gate_width_oc": width, "gate_start": start, "gate_end": end})
+    return solutions
+
+def format_solutions(solutions):
+    if not solutions:
+        return ">>> No delay/cycle combination reaches the target gate width\n"
+    lines = [">>> cycles1   cycles2   delay [o.c.]       gate width [o.c.]"]
+    for s in solutions:
+        lines.append(f"    {s['cycles1']:<9g} {s['cycles2']:<9g} {s['delay']:<18.10e} {s['gate_width_oc']:.10e}")
+    return "\n".join(lines) + "\n"
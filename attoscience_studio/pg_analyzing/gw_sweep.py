@@ -0,0 +1,232 @@
+# pg_analyzing/gw_sweep.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+import matplotlib.pyplot as plt
+from matplotlib.widgets import Slider
+#--------------------------------
+from attoscience_studio.pg_analyzing.field_synthesis import pulse_timing, envelope, vector_potential_amplitude
+##----------------------------------------------------
+SWEEP_AXES = ("delay", "eps1", "eps2", "intensity_ratio")
+SWEEP_LABELS = {
+    "delay": "Delay [o.c.]",
+    "eps1": r"$\epsilon_1$",
+    "eps2": r"$\epsilon_2$",
+    "intensity_ratio": r"$I_2/I_1$",
+}
+DEFAULT_CHUNK_BYTES = 64 * 1024**2
+# (eps1, eps2) of two counter-rotating circular pulses, used by gate_width()
+COUNTER_ROTATING = (1.0, -1.0)
+##----------------------------------------------------
+def time_dependent_ellipticity(envelope1, envelope2, eps1, eps2):
+    """
+    Ellipticity of the superposition of two pulses with parallel major axes,
+    (eps1*E1 + eps2*E2) / (E1 + E2): the one gate model of gate_width(), the
+    sweep and the design solver. gate_width() and design_gate() evaluate it at
+    COUNTER_ROTATING (eps1 = 1, eps2 = -1), i.e. (E1 - E2) / (E1 + E2); the
+    sweep also varies eps1/eps2. 0/0 is left as NaN.
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        return (eps1 * envelope1 + eps2 * envelope2) / (envelope1 + envelope2)
+
+def _crossing(t, a, i_out, i_in, threshold):
+    # Linear interpolation of |eps| = threshold between an outside and an inside sample
+    # t is shared (len(t),) or per parameter set (..., len(t))
+    i_clip = np.clip(i_out, 0, a.shape[-1] - 1)[..., None]
+    t = np.broadcast_to(t, a.shape)
+    a_out = np.take_along_axis(a, i_clip, axis=-1)[..., 0]
+    a_in = np.take_along_axis(a, i_in[..., None], axis=-1)[..., 0]
+    t_out = np.take_along_axis(t, i_clip, axis=-1)[..., 0]
+    t_in = np.take_along_axis(t, i_in[..., None], axis=-1)[..., 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        frac = (a_out - threshold) / (a_out - a_in)
+        crossing = t_out + frac * (t_in - t_out)
+    # Gate open at the edge of the time grid, or next to an undefined (0/0) sample
+    edge = (i_out < 0) | (i_out >= a.shape[-1]) | ~np.isfinite(a_out)
+    return np.where(edge, t_in, crossing)
+
+def gate_edges(t, ellipt, threshold):
+    """
+    Start and end [a.u.] of the gate: the contiguous region around the minimum
+    of |ellipt| where |ellipt| <= threshold, with the two threshold crossings
+    interpolated between samples. ellipt may have any leading shape (..., len(t)).
+    Both are NaN where |ellipt| never drops below the threshold.
+    """
+    a, left, right, gated = gate_bracket(ellipt, threshold)
+    start = _crossing(t, a, left, left + 1, threshold)
+    end = _crossing(t, a, right, right - 1, threshold)
+    return np.where(gated, start, np.nan), np.where(gated, end, np.nan)
+
+def gate_bracket(ellipt, threshold):
+    """
+    Sample-level gate: |ellipt| (NaN -> inf), the last sample above the threshold
+    before the minimum (-1 if none), the first one after it (len(t) if none)
+    and whether the minimum is below the threshold at all.
+    """
+    a = np.abs(ellipt)
+    a = np.where(np.isnan(a), np.inf, a)
+    nt = a.shape[-1]
+    idx = np.arange(nt)
+    imin = np.argmin(a, axis=-1)
+    outside = a > threshold
+
+    left = np.max(np.where(outside & (idx < imin[..., None]), idx, -1), axis=-1)
+    right = np.min(np.where(outside & (idx > imin[..., None]), idx, nt), axis=-1)
+    gated = np.take_along_axis(a, imin[..., None], axis=-1)[..., 0] <= threshold
+    return a, left, right, gated
+
+def gate_duration(t, ellipt, threshold):
+    # Gate width [a.u.]; 0 where there is no gate
+    start, end = gate_edges(t, ellipt, threshold)
+    return np.nan_to_num(end - start, nan=0.0)
+
+##----------------------------------------------------
+def default_sweep_axes(delay, eps1, eps2, intensity1, intensity2, n_delay=31, n_eps=11, n_ratio=11):
+    """
+    Sweep axes around one operating point: +-1 o.c. in delay (negative delays,
+    where pulse 2 would start before t = 0, are dropped), the full [-1, 1]
+    range in both ellipticities and a decade of intensity ratio. The operating
+    point itself, with COUNTER_ROTATING ellipticities, lies on the grid.
+    """
+    ratio = intensity2 / intensity1
+    delays = delay + np.linspace(-1.0, 1.0, n_delay)
+    return {
+        "delay": delays[delays >= 0],
+        "eps1": np.linspace(-1.0, 1.0, n_eps),
+        "eps2": np.linspace(-1.0, 1.0, n_eps),
+        "intensity_ratio": ratio * np.logspace(-0.5, 0.5, n_ratio),
+    }
+
+def gate_width_sweep(lambda1_nm, lambda2_nm, intensity1, cycles1, cycles2, envelope_name, time_step,
+                     ellipticity_threshold, delays, eps1_values, eps2_values, intensity_ratios,
+                     max_bytes=DEFAULT_CHUNK_BYTES):
+    """
+    Gate width over the grid delay x eps1 x eps2 x intensity ratio.
+
+    The envelopes are evaluated once per delay on a time grid shared by the
+    whole sweep; ellipticities are then broadcast over the remaining axes in
+    chunks of at most ~max_bytes, so the full (parameters x time) array is
+    never held in memory.
+
+    Parameters:
+    - intensity1: Intensity of pulse 1 [TW/cm^2]; pulse 2 uses intensity1 * ratio.
+    - delays: Delays [o.c. of pulse 1], >= 0 (pulse 2 starts at delay * T1).
+    - eps1_values, eps2_values: Signed ellipticities of the two pulses.
+    - intensity_ratios: I2/I1.
+
+    Returns a dict with the axes, gate_width / gate_start / gate_end [a.u.]
+    of shape (n_delay, n_eps1, n_eps2, n_ratio), gate_width_oc [o.c.] and T01.
+    """
+    delays = np.atleast_1d(np.asarray(delays, dtype=float))
+    eps1_values = np.atleast_1d(np.asarray(eps1_values, dtype=float))
+    eps2_values = np.atleast_1d(np.asarray(eps2_values, dtype=float))
+    intensity_ratios = np.atleast_1d(np.asarray(intensity_ratios, dtype=float))
+    if np.any(intensity_ratios <= 0):
+        raise ValueError("Intensity ratios must be positive.")
+    if np.any(delays < 0):
+        raise ValueError("Delays must not be negative: pulse 2 would start before the time grid.")
+
+    p = pulse_timing(lambda1_nm, lambda2_nm, cycles1, cycles2, delays)
+    t = np.arange(0, np.max(p["Tend2"]) + time_step, time_step)
+    envelope1 = envelope(t, vector_potential_amplitude(intensity1, p["w01"]), p["Tst1"], p["Ttot1"], envelope_name)
+    # Pulse 2 at intensity1; the ratio only rescales it by sqrt(I2/I1)
+    envelope2 = envelope(t[None, :], vector_potential_amplitude(intensity1, p["w02"]),
+                         p["Tst2"][:, None], p["Ttot2"], envelope_name)
+    amplitude_scale = np.sqrt(intensity_ratios)
+
+    shape = (len(delays), len(eps1_values), len(eps2_values), len(intensity_ratios))
+    n_total = int(np.prod(shape))
+    # ~4 float64 temporaries of len(t) per parameter set
+    chunk = max(1, int(max_bytes // (4 * 8 * len(t))))
+
+    gate_start = np.empty(n_total)
+    gate_end = np.empty(n_total)
+    for first in range(0, n_total, chunk):
+        flat = np.arange(first, min(first + chunk, n_total))
+        i_delay, i_eps1, i_eps2, i_ratio = np.unravel_index(flat, shape)
+        E2 = envelope2[i_delay] * amplitude_scale[i_ratio, None]
+        ellipt = time_dependent_ellipticity(envelope1, E2, eps1_values[i_eps1, None], eps2_values[i_eps2, None])
+        gate_start[flat], gate_end[flat] = gate_edges(t, ellipt, ellipticity_threshold)
+
+    gate_start = gate_start.reshape(shape)
+    gate_end = gate_end.reshape(shape)
+    gate_width = np.nan_to_num(gate_end - gate_start, nan=0.0)
+    return {
+        "delay": delays, "eps1": eps1_values, "eps2": eps2_values, "intensity_ratio": intensity_ratios,
+        "gate_width": gate_width, "gate_start": gate_start, "gate_end": gate_end,
+        "gate_width_oc": gate_width / p["T01"], "T01": p["T01"],
+        "ellipticity_threshold": ellipticity_threshold,
+    }
+
+def save_sweep(sweep, file_path="gw_sweep.npz"):
+    np.savez(file_path, **{key: np.asarray(value) for key, value in sweep.items()})
+
+##----------------------------------------------------
+def plot_gw_sweep(sweep, x_axis="delay", y_axis="intensity_ratio", initial=None, plot_settings=None):
+    """
+    Gate width [o.c.] as a heatmap over two sweep axes; the other two are
+    selected with sliders. initial maps axis name -> value to start from.
+    """
+    plot_settings = plot_settings or {}
+    initial = initial or {}
+    if x_axis not in SWEEP_AXES or y_axis not in SWEEP_AXES or x_axis == y_axis:
+        raise ValueError(f"x_axis and y_axis must be two different entries of {SWEEP_AXES}.")
+    slider_axes = [name for name in SWEEP_AXES if name not in (x_axis, y_axis)]
+    data = np.moveaxis(sweep["gate_width_oc"], [SWEEP_AXES.index(x_axis), SWEEP_AXES.index(y_axis)], [-1, -2])
+
+    def nearest(name, value):
+        return int(np.argmin(np.abs(sweep[name] - value)))
+
+    selected = {name: nearest(name, initial.get(name, sweep[name][len(sweep[name]) // 2])) for name in slider_axes}
+
+    def current_map():
+        # Slider axes keep their relative order in `data` after moveaxis
+        return data[selected[slider_axes[0]], selected[slider_axes[1]]]
+
+    fig = plt.figure()
+    fig.patch.set_facecolor(plot_settings.get("background_color", "white"))
+    ax = fig.add_axes([0.12, 0.30, 0.70, 0.60])
+    cax = fig.add_axes([0.85, 0.30, 0.03, 0.60])
+    mesh = ax.pcolormesh(sweep[x_axis], sweep[y_axis], current_map(), shading="nearest",
+                         cmap=plot_settings.get("colormap", "viridis"), vmin=0.0, vmax=max(np.max(data), 1e-12))
+    fig.colorbar(mesh, cax=cax, label="Gate width [o.c.]")
+    ax.set_xlabel(SWEEP_LABELS[x_axis])
+    ax.set_ylabel(SWEEP_LABELS[y_axis])
+    if y_axis == "intensity_ratio":
+        ax.set_yscale("log")
+    ax.set_title(plot_settings.get("graph_title", f"Gate width (|$\\xi$| < {sweep['ellipticity_threshold']})"))
+
+    sliders = []
+    for k, name in enumerate(slider_axes):
+        values = sweep[name]
+        if len(values) < 2:
+            continue
+        slider_ax = fig.add_axes([0.20, 0.14 - 0.07 * k, 0.55, 0.03])
+        slider = Slider(slider_ax, SWEEP_LABELS[name], values[0], values[-1], valinit=values[selected[name]], valstep=values)
+        def on_change(value, name=name):
+            selected[name] = nearest(name, value)
+            mesh.set_array(current_map().ravel())
+            fig.canvas.draw_idle()
+        slider.on_changed(on_change)
+        sliders.append(slider)
+
+    # Keep the widgets alive as long as the figure
+    fig._gw_sliders = sliders
+    plt.show()
+    return fig
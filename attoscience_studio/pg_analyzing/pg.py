@@ -44,110 +44,30 @@ CNST_1_TWcm2 = PhysicalConstants.CNST_1_TWcm2
 c_au = PhysicalConstants.c_au
 #--------------------------------
 from attoscience_studio.utils.status_symbols import Symbols
+from attoscience_studio.utils.profiler import profile_stage
+from attoscience_studio.pg_analyzing.field_synthesis import two_color_field
+from attoscience_studio.utils.peak_metrics import peak_metrics
 ##----------------------------------------------------         
 def polarization_gating(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2, alpha1, alpha2, cep1, cep2, delay, envelope_name, time_step, extract_data_option):
-    
-    lambda_um1 = lambda1_nm*1.0e-3
-    lambda_um2 = lambda2_nm*1.0e-3
-   
-    fiel_str1 = intensity1*CNST_1_TWcm2
-    fiel_str2 = intensity2*CNST_1_TWcm2
-    
-    w01 = 0.045563 / lambda_um1
-    w02 = 0.045563 / lambda_um2
-    
-    T01 = 2 * np.pi / w01;T02 = 2 * np.pi / w02   
-    T0_SI1 = T01*TIMEau;T0_SI2 = T02*TIMEau 
-   
-    Iau1 = np.sqrt(intensity1*1.0e12)/np.sqrt(3.509470*1.0e16)
-    Iau2 = np.sqrt(intensity2*1.0e12)/np.sqrt(3.509470*1.0e16)
-   
-    E0_laser1 = np.sqrt(intensity1 * 10**12) / np.sqrt(3.509470 * 10**16)
-    E0_laser2 = np.sqrt(intensity2 * 10**12) / np.sqrt(3.509470 * 10**16)
-   
-    A0_laser1 = Iau1*c_au/w01;A0_laser2 = Iau2*c_au/w02
-    
-    Ttot1 = cycles1 * T01;Ttot2 = cycles2 * T02
-    alpha_L1 = alpha1 * np.pi / 180
-    alpha_L2 = alpha2 * np.pi / 180
-   
-    Tdelay = delay*T01  
-   
-    Tst1 = 0*T01
-    Tst2 = Tst1 + (Ttot1/2) + Tdelay - (Ttot2/2)     
-    
-    Tend1 = Tst1 + Ttot1;Tend2 = Tst2 + Ttot2
-   
-    tm1 = Tst1+Ttot1/2;tm2 = Tst2+Ttot2/2
-    dt = time_step
-    t = np.arange(0, Tend2 + dt, dt) #hbar/H
-    max_iter = int(Tend2 / dt)*2
-
-    def heaviside(x):
-        return 1.0 * (x >= 0)
-    
-    if envelope_name == 'Sine_square':
-        envelope_func1 = lambda t: A0_laser1*np.sin(np.pi * (t - Tst1) / Ttot1)**2 * heaviside(Tend1 - t)* heaviside(t-Tst1)
-        envelope_func2 = lambda t: A0_laser2*np.sin(np.pi * (t - Tst2) / Ttot2)**2 * heaviside(Tend2 - t)* heaviside(t-Tst2)
-       
-        Alaser_x1 = lambda t: np.real(+(np.cos(alpha_L1) + 1j * eps1 * np.sin(alpha_L1)) *  np.exp(1j * w01 * (t - Ttot1 / 2) + cep1) * envelope_func1(t))
-        Alaser_x2 = lambda t: np.real(+(np.cos(alpha_L2) + 1j * eps2 * np.sin(alpha_L2)) *  np.exp(1j * w02 * (t - Ttot2 / 2) + cep2) * envelope_func2(t))
-        Alaser_y1 = lambda t: np.real(+(np.sin(alpha_L1) - 1j * eps1 * np.cos(alpha_L1)) *  np.exp(1j * w01 * (t - Ttot1 / 2) + cep1) * envelope_func1(t))
-        Alaser_y2 = lambda t: np.real(+(np.sin(alpha_L2) - 1j * eps2 * np.cos(alpha_L2)) *  np.exp(1j * w02 * (t - Ttot2 / 2) + cep2) * envelope_func2(t))
-    
-    elif envelope_name == 'Gaussian':
-        envelope_func1 = lambda t: A0_laser1 * np.exp(-2 * np.log(2) * ((t - tm1) / (Ttot1 / 2))**2)
-        envelope_func2 = lambda t: A0_laser2 * np.exp(-2 * np.log(2) * ((t - tm2) / (Ttot2 / 2))**2)
-       
-        Alaser_x1 = lambda t: np.real(+(np.cos(alpha_L1) + 1j * eps1 * np.sin(alpha_L1)) *  np.exp(1j * w01 * (t - Ttot1 / 2) + cep1) * envelope_func1(t))
-        Alaser_x2 = lambda t: np.real(+(np.cos(alpha_L2) + 1j * eps2 * np.sin(alpha_L2)) *  np.exp(1j * w02 * (t - Ttot2 / 2) + cep2) * envelope_func2(t))
-        Alaser_y1 = lambda t: np.real(+(np.sin(alpha_L1) - 1j * eps1 * np.cos(alpha_L1)) *  np.exp(1j * w01 * (t - Ttot1 / 2) + cep1) * envelope_func1(t))
-        Alaser_y2 = lambda t: np.real(+(np.sin(alpha_L2) - 1j * eps2 * np.cos(alpha_L2)) *  np.exp(1j * w02 * (t - Ttot2 / 2) + cep2) * envelope_func2(t))
-    
-    At_x1 = np.array([Alaser_x1(ti) for ti in t])
-    At_x2 = np.array([Alaser_x2(ti) for ti in t])
-    At_y1 = np.array([Alaser_y1(ti) for ti in t])
-    At_y2 = np.array([Alaser_y2(ti) for ti in t])
-   
-    envelope1 = np.array([envelope_func1(ti) for ti in t])
-    envelope2 = np.array([envelope_func2(ti) for ti in t])
-   
-    At_x = At_x1 + At_x2
-    At_y = At_y1 + At_y2
-
+    #---------------CALL--------------------
+    w01, w02, T01, T02, t, At_x, At_y, envelope1, envelope2 = two_color_field(
+        lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2,
+        alpha1, alpha2, cep1, cep2, delay, envelope_name, time_step)
+    #---------------------------------------
     return w01, w02, T01, T02, t, At_x, At_y, envelope1, envelope2
 
 ##----------------------------------------------------
 def pg_fwhm(t, T01, T02, envelope1, envelope2):
-    max_envelope1 = max(envelope1)
-    max_envelope2 = max(envelope2)
-   
-    idx_max1 = np.argmax(envelope1)
+    # Both envelopes in one batch; window edges are used when a half maximum is not reached
+    metrics = peak_metrics(np.vstack((envelope1, envelope2)), t)
+    max_envelope1, max_envelope2 = metrics["peak_value"]
     half_max_envelope1 = max_envelope1 / 2
-    idx_max2 = np.argmax(envelope2)
-    half_max_envelope2 = max_envelope2 / 2
-    
-    left_idx1 = np.where(envelope1[:idx_max1] <= half_max_envelope1)[0][-1]
-    right_idx1 = np.where(envelope1[idx_max1:] <= half_max_envelope1)[0][0] + idx_max1
-    
-    left_idx2 = np.where(envelope2[:idx_max2] <= half_max_envelope2)[0][-1]
-    right_idx2 = np.where(envelope2[idx_max2:] <= half_max_envelope2)[0][0] + idx_max2
-    
-    co_t_At1 = t / T01
-    co_t_At2 = t / T02
-    
-    t_left1 = co_t_At1[left_idx1]
-    t_left2 = co_t_At2[left_idx2]
-    t_right1 = co_t_At1[right_idx1]
-    t_right2 = co_t_At2[right_idx2]
-    
-    FWHM1 = t_right1 - t_left1
-    FWHM_SI1 = (FWHM1 * T01) * TIMEau
-    FWHM_SI_fs1 = FWHM_SI1*1.0e15
-    FWHM2 = t_right2 - t_left2
-    FWHM_SI2 = (FWHM2 * T02) * TIMEau
-    FWHM_SI_fs2 = FWHM_SI2*1.0e15
-    FWHM_t = FWHM_SI1
+
+    t_left1 = metrics["t_left"][0] / T01
+    t_right1 = metrics["t_right"][0] / T01
+
+    FWHM_SI_fs1 = metrics["fwhm"][0] * TIMEau * 1.0e15
+    FWHM_SI_fs2 = metrics["fwhm"][1] * TIMEau * 1.0e15
 
     return max_envelope1, max_envelope2, t_left1, t_right1, half_max_envelope1, FWHM_SI_fs1, FWHM_SI_fs2
 ##----------------------------------------------------
@@ -161,13 +81,16 @@ def pg_connector(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles
                  plot_settings, extract_data_option,
                  ipy_console=None):
     try:
-        w01, w02, T01, T02, t, At_x, At_y, envelope1, envelope2 = polarization_gating(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2, alpha1, alpha2, cep1, cep2, delay, envelope_name, time_step, extract_data_option)
+        with profile_stage("Polarization gating", "transform"):
+            w01, w02, T01, T02, t, At_x, At_y, envelope1, envelope2 = polarization_gating(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2, alpha1, alpha2, cep1, cep2, delay, envelope_name, time_step, extract_data_option)
 
-        max_envelope1, max_envelope2, t_left1, t_right1, half_max_envelope1, FWHM_SI_fs1, FWHM_SI_fs2 = pg_fwhm(t, T01, T02, envelope1, envelope2)
+        with profile_stage("Polarization gating", "post-process"):
+            max_envelope1, max_envelope2, t_left1, t_right1, half_max_envelope1, FWHM_SI_fs1, FWHM_SI_fs2 = pg_fwhm(t, T01, T02, envelope1, envelope2)
         
-        pg_plot(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2, alpha1, alpha2, cep1, cep2, delay, envelope_name, time_step, 
-                w01, w02, T01, T02, 
-                t, At_x, At_y, envelope1, envelope2, t_left1, t_right1, half_max_envelope1, FWHM_SI_fs1, plot_settings, extract_data_option)
+        with profile_stage("Polarization gating", "plot"):
+            pg_plot(lambda1_nm, lambda2_nm, intensity1, intensity2, cycles1, cycles2, eps1, eps2, alpha1, alpha2, cep1, cep2, delay, envelope_name, time_step, 
+                    w01, w02, T01, T02, 
+                    t, At_x, At_y, envelope1, envelope2, t_left1, t_right1, half_max_envelope1, FWHM_SI_fs1, plot_settings, extract_data_option)
 
 
         T01_SI = T01*2.418884326509*1e-17
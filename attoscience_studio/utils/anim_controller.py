@@ -278,7 +278,8 @@ class AnimationController(QObject):
             self.anim = animation.FuncAnimation(
                 self.figure,
                 self._animate_frame,
-                frames=range(0, self._total_frames, 2),  # Skip frames for performance
+                # Skip frames for performance; re-evaluated on every repeat so appended frames join the loop
+                frames=lambda: iter(range(0, self._total_frames, 2)),
                 interval=50,  # 20 FPS
                 blit=False,
                 repeat=True,  # Allow repeat for display
@@ -331,6 +332,26 @@ class AnimationController(QObject):
             print(f"Frame {frame} error: {str(e)}")
             return []
 
+    def append_frames(self, frames_curr, frames_nex, interpolated_Time, interpolated_AX, interpolated_AY):
+        """Extend the animation with new frames (e.g. from a TdDirectoryWatcher) without touching earlier ones"""
+        if not hasattr(self.figure, 'animation_data') or not frames_curr:
+            return
+        data = self.figure.animation_data
+        data['smooth_frames_curr'].extend(frames_curr)
+        data['smooth_frames_nex'].extend(frames_nex)
+        data['interpolated_Time'] = np.concatenate((data['interpolated_Time'], interpolated_Time))
+        data['interpolated_AX'] = np.concatenate((data['interpolated_AX'], interpolated_AX))
+        data['interpolated_AY'] = np.concatenate((data['interpolated_AY'], interpolated_AY))
+        self._frames_curr = data['smooth_frames_curr']
+        self._total_frames = len(self._frames_curr)
+
+        # Grow the laser trajectory and the time axis of the 3D plot
+        trajectory = data.get('trajectory')
+        if trajectory is not None:
+            trajectory.set_data_3d(data['interpolated_Time'], data['interpolated_AX'], data['interpolated_AY'])
+            trajectory.axes.set_xlim([0, max(data['interpolated_Time'])])
+        self.canvas.draw_idle()
+
     def save_animation(self, save_format, save_dir):
         """Save animation in background thread with completely separate objects"""
         if not self._setup_complete:
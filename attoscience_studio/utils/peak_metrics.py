@@ -0,0 +1,130 @@
+# utils/peak_metrics.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import numpy as np
+##----------------------------------------------------
+CROSSING_METHODS = ("nearest", "linear", "cubic")
+##----------------------------------------------------
+def _take(curves, idx):
+    return np.take_along_axis(curves, idx[:, None], axis=1)[:, 0]
+
+def _cubic_fraction(curves, i, level, n_iter=40):
+    """
+    Fraction s in [0, 1] where the cubic through samples i-1, i, i+1, i+2
+    crosses `level` between samples i and i+1 (clamped at the curve ends).
+    """
+    n = curves.shape[1]
+    y = np.stack([_take(curves, np.clip(i + k, 0, n - 1)) for k in (-1, 0, 1, 2)], axis=1) - level[:, None]
+
+    def cubic(s):
+        # Lagrange basis on the nodes -1, 0, 1, 2
+        return (-s * (s - 1) * (s - 2) / 6 * y[:, 0] + (s + 1) * (s - 1) * (s - 2) / 2 * y[:, 1]
+                - (s + 1) * s * (s - 2) / 2 * y[:, 2] + (s + 1) * s * (s - 1) / 6 * y[:, 3])
+
+    lo = np.zeros(len(i))
+    hi = np.ones(len(i))
+    f_lo = y[:, 1]
+    for _ in range(n_iter):
+        mid = 0.5 * (lo + hi)
+        f_mid = cubic(mid)
+        same = np.sign(f_mid) == np.sign(f_lo)
+        lo = np.where(same, mid, lo)
+        f_lo = np.where(same, f_mid, f_lo)
+        hi = np.where(same, hi, mid)
+    return 0.5 * (lo + hi)
+
+def _crossing_time(curves, t, i, level, method):
+    # Time where the curve crosses `level` between samples i and i+1
+    y0 = _take(curves, i)
+    y1 = _take(curves, i + 1)
+    if method == "nearest":
+        # Original behaviour: the outer sample at or below the level
+        return t[i], t[i + 1]
+    if method == "linear":
+        with np.errstate(divide='ignore', invalid='ignore'):
+            s = np.clip(np.nan_to_num((level - y0) / (y1 - y0)), 0.0, 1.0)
+    else:
+        s = _cubic_fraction(curves, i, level)
+    crossing = t[i] + s * (t[i + 1] - t[i])
+    return crossing, crossing
+
+def peak_metrics(curves, t=None, method="linear", fraction=0.5, lo=None, hi=None):
+    """
+    Peak position, width and contrast of a batch of curves.
+
+    Parameters:
+    - curves: Array (M, Nt) or (Nt,) of non-negative curves, e.g. pulse intensities.
+    - t: Common time axis (Nt,); sample index if None.
+    - method: Crossing interpolation, 'nearest' (snap to samples), 'linear' or 'cubic'.
+    - fraction: Level relative to the peak; 0.5 gives the FWHM.
+    - lo, hi: Optional first/last sample index of each curve to consider (e.g. one burst of a train).
+
+    Returns a dict of (M,) arrays (scalars for a single curve):
+    peak_index, peak_value, peak_time, t_left, t_right, fwhm,
+    resolved (both crossings inside [lo, hi]; otherwise the edge is used)
+    and contrast (highest local maximum outside the main lobe / peak, 0 if none).
+    """
+    if method not in CROSSING_METHODS:
+        raise ValueError(f"Unknown crossing method '{method}'. Expected one of {CROSSING_METHODS}.")
+    curves = np.asarray(curves, dtype=float)
+    single = curves.ndim == 1
+    curves = np.atleast_2d(curves)
+    m, n = curves.shape
+    if n < 2:
+        raise ValueError("At least two samples are needed to measure a width.")
+    t = np.arange(n, dtype=float) if t is None else np.asarray(t, dtype=float)
+    idx = np.arange(n)
+    lo = np.zeros(m, dtype=int) if lo is None else np.broadcast_to(np.asarray(lo, dtype=int), (m,))
+    hi = np.full(m, n - 1) if hi is None else np.broadcast_to(np.asarray(hi, dtype=int), (m,))
+    inside = (idx >= lo[:, None]) & (idx <= hi[:, None])
+
+    peak_index = np.argmax(np.where(inside, curves, -np.inf), axis=1)
+    peak_value = _take(curves, peak_index)
+    level = fraction * peak_value
+    below = (curves <= level[:, None]) & inside
+
+    # Last sample at/below the level before the peak, first one after it
+    left = np.max(np.where(below & (idx < peak_index[:, None]), idx, (lo - 1)[:, None]), axis=1)
+    right = np.min(np.where(below & (idx > peak_index[:, None]), idx, (hi + 1)[:, None]), axis=1)
+    resolved = (left >= lo) & (right <= hi)
+
+    left_c = np.clip(left, 0, n - 2)
+    right_c = np.clip(right - 1, 0, n - 2)
+    t_left_lo, t_left_hi = _crossing_time(curves, t, left_c, level, method)
+    t_right_lo, t_right_hi = _crossing_time(curves, t, right_c, level, method)
+    t_left = np.where(left >= lo, t_left_lo, t[lo])
+    t_right = np.where(right <= hi, t_right_hi, t[hi])
+
+    # Secondary peak: local maxima inside [lo, hi] but outside [left, right]
+    interior = (curves[:, 1:-1] > curves[:, :-2]) & (curves[:, 1:-1] >= curves[:, 2:])
+    maxima = np.zeros_like(below)
+    maxima[:, 1:-1] = interior
+    outside = (idx < np.maximum(left, lo)[:, None]) | (idx > np.minimum(right, hi)[:, None])
+    secondary = np.max(np.where(maxima & outside & inside, curves, 0.0), axis=1)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        contrast = np.where(peak_value > 0, secondary / peak_value, 0.0)
+
+    result = {
+        "peak_index": peak_index, "peak_value": peak_value, "peak_time": t[peak_index],
+        "t_left": t_left, "t_right": t_right, "fwhm": t_right - t_left,
+        "resolved": resolved, "contrast": contrast,
+    }
+    if single:
+        result = {key: value[0] for key, value in result.items()}
+    return result
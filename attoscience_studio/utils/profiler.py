@@ -0,0 +1,178 @@
+# utils/profiler.py
+
+# Copyright (C) 2024-2025 Erfan Heydari
+#
+# This file is part of the Attoscience Studio.
+#
+# This program is free software: you can redistribute it and/or modify
+# it under the terms of the GNU General Public License as published by
+# the Free Software Foundation, either version 3 of the License, or
+# (at your option) any later version.
+#
+# This program is distributed in the hope that it will be useful,
+# but WITHOUT ANY WARRANTY; without even the implied warranty of
+# MERCHANTABILITY or FITNESS FOR A PARTICULAR PURPOSE. See the
+# GNU General Public License for more details.
+#
+# You should have received a copy of the GNU General Public License
+# along with this program. If not, see <https://www.gnu.org/licenses/>.
+
+import os
+import json
+import time
+import platform
+import threading
+from contextlib import contextmanager
+from datetime import datetime
+import psutil
+##----------------------------------------------------
+PIPELINE_STAGES = ("load", "filter", "transform", "post-process", "plot")
+##----------------------------------------------------
+class PeakMemorySampler:
+    """
+    Samples the resident set size of the current process on a background
+    thread while a stage runs, so short allocation spikes are not missed.
+    """
+    def __init__(self, process, interval=0.02):
+        self.process = process
+        self.interval = interval
+        self.start_rss = 0
+        self.peak_rss = 0
+        self._stop_event = threading.Event()
+        self._thread = None
+
+    def _rss(self):
+        try:
+            return self.process.memory_info().rss
+        except psutil.Error:
+            return 0
+
+    def _run(self):
+        while not self._stop_event.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, self._rss())
+
+    def start(self):
+        self.start_rss = self._rss()
+        self.peak_rss = self.start_rss
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop_event.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.peak_rss = max(self.peak_rss, self._rss())
+        return self.start_rss, self.peak_rss
+
+##----------------------------------------------------
+class SessionProfiler:
+    """
+    Collects stage timings and peak memory for every analysis pipeline
+    run during the session.
+
+    Parameters:
+    - sample_interval: Memory sampling period in seconds.
+    """
+    def __init__(self, sample_interval=0.02):
+        self.sample_interval = sample_interval
+        self.session_start = datetime.now()
+        self.records = []
+        self.revision = 0
+        self._lock = threading.Lock()
+        self._process = psutil.Process(os.getpid())
+
+    @contextmanager
+    def stage(self, pipeline, stage):
+        if stage not in PIPELINE_STAGES:
+            raise ValueError(f"Unknown profiling stage '{stage}'. Expected one of {PIPELINE_STAGES}.")
+        sampler = PeakMemorySampler(self._process, self.sample_interval)
+        sampler.start()
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration = time.perf_counter() - start
+            start_rss, peak_rss = sampler.stop()
+            self.add_record(pipeline, stage, duration, start_rss, peak_rss)
+
+    def add_record(self, pipeline, stage, duration, start_rss, peak_rss):
+        record = {
+            "pipeline": pipeline,
+            "stage": stage,
+            "timestamp": datetime.now().isoformat(timespec="seconds"),
+            "duration_s": duration,
+            "start_rss_mb": start_rss / 1024**2,
+            "peak_rss_mb": peak_rss / 1024**2,
+            "peak_delta_mb": max(peak_rss - start_rss, 0) / 1024**2,
+        }
+        with self._lock:
+            self.records.append(record)
+            self.revision += 1
+
+    def summary(self):
+        with self._lock:
+            records = list(self.records)
+
+        summary = {}
+        for record in records:
+            stages = summary.setdefault(record["pipeline"], {})
+            entry = stages.get(record["stage"])
+            if entry is None:
+                entry = stages[record["stage"]] = {
+                    "runs": 0,
+                    "total_s": 0.0,
+                    "min_s": float("inf"),
+                    "max_s": 0.0,
+                    "last_s": 0.0,
+                    "peak_rss_mb": 0.0,
+                    "peak_delta_mb": 0.0,
+                }
+            entry["runs"] += 1
+            entry["total_s"] += record["duration_s"]
+            entry["min_s"] = min(entry["min_s"], record["duration_s"])
+            entry["max_s"] = max(entry["max_s"], record["duration_s"])
+            entry["last_s"] = record["duration_s"]
+            entry["peak_rss_mb"] = max(entry["peak_rss_mb"], record["peak_rss_mb"])
+            entry["peak_delta_mb"] = max(entry["peak_delta_mb"], record["peak_delta_mb"])
+
+        for stages in summary.values():
+            for entry in stages.values():
+                entry["mean_s"] = entry["total_s"] / entry["runs"]
+
+        # Keep the stages in pipeline order
+        return {
+            pipeline: {stage: stages[stage] for stage in PIPELINE_STAGES if stage in stages}
+            for pipeline, stages in summary.items()
+        }
+
+    def to_dict(self):
+        with self._lock:
+            records = list(self.records)
+        return {
+            "session_start": self.session_start.isoformat(timespec="seconds"),
+            "exported_at": datetime.now().isoformat(timespec="seconds"),
+            "host": {
+                "platform": platform.platform(),
+                "python": platform.python_version(),
+                "cpu_count": psutil.cpu_count(),
+                "total_ram_gb": psutil.virtual_memory().total / 1024**3,
+            },
+            "summary": self.summary(),
+            "records": records,
+        }
+
+    def export_json(self, file_path):
+        with open(file_path, "w") as f:
+            json.dump(self.to_dict(), f, indent=2)
+
+    def reset(self):
+        with self._lock:
+            self.records = []
+            self.session_start = datetime.now()
+            self.revision += 1
+
+##----------------------------------------------------
+session_profiler = SessionProfiler()
+
+def profile_stage(pipeline, stage):
+    return session_profiler.stage(pipeline, stage)
@@ -20,7 +20,8 @@
 import sys
 import numpy as np
 import pyqtgraph as pg
-from PyQt5.QtWidgets import QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QPushButton
+from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout, QLabel, QFrame, QPushButton,
+                             QTableWidget, QTableWidgetItem, QHeaderView, QFileDialog, QMessageBox)
 from PyQt5.QtCore import QTimer, pyqtSignal
 from PyQt5.QtGui import QFont, QPalette, QColor
 import webbrowser
@@ -28,6 +29,8 @@ from functools import partial
 import psutil
 import time
 from collections import deque
+from datetime import datetime
+from attoscience_studio.utils.profiler import session_profiler
 ##----------------------------------------------------
 class SystemMonitorChart(QWidget):
     def __init__(self, title="System Monitor", max_points=100, parent=None):
@@ -331,7 +334,107 @@ class SystemMonitorWidget(QWidget):
         main_layout.addStretch(1)
 
         # background
-        self.setStyleSheet("background-color: #2B2B2B;") 
+        self.setStyleSheet("background-color: #2B2B2B;")
+######################################################################
+class ProfilerPanel(QWidget):
+    COLUMNS = ["Pipeline", "Stage", "Runs", "Last [ms]", "Mean [ms]", "Max [ms]", "Peak RSS [MB]", "Δ RSS [MB]"]
+
+    def __init__(self, profiler=session_profiler, parent=None):
+        super().__init__(parent)
+        self.profiler = profiler
+        self.last_revision = -1
+        self.setup_ui()
+        self.setup_timer()
+
+    def setup_ui(self):
+        main_layout = QVBoxLayout(self)
+        main_layout.setContentsMargins(10, 10, 10, 10)
+        main_layout.setSpacing(5)
+
+        title_label = QLabel("Pipeline Profiler")
+        title_label.setFont(QFont("Arial", 12, QFont.Bold))
+        title_label.setStyleSheet("color: #f0f0f0; padding: 10px;")
+        main_layout.addWidget(title_label)
+
+        self.session_label = QLabel()
+        self.session_label.setFont(QFont("Arial", 8))
+        self.session_label.setStyleSheet("color: #bbbbbb; padding: 5px;")
+        main_layout.addWidget(self.session_label)
+
+        self.table = QTableWidget(0, len(self.COLUMNS))
+        self.table.setHorizontalHeaderLabels(self.COLUMNS)
+        self.table.verticalHeader().setVisible(False)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        self.table.setSelectionMode(QTableWidget.NoSelection)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setStretchLastSection(True)
+        self.table.setStyleSheet(
+            "QTableWidget { background-color: #2B2B2B; color: #E0E0E0; gridline-color: #444444; font-size: 9pt; }"
+            "QHeaderView::section { background-color: #3A3A3A; color: #E0E0E0; padding: 4px; border: 1px solid #444444; }"
+        )
+        main_layout.addWidget(self.table)
+
+        button_layout = QHBoxLayout()
+        button_style = (
+            "QPushButton { background-color: #3A3A3A; color: #E0E0E0; border: 1px solid #555555; padding: 5px 12px; }"
+            "QPushButton:hover { background-color: #4A4A4A; }"
+        )
+        self.export_button = QPushButton("Export JSON")
+        self.export_button.setStyleSheet(button_style)
+        self.export_button.clicked.connect(self.export_json)
+        self.reset_button = QPushButton("Reset")
+        self.reset_button.setStyleSheet(button_style)
+        self.reset_button.clicked.connect(self.reset_session)
+        button_layout.addStretch(1)
+        button_layout.addWidget(self.reset_button)
+        button_layout.addWidget(self.export_button)
+        main_layout.addLayout(button_layout)
+
+        self.setStyleSheet("background-color: #2B2B2B;")
+        self.update_table()
+
+    def setup_timer(self):
+        self.timer = QTimer()
+        self.timer.timeout.connect(self.update_table)
+        self.timer.start(1000)
+
+    def update_table(self):
+        if self.profiler.revision == self.last_revision:
+            return
+        self.last_revision = self.profiler.revision
+
+        rows = []
+        for pipeline, stages in self.profiler.summary().items():
+            for stage, entry in stages.items():
+                rows.append([
+                    pipeline,
+                    stage,
+                    f"{entry['runs']}",
+                    f"{entry['last_s'] * 1e3:.1f}",
+                    f"{entry['mean_s'] * 1e3:.1f}",
+                    f"{entry['max_s'] * 1e3:.1f}",
+                    f"{entry['peak_rss_mb']:.1f}",
+                    f"{entry['peak_delta_mb']:.1f}",
+                ])
+
+        self.table.setRowCount(len(rows))
+        for i, row in enumerate(rows):
+            for j, value in enumerate(row):
+                self.table.setItem(i, j, QTableWidgetItem(value))
 
+        session_start = self.profiler.session_start.strftime("%H:%M:%S")
+        self.session_label.setText(f"Session started: {session_start}   |   Recorded stages: {len(self.profiler.records)}")
 
+    def export_json(self):
+        default_name = f"profile_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        file_path, _ = QFileDialog.getSaveFileName(self, "Export profiling session", default_name, "JSON Files (*.json)")
+        if not file_path:
+            return
+        try:
+            self.profiler.export_json(file_path)
+        except OSError as e:
+            QMessageBox.warning(self, "Export Error", f"Failed to write profiling data: {e}")
 
+    def reset_session(self):
+        self.profiler.reset()
+        self.update_table()